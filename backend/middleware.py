@@ -0,0 +1,181 @@
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from productos.snapshot import CARPETA, NOMBRE_SNAPSHOT, carpeta_snapshots, materializar
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli se comprime solo con gzip
+    brotli = None
+
+
+# =====================================================
+# 📦 WHITENOISE + SNAPSHOT DEL CATÁLOGO
+# =====================================================
+class CatalogoWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise arma su lista de archivos al arrancar (después de
+    collectstatic), así que no ve los snapshots que se publican con el
+    servidor corriendo. Esta versión los busca a demanda en
+    STATIC_ROOT/catalogo/ y, si todavía no están en el disco de este
+    proceso, los baja de la base (los publica el worker). Como el nombre
+    lleva versión + hash, los sirve con Cache-Control inmutable. Las
+    variantes .gz/.br las elige WhiteNoise según Accept-Encoding.
+    """
+
+    MAX_SNAPSHOTS = 16
+
+    def __init__(self, *args, **kwargs):
+        self._snapshots = {}
+        # Nombres que no están en la base: no consultar de nuevo en cada request
+        self._inexistentes = set()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def prefijo_snapshot(self):
+        # Propiedad: WhiteNoise llama a immutable_file_test ya desde su __init__
+        return f"{self.static_prefix}{CARPETA}/"
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefijo_snapshot):
+            static_file = self.archivo_snapshot(request.path_info)
+            if static_file is not None:
+                return self.serve(static_file, request)
+        return super().__call__(request)
+
+    def archivo_snapshot(self, url):
+        nombre = url[len(self.prefijo_snapshot):]
+        if not NOMBRE_SNAPSHOT.fullmatch(nombre):
+            return None
+
+        ruta = os.path.join(carpeta_snapshots(), nombre)
+        if not os.path.isfile(ruta):
+            # Nuevo para este proceso, o borrado por la limpieza de viejos
+            self._snapshots.pop(url, None)
+            if nombre in self._inexistentes:
+                return None
+            if materializar(nombre) is None:
+                if len(self._inexistentes) >= self.MAX_SNAPSHOTS:
+                    self._inexistentes.clear()
+                self._inexistentes.add(nombre)
+                return None
+
+        if url not in self._snapshots:
+            if len(self._snapshots) >= self.MAX_SNAPSHOTS:
+                self._snapshots.clear()
+            self._snapshots[url] = self.get_static_file(ruta, url)
+        return self._snapshots[url]
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(self.prefijo_snapshot):
+            return bool(NOMBRE_SNAPSHOT.fullmatch(url[len(self.prefijo_snapshot):]))
+        return super().immutable_file_test(path, url)
+
+
+# =====================================================
+# 🗜️ COMPRESIÓN DE RESPUESTAS DE LA API
+# =====================================================
+TIPOS_COMPRIMIBLES = re.compile(r"^(application/(json|javascript|xml)|text/)", re.I)
+_RE_Q = re.compile(r"q\s*=\s*([0-9.]+)", re.I)
+
+
+def codificaciones_aceptadas(accept_encoding):
+    """{"br", "gzip", ...} de un Accept-Encoding, sin las que vienen con q=0."""
+    aceptadas = set()
+    for parte in (accept_encoding or "").split(","):
+        nombre, _, params = parte.strip().partition(";")
+        q = _RE_Q.search(params)
+        try:
+            if q and float(q.group(1)) == 0:
+                continue
+        except ValueError:
+            continue
+        if nombre:
+            aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+def elegir_codificacion(accept_encoding, con_brotli=True):
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    if con_brotli and brotli is not None and "br" in aceptadas:
+        return "br"
+    if "gzip" in aceptadas or "*" in aceptadas:
+        return "gzip"
+    return None
+
+
+def comprimir(contenido, codificacion, nivel):
+    if codificacion == "br":
+        return brotli.compress(contenido, quality=nivel, mode=brotli.MODE_TEXT)
+    return gzip.compress(contenido, compresslevel=nivel, mtime=0)
+
+
+class CompresionAPIMiddleware:
+    """
+    Comprime las respuestas JSON de /api/: brotli si el cliente lo acepta
+    (y el paquete está instalado), si no gzip. Deja pasar tal cual:
+    - respuestas chicas (COMPRESION_API_MINIMO bytes),
+    - streaming (la exportación ya comprime por su cuenta),
+    - las que ya traen Content-Encoding o Cache-Control: no-transform,
+    - las rutas de COMPRESION_API_EXCLUIR (tokens: BREACH).
+
+    El ETag fuerte pasa a débil (W/"..."): los bytes cambian, el recurso
+    no. Los 304 de CatalogoCondicionalMixin siguen funcionando porque
+    If-None-Match se compara en forma débil.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefijo = getattr(settings, "COMPRESION_API_PREFIJO", "/api/")
+        self.excluir = tuple(getattr(settings, "COMPRESION_API_EXCLUIR", ()))
+        self.minimo = getattr(settings, "COMPRESION_API_MINIMO", 1024)
+        self.niveles = {
+            "gzip": getattr(settings, "COMPRESION_API_NIVEL_GZIP", 6),
+            "br": getattr(settings, "COMPRESION_API_NIVEL_BROTLI", 4),
+        }
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        ruta = request.path_info
+        if not ruta.startswith(self.prefijo) or ruta.startswith(self.excluir):
+            return response
+        return self.comprimir_respuesta(request, response)
+
+    def comprimible(self, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return False
+        if not TIPOS_COMPRIMIBLES.match(response.get("Content-Type", "")):
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        return len(response.content) >= self.minimo
+
+    def comprimir_respuesta(self, request, response):
+        if not self.comprimible(response):
+            return response
+
+        # Misma URL, distinto cuerpo según el cliente
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        codificacion = elegir_codificacion(request.META.get("HTTP_ACCEPT_ENCODING"))
+        if codificacion is None:
+            return response
+
+        comprimido = comprimir(response.content, codificacion, self.niveles[codificacion])
+        if len(comprimido) >= len(response.content):
+            return response
+
+        response.content = comprimido
+        response["Content-Length"] = str(len(comprimido))
+        response["Content-Encoding"] = codificacion
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
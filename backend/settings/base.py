@@ -54,8 +54,11 @@ INSTALLED_APPS = [
 # =========================================
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    # Arriba de todo lo que toca el cuerpo: comprime lo último
+    "backend.middleware.CompresionAPIMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # WhiteNoise + snapshots del catálogo publicados en caliente
+    "backend.middleware.CatalogoWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -164,8 +167,11 @@ CORS_ALLOW_HEADERS = [
     "accept",
     "origin",
     "user-agent",
+    "if-none-match",
+    "if-modified-since",
+    "idempotency-key",
 ]
-CORS_EXPOSE_HEADERS = ["Authorization"]
+CORS_EXPOSE_HEADERS = ["Authorization", "ETag", "Last-Modified"]
 
 
 # =========================================
@@ -187,12 +193,68 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 30,
 }
 
+# =========================================
+# 🗃️ CACHE
+# =========================================
+# "catalogo" guarda las respuestas públicas de productos. LocMemCache
+# desaloja por LRU al llegar a MAX_ENTRIES; se puede cambiar a
+# FileBasedCache o RedisCache por variables de entorno.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalogo": {
+        "BACKEND": config(
+            "CATALOGO_CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("CATALOGO_CACHE_LOCATION", default="catalogo"),
+        "TIMEOUT": config("CATALOGO_CACHE_TIMEOUT", cast=int, default=60 * 60),
+        "OPTIONS": {
+            "MAX_ENTRIES": config("CATALOGO_CACHE_MAX_ENTRIES", cast=int, default=500),
+            "CULL_FREQUENCY": 4,
+        },
+    },
+}
+CATALOGO_CACHE_ALIAS = "catalogo"
+
+# Snapshot estático del catálogo (manifiesto en /api/catalogo/snapshot/).
+# Cada cambio del catálogo encola un trabajo "publicar_snapshot" (uno
+# pendiente como máximo); el worker lo guarda en la base y el proceso web
+# lo baja a STATIC_ROOT/catalogo/ la primera vez que se pide.
+CATALOGO_SNAPSHOT_AUTOMATICO = config("CATALOGO_SNAPSHOT_AUTOMATICO", cast=bool, default=True)
+
+# =========================================
+# 🗜️ COMPRESIÓN DE LA API
+# =========================================
+# backend.middleware.CompresionAPIMiddleware: brotli (si está instalado)
+# o gzip para /api/. Medir niveles con manage.py benchmark_compresion.
+COMPRESION_API_PREFIJO = "/api/"
+# Login/refresh devuelven tokens: sin comprimir (BREACH)
+COMPRESION_API_EXCLUIR = ("/api/auth/",)
+COMPRESION_API_MINIMO = config("COMPRESION_API_MINIMO", cast=int, default=1024)
+COMPRESION_API_NIVEL_GZIP = config("COMPRESION_API_NIVEL_GZIP", cast=int, default=6)
+COMPRESION_API_NIVEL_BROTLI = config("COMPRESION_API_NIVEL_BROTLI", cast=int, default=4)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=7),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# =========================================
+# 🛒 PEDIDOS
+# =========================================
+# Descuenta Producto.stock al confirmar un pedido y rechaza con 409
+# si no alcanza. Apagado por defecto: los fixtures y los importadores
+# cargan stock=0, así que activarlo antes de cargar stock real
+# rechazaría todas las compras.
+PEDIDOS_CONTROLAR_STOCK = config("PEDIDOS_CONTROLAR_STOCK", cast=bool, default=False)
+
+# Vigencia de las respuestas guardadas por Idempotency-Key
+# (limpieza: manage.py limpiar_idempotencia)
+PEDIDOS_IDEMPOTENCIA_TTL_HORAS = config("PEDIDOS_IDEMPOTENCIA_TTL_HORAS", cast=int, default=24)
+
 # =========================================
 # ☁️ CLOUDINARY — ARCHIVOS MEDIA
 # =========================================
@@ -222,6 +284,12 @@ EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD")
 EMAIL_USE_TLS = config("EMAIL_USE_TLS", cast=bool, default=True)
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
 
+# Los emails se guardan en users.CorreoPendiente y los manda el worker
+# `manage.py enviar_correos --loop` (ver render.yaml). Activar solo donde
+# no corre ese worker: un hilo del proceso web los manda al confirmar la
+# transacción, y se pierde si gunicorn recicla el worker a mitad.
+CORREO_ENVIO_EN_PROCESO = config("CORREO_ENVIO_EN_PROCESO", cast=bool, default=False)
+
 
 import mimetypes
 mimetypes.init()
@@ -1,3 +1,22 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ArchivoTrabajo, Trabajo
+
+
+class ArchivoTrabajoInline(admin.TabularInline):
+    model = ArchivoTrabajo
+    fields = ("rol", "nombre", "tamano", "creado")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("contenido")
+
+
+@admin.register(Trabajo)
+class TrabajoAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "estado", "intentos", "usuario", "creado", "terminado")
+    list_filter = ("estado", "tipo")
+    readonly_fields = ("progreso", "resultado", "error", "iniciado", "latido", "terminado")
+    inlines = [ArchivoTrabajoInline]
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from gestion.utils.generator import FakeUploader, ProductGenerator
+from gestion.utils.scanner import ImageScanner
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark offline de ProductGenerator: imágenes sintéticas en una "
+        "carpeta temporal y FakeUploader en vez de Cloudinary. Todo corre "
+        "dentro de una transacción que se deshace al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--imagenes", type=int, default=1000)
+        parser.add_argument("--categorias", type=int, default=10)
+        parser.add_argument("--hilos", type=int, nargs="+", default=[1, 8, 16])
+        parser.add_argument("--latencia", type=float, default=0.05, help="Segundos por subida simulada")
+        parser.add_argument("--tasa-fallos", type=float, default=0.02)
+        parser.add_argument("--por-segundo", type=float, default=None, help="Límite de subidas/s")
+        parser.add_argument("--lote", type=int, default=100)
+
+    def _carpeta_sintetica(self, imagenes, categorias):
+        base = tempfile.mkdtemp(prefix="bench_generador_")
+        for i in range(imagenes):
+            carpeta = os.path.join(base, "productos", f"bench-{i % categorias}")
+            os.makedirs(carpeta, exist_ok=True)
+            with open(os.path.join(carpeta, f"imagen-{i:05d}.jpg"), "wb") as f:
+                f.write(os.urandom(2048))
+        return base
+
+    def _medir(self, base, hilos, opts):
+        scanner = ImageScanner(
+            base=os.path.join(base, "productos"),
+            manifiesto=os.path.join(base, "manifiesto.json"),
+        )
+        uploader = FakeUploader(latencia=opts["latencia"], tasa_fallos=opts["tasa_fallos"], semilla=hilos)
+        generator = ProductGenerator(
+            uploader=uploader,
+            hilos=hilos,
+            por_segundo=opts["por_segundo"],
+            espera_base=0.01,
+            lote=opts["lote"],
+        )
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                inicio = time.perf_counter()
+                creados = generator.generar_desde_media(scanner.escanear(solo_cambios=False))
+                duracion = time.perf_counter() - inicio
+            transaction.set_rollback(True)
+
+        return {
+            "creados": len(creados),
+            "fallidos": len(generator.fallidos),
+            "subidas": uploader.llamadas,
+            "segundos": duracion,
+            "consultas": len(ctx.captured_queries),
+        }
+
+    def handle(self, *args, **opts):
+        base = self._carpeta_sintetica(opts["imagenes"], opts["categorias"])
+        self.stdout.write(
+            f"Imágenes: {opts['imagenes']} en {opts['categorias']} categorías — "
+            f"latencia simulada {opts['latencia'] * 1000:.0f} ms"
+        )
+
+        try:
+            for hilos in opts["hilos"]:
+                r = self._medir(base, hilos, opts)
+                self.stdout.write(
+                    f"hilos={hilos:>3}: {r['segundos']:.2f}s — "
+                    f"{opts['imagenes'] / r['segundos']:.0f} img/s — creados {r['creados']} — "
+                    f"fallidos {r['fallidos']} — subidas {r['subidas']} — consultas {r['consultas']}"
+                )
+        finally:
+            shutil.rmtree(base, ignore_errors=True)
+
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado"))
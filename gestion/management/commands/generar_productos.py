@@ -4,13 +4,42 @@ from gestion.utils.generator import ProductGenerator
 
 
 class Command(BaseCommand):
-    help = "Genera productos automáticos desde imágenes en media/"
+    help = "Genera productos automáticos desde imágenes en media/ (solo nuevas o modificadas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--completo", action="store_true",
+            help="Ignora el manifiesto y procesa todas las imágenes",
+        )
+        parser.add_argument("--hilos", type=int, default=4, help="Carpetas escaneadas en paralelo")
+        parser.add_argument("--subidas", type=int, default=8, help="Subidas simultáneas a Cloudinary")
+        parser.add_argument("--por-segundo", type=float, default=None, help="Límite de subidas por segundo")
+        parser.add_argument("--lote", type=int, default=100, help="Productos por INSERT")
+
+    def _progreso(self, stats):
+        self.stdout.write(
+            f"\r{stats['procesados']} procesadas — {stats['subidos']} subidas — "
+            f"{stats['duplicados']} duplicadas — {stats['fallidos']} fallidas "
+            f"({stats['por_segundo'] or 0} img/s)",
+            ending="",
+        )
 
     def handle(self, *args, **opts):
-        scanner = ImageScanner()
-        archivos = scanner.scan_media()
+        scanner = ImageScanner(hilos=opts["hilos"])
+        archivos = scanner.escanear(solo_cambios=not opts["completo"])
 
-        generator = ProductGenerator()
+        generator = ProductGenerator(
+            hilos=opts["subidas"],
+            por_segundo=opts["por_segundo"],
+            lote=opts["lote"],
+            progreso=self._progreso,
+        )
         creados = generator.generar_desde_media(archivos)
+        scanner.confirmar(excluir=generator.fallidos)
 
+        self.stdout.write("")
         self.stdout.write(self.style.SUCCESS(f"Productos creados: {len(creados)}"))
+        if generator.fallidos:
+            self.stdout.write(self.style.WARNING(
+                f"Subidas fallidas (se reintentan en el próximo escaneo): {len(generator.fallidos)}"
+            ))
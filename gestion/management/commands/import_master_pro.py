@@ -1,7 +1,8 @@
 import os
 from django.core.management.base import BaseCommand
 from django.db import transaction
-from productos.models import Categoria, Producto
+from productos.huellas import IndiceHuellas, hash_archivo
+from productos.models import Categoria, HuellaImagen, Producto
 from cloudinary.uploader import upload as cloudinary_upload
 from django.conf import settings
 import mimetypes
@@ -35,16 +36,26 @@ class Command(BaseCommand):
         total_prod_new = 0
         total_prod_exist = 0
 
+        # Todo lo que hace falta para decidir, en tres consultas por corrida
+        indice = IndiceHuellas.cargar()
+        categorias = {c.nombre: c for c in Categoria.objects.all()}
+        existentes = {
+            (cat_id, nombre): pk
+            for pk, cat_id, nombre in Producto.objects.values_list("id", "categoria_id", "nombre")
+        }
+        huellas_nuevas = []
+
         for folder in os.listdir(base_folder):
             category_path = os.path.join(base_folder, folder)
 
             if not os.path.isdir(category_path):
                 continue
 
-            categoria, created = Categoria.objects.get_or_create(
-                nombre=folder.capitalize()
-            )
+            categoria = categorias.get(folder.capitalize())
+            created = categoria is None
             if created:
+                categoria = Categoria.objects.create(nombre=folder.capitalize())
+                categorias[categoria.nombre] = categoria
                 total_cat += 1
                 self.stdout.write(self.style.SUCCESS(f"🆕 Categoría creada: {categoria.nombre}"))
             else:
@@ -58,9 +69,21 @@ class Command(BaseCommand):
                 nombre_base = os.path.splitext(filename)[0]
                 nombre_limpio = nombre_base.replace("-", " ").replace("_", " ").capitalize()
 
-                if Producto.objects.filter(nombre=nombre_limpio, categoria=categoria).exists():
+                hash_local = hash_archivo(file_path)
+                if hash_local in indice:
+                    self.stdout.write(f"↪ Ya ingresada: {filename}")
+                    total_prod_exist += 1
+                    continue
+
+                existente = existentes.get((categoria.id, nombre_limpio))
+                if existente:
+                    # Producto anterior a la tabla de huellas: se registra la huella
                     self.stdout.write(f"↪ Ya existe: {nombre_limpio}")
                     total_prod_exist += 1
+                    indice.reservar(hash_local)
+                    huellas_nuevas.append(HuellaImagen(
+                        hash=hash_local, producto_id=existente, origen=file_path[:500],
+                    ))
                     continue
 
                 self.stdout.write(f"⬆ Subiendo imagen: {filename}")
@@ -70,7 +93,7 @@ class Command(BaseCommand):
                     resource_type="image"
                 )
 
-                Producto.objects.create(
+                producto = Producto.objects.create(
                     categoria=categoria,
                     nombre=nombre_limpio,
                     descripcion="",
@@ -79,10 +102,17 @@ class Command(BaseCommand):
                     destacado=False,
                     imagen=cloud_res["secure_url"],
                 )
+                existentes[(categoria.id, nombre_limpio)] = producto.id
+                indice.reservar(hash_local)
+                huellas_nuevas.append(HuellaImagen(
+                    hash=hash_local, producto=producto, origen=file_path[:500],
+                ))
 
                 self.stdout.write(self.style.SUCCESS(f"🆕 Producto creado: {nombre_limpio}"))
                 total_prod_new += 1
 
+        HuellaImagen.objects.bulk_create(huellas_nuevas, batch_size=500, ignore_conflicts=True)
+
         self.stdout.write(self.style.SUCCESS("===================================="))
         self.stdout.write(self.style.SUCCESS(f"📁 Categorías nuevas: {total_cat}"))
         self.stdout.write(self.style.SUCCESS(f"📦 Productos creados: {total_prod_new}"))
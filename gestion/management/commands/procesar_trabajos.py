@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gestion.trabajos import ejecutar, reencolar_colgados, tomar_trabajo
+
+
+class Command(BaseCommand):
+    help = "Worker de la cola de trabajos de gestión (escaneo, importación, exportación...)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Queda corriendo y revisa la cola cada --intervalo segundos",
+        )
+        parser.add_argument("--intervalo", type=float, default=5)
+        parser.add_argument(
+            "--colgado-minutos", type=int, default=10,
+            help="Minutos sin latido para considerar muerto a un trabajo en curso",
+        )
+        parser.add_argument("--max-intentos", type=int, default=3)
+
+    def handle(self, *args, **opts):
+        while True:
+            res = reencolar_colgados(opts["colgado_minutos"], opts["max_intentos"])
+            if any(res.values()):
+                self.stdout.write(self.style.WARNING(f"Trabajos colgados: {res}"))
+
+            # Vaciar la cola antes de dormir
+            while True:
+                trabajo = tomar_trabajo()
+                if trabajo is None:
+                    break
+                self.stdout.write(f"▶ {trabajo}")
+                trabajo = ejecutar(trabajo)
+                estilo = self.style.SUCCESS if trabajo.estado == trabajo.TERMINADO else self.style.ERROR
+                self.stdout.write(estilo(f"■ {trabajo}"))
+
+            if not opts["loop"]:
+                break
+            time.sleep(opts["intervalo"])
+
+        self.stdout.write(self.style.SUCCESS("Cola procesada"))
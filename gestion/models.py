@@ -1,3 +1,75 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class Trabajo(models.Model):
+    """
+    Cola de trabajos largos (escaneo, importación, exportación...).
+    Las vistas solo encolan; el comando procesar_trabajos los ejecuta
+    fuera de los workers web.
+    """
+    PENDIENTE = "pendiente"
+    EN_CURSO = "en_curso"
+    TERMINADO = "terminado"
+    FALLIDO = "fallido"
+
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (EN_CURSO, "En curso"),
+        (TERMINADO, "Terminado"),
+        (FALLIDO, "Fallido"),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+
+    progreso = models.JSONField(default=dict, blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name="trabajos",
+    )
+
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    # Lo actualiza el worker mientras corre; si se queda quieto, el trabajo se reencola
+    latido = models.DateTimeField(null=True, blank=True)
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-creado"]
+        indexes = [
+            models.Index(fields=["estado", "creado"], name="trabajo_estado_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.tipo} ({self.estado})"
+
+
+class ArchivoTrabajo(models.Model):
+    """
+    Archivo de entrada o salida de un trabajo, guardado en la base: el
+    proceso web y el worker corren en servicios distintos y no comparten
+    disco. Pensado para catálogos (pocos MB), no para imágenes.
+    """
+    ENTRADA = "entrada"
+    SALIDA = "salida"
+
+    ROLES = [
+        (ENTRADA, "Entrada"),
+        (SALIDA, "Salida"),
+    ]
+
+    trabajo = models.ForeignKey(Trabajo, on_delete=models.CASCADE, related_name="archivos")
+    rol = models.CharField(max_length=10, choices=ROLES)
+    nombre = models.CharField(max_length=255)
+    contenido = models.BinaryField()
+    tamano = models.PositiveIntegerField(default=0)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.nombre} ({self.rol}, {self.tamano} bytes)"
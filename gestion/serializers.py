@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from productos.models import Producto, Categoria
+from .models import ArchivoTrabajo, Trabajo
 
 class ProductoEdicionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,3 +15,40 @@ class ProductoEdicionSerializer(serializers.ModelSerializer):
             "stock",
             "destacado",
         ]
+
+
+class ArchivoTrabajoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivoTrabajo
+        fields = ["id", "rol", "nombre", "tamano", "creado"]
+
+
+class TrabajoSerializer(serializers.ModelSerializer):
+    archivos = ArchivoTrabajoSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Trabajo
+        fields = [
+            "id",
+            "tipo",
+            "parametros",
+            "estado",
+            "progreso",
+            "resultado",
+            "error",
+            "intentos",
+            "archivos",
+            "creado",
+            "iniciado",
+            "terminado",
+        ]
+        read_only_fields = [
+            "estado",
+            "progreso",
+            "resultado",
+            "error",
+            "intentos",
+            "creado",
+            "iniciado",
+            "terminado",
+        ]
@@ -1,3 +1,435 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from productos.huellas import dhash, distancia
+from productos.models import Categoria, HuellaImagen, Producto
+
+from .models import ArchivoTrabajo, Trabajo
+from .trabajos import REGISTRO, ejecutar, reencolar_colgados, tomar_trabajo
+from .utils.generator import FakeUploader, ProductGenerator
+from .utils.scanner import ImageScanner
+
+
+class CarpetaMediaMixin:
+    """media/productos/ temporal con imágenes de mentira (solo importan los bytes)."""
+
+    def setUp(self):
+        super().setUp()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.base = os.path.join(self.dir, "productos")
+        self.manifiesto = os.path.join(self.dir, "manifiesto.json")
+
+    def imagen(self, relativa, contenido=None, mtime=None):
+        ruta = os.path.join(self.base, *relativa.split("/"))
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, "wb") as f:
+            f.write(contenido if contenido is not None else relativa.encode())
+        if mtime is not None:
+            os.utime(ruta, (mtime, mtime))
+        return ruta
+
+    def scanner(self):
+        return ImageScanner(base=self.base, manifiesto=self.manifiesto, hilos=2)
+
+
+class ImageScannerTests(CarpetaMediaMixin, SimpleTestCase):
+
+    def relativas(self, items):
+        return sorted(item["relativa"] for item in items)
+
+    def test_primer_escaneo_recorre_subcarpetas(self):
+        self.imagen("aros/aro-dorado.jpg")
+        self.imagen("aros/argollas/argolla.PNG")
+        self.imagen("collares/collar.webp")
+        self.imagen("collares/notas.txt")
+
+        items = list(self.scanner().escanear())
+
+        self.assertEqual(self.relativas(items), [
+            "aros/argollas/argolla.PNG", "aros/aro-dorado.jpg", "collares/collar.webp",
+        ])
+        categorias = {item["relativa"]: item["categoria"] for item in items}
+        self.assertEqual(categorias["aros/argollas/argolla.PNG"], "aros")
+
+    def test_reescaneo_devuelve_solo_lo_nuevo_o_modificado(self):
+        self.imagen("aros/igual.jpg", mtime=1_000_000)
+        self.imagen("aros/cambia.jpg", b"antes", mtime=1_000_000)
+        scanner = self.scanner()
+        list(scanner.escanear())
+        scanner.confirmar()
+
+        self.imagen("aros/cambia.jpg", b"despues", mtime=2_000_000)
+        self.imagen("aros/nueva.jpg")
+        scanner = self.scanner()
+
+        self.assertEqual(
+            self.relativas(scanner.escanear()), ["aros/cambia.jpg", "aros/nueva.jpg"]
+        )
+
+    def test_tocado_con_el_mismo_contenido_no_vuelve(self):
+        self.imagen("aros/aro.jpg", b"mismo", mtime=1_000_000)
+        scanner = self.scanner()
+        list(scanner.escanear())
+        scanner.confirmar()
+
+        self.imagen("aros/aro.jpg", b"mismo", mtime=2_000_000)
+        scanner = self.scanner()
+        self.assertEqual(list(scanner.escanear()), [])
+        scanner.confirmar()
+
+        # El manifiesto guardó el mtime nuevo: la próxima no se vuelve a hashear
+        self.assertEqual(
+            self.scanner()._cargar_manifiesto()["aros/aro.jpg"]["mtime"], 2_000_000
+        )
+
+    def test_excluidos_vuelven_en_el_proximo_escaneo(self):
+        ruta = self.imagen("aros/fallida.jpg")
+        self.imagen("aros/subida.jpg")
+        scanner = self.scanner()
+        list(scanner.escanear())
+        scanner.confirmar(excluir=[ruta])
+
+        self.assertEqual(self.relativas(self.scanner().escanear()), ["aros/fallida.jpg"])
+
+    def test_borrados_salen_del_manifiesto(self):
+        self.imagen("aros/queda.jpg")
+        ruta = self.imagen("aros/se-borra.jpg")
+        scanner = self.scanner()
+        list(scanner.escanear())
+        scanner.confirmar()
+
+        os.remove(ruta)
+        scanner = self.scanner()
+        list(scanner.escanear())
+        scanner.confirmar()
+
+        self.assertEqual(list(self.scanner()._cargar_manifiesto()), ["aros/queda.jpg"])
+
+
+class GeneradorMixin(CarpetaMediaMixin):
+
+    def setUp(self):
+        super().setUp()
+        # logs/generador.log dentro de la carpeta temporal
+        ajustes = override_settings(BASE_DIR=self.dir)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.uploader = FakeUploader(latencia=0)
+
+    def generar(self, items, **opciones):
+        opciones.setdefault("hilos", 2)
+        generator = ProductGenerator(uploader=self.uploader, espera_base=0, **opciones)
+        return generator, generator.generar_desde_media(items)
+
+
+class ProductGeneratorTests(GeneradorMixin, TestCase):
+
+    def test_sube_y_crea_en_lotes(self):
+        for i in range(5):
+            self.imagen(f"aros/aro-{i}.jpg")
+        self.imagen("collares/collar_largo.jpg")
+        progreso = []
+
+        _, creados = self.generar(
+            self.scanner().escanear(), lote=2, progreso=progreso.append
+        )
+
+        self.assertEqual(len(creados), 6)
+        self.assertEqual(self.uploader.llamadas, 6)
+        self.assertEqual(HuellaImagen.objects.count(), 6)
+        self.assertEqual(
+            Producto.objects.get(imagen="yoquet/productos/collares/collar_largo").nombre,
+            "Collares — Collar Largo",
+        )
+        self.assertEqual(progreso[-1]["creados"], 6)
+        self.assertEqual(progreso[-1]["subidos"], 6)
+
+    def test_copias_del_mismo_archivo_se_suben_una_vez(self):
+        self.imagen("aros/original.jpg", b"misma imagen")
+        self.imagen("aros/copias/copia.jpg", b"misma imagen")
+
+        _, creados = self.generar(self.scanner().escanear())
+
+        self.assertEqual(len(creados), 1)
+        self.assertEqual(self.uploader.llamadas, 1)
+
+    def test_fallos_de_subida_y_de_lectura_no_cortan_la_corrida(self):
+        self.uploader = FakeUploader(latencia=0, tasa_fallos=1.0)
+        ruta = self.imagen("aros/aro.jpg")
+        perdida = {
+            "ruta": os.path.join(self.base, "aros", "borrada.jpg"),
+            "archivo": "borrada.jpg",
+            "categoria": "aros",
+        }
+        items = [{"ruta": ruta, "archivo": "aro.jpg", "categoria": "aros"}, perdida]
+
+        generator, creados = self.generar(items, reintentos=1)
+
+        self.assertEqual(creados, [])
+        self.assertEqual(sorted(generator.fallidos), sorted([ruta, perdida["ruta"]]))
+        self.assertEqual(self.uploader.llamadas, 2)  # 1 intento + 1 reintento
+        # El hash se liberó: la próxima corrida lo vuelve a intentar
+        self.assertEqual(len(generator.indice), 0)
+        self.assertFalse(Producto.objects.exists())
+
+    def test_consultas_no_dependen_de_la_cantidad_de_archivos(self):
+        uno = self.imagen("uno/uno.jpg")
+        with CaptureQueriesContext(connection) as consultas:
+            self.generar([{"ruta": uno, "archivo": "uno.jpg", "categoria": "uno"}])
+
+        for i in range(20):
+            self.imagen(f"muchos/muchos-{i}.jpg")
+        with self.assertNumQueries(len(consultas)):
+            _, creados = self.generar(self.scanner().escanear())
+        self.assertEqual(len(creados), 20)
+
+
+
+class HuellasImagenTests(GeneradorMixin, TestCase):
+
+    def corrida(self, completo=False, **opciones):
+        """Lo mismo que el trabajo escanear_imagenes."""
+        scanner = self.scanner()
+        generator, creados = self.generar(
+            scanner.escanear(solo_cambios=not completo), **opciones
+        )
+        scanner.confirmar(excluir=generator.fallidos)
+        return creados
+
+    def test_reejecutar_sobre_carpeta_sin_cambios_no_sube_ni_consulta_por_archivo(self):
+        for i in range(10):
+            self.imagen(f"aros/aro-{i}.jpg")
+        self.assertEqual(len(self.corrida()), 10)
+        self.uploader.llamadas = 0
+
+        for completo in (False, True):
+            with self.subTest(completo=completo):
+                # Una sola consulta: la carga de IndiceHuellas
+                with self.assertNumQueries(1):
+                    creados = self.corrida(completo=completo)
+
+                self.assertEqual(creados, [])
+                self.assertEqual(self.uploader.llamadas, 0)
+        self.assertEqual(Producto.objects.count(), 10)
+
+    def test_archivo_renombrado_no_se_vuelve_a_subir(self):
+        ruta = self.imagen("aros/original.jpg", b"bytes de la imagen")
+        self.corrida()
+        self.uploader.llamadas = 0
+
+        os.rename(ruta, os.path.join(self.base, "aros", "renombrada.jpg"))
+
+        self.assertEqual(self.corrida(), [])
+        self.assertEqual(self.uploader.llamadas, 0)
+        self.assertEqual(HuellaImagen.objects.count(), 1)
+
+    def test_casi_duplicado_perceptual(self):
+        from PIL import Image
+
+        degradado = Image.linear_gradient("L").rotate(90).resize((64, 64))
+        degradado.save(self.imagen("aros/original.png", b""))
+        degradado.resize((40, 40)).save(self.imagen("aros/chica.jpg", b""), quality=70)
+        degradado.transpose(Image.FLIP_LEFT_RIGHT).save(self.imagen("aros/otra.png", b""))
+
+        original = dhash(os.path.join(self.base, "aros", "original.png"))
+        chica = dhash(os.path.join(self.base, "aros", "chica.jpg"))
+        self.assertLessEqual(distancia(original, chica), 6)
+
+        # hilos=1: el primero de los dos parecidos se sube, el otro se omite
+        creados = self.corrida(perceptual=True, hilos=1)
+
+        self.assertEqual(self.uploader.llamadas, 2)
+        self.assertEqual(len(creados), 2)
+
+
+class ColaTrabajosTests(TestCase):
+
+    def trabajo(self, **campos):
+        return Trabajo.objects.create(tipo="exportar_catalogo", **campos)
+
+    def test_tomar_trabajo_toma_el_mas_antiguo(self):
+        primero = self.trabajo()
+        segundo = self.trabajo()
+        Trabajo.objects.filter(pk=segundo.pk).update(
+            creado=primero.creado + timedelta(seconds=1)
+        )
+
+        tomado = tomar_trabajo()
+
+        self.assertEqual(tomado.pk, primero.pk)
+        self.assertEqual(tomado.estado, Trabajo.EN_CURSO)
+        self.assertEqual(tomado.intentos, 1)
+        self.assertIsNotNone(tomado.latido)
+        self.assertEqual(tomar_trabajo().pk, segundo.pk)
+        self.assertIsNone(tomar_trabajo())
+
+    def test_reencolar_colgados(self):
+        viejo = timezone.now() - timedelta(minutes=30)
+        reintenta = self.trabajo(estado=Trabajo.EN_CURSO, latido=viejo, intentos=1)
+        agotado = self.trabajo(estado=Trabajo.EN_CURSO, latido=viejo, intentos=3)
+        vivo = self.trabajo(estado=Trabajo.EN_CURSO, latido=timezone.now(), intentos=1)
+
+        res = reencolar_colgados(minutos=10, max_intentos=3)
+
+        self.assertEqual(res, {"reencolados": 1, "fallidos": 1})
+        estados = dict(Trabajo.objects.values_list("pk", "estado"))
+        self.assertEqual(estados[reintenta.pk], Trabajo.PENDIENTE)
+        self.assertEqual(estados[agotado.pk], Trabajo.FALLIDO)
+        self.assertEqual(estados[vivo.pk], Trabajo.EN_CURSO)
+
+    def test_ejecutar_guarda_resultado_y_progreso(self):
+        def sumar(parametros, reportar, trabajo):
+            reportar({"hechos": 2})
+            return {"total": parametros["a"] + parametros["b"]}
+
+        trabajo = Trabajo.objects.create(tipo="sumar", parametros={"a": 1, "b": 2})
+        with mock.patch.dict(REGISTRO, {"sumar": sumar}):
+            ejecutar(trabajo)
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, Trabajo.TERMINADO)
+        self.assertEqual(trabajo.resultado, {"total": 3})
+        self.assertEqual(trabajo.progreso, {"hechos": 2})
+        self.assertIsNotNone(trabajo.terminado)
+
+    def test_ejecutar_registra_el_error(self):
+        def romper(parametros, reportar, trabajo):
+            raise RuntimeError("se rompió")
+
+        trabajo = Trabajo.objects.create(tipo="romper")
+        with mock.patch.dict(REGISTRO, {"romper": romper}):
+            ejecutar(trabajo)
+
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, Trabajo.FALLIDO)
+        self.assertIn("RuntimeError: se rompió", trabajo.error)
+        self.assertIsNone(trabajo.resultado)
+
+
+class TrabajosAPITests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.staff = User.objects.create_user(
+            username="admin", email="admin@example.com", password="x", is_staff=True
+        )
+        cls.cliente = User.objects.create_user(
+            username="cliente", email="cliente@example.com", password="x"
+        )
+        categoria = Categoria.objects.create(nombre="Aros")
+        Producto.objects.create(
+            categoria=categoria, codigo="1001", nombre="Aro dorado", precio=Decimal("100.00")
+        )
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # Logs de importador/exportador en la carpeta temporal
+        ajustes = override_settings(BASE_DIR=tmp.name, MEDIA_ROOT=tmp.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def procesar(self):
+        """Lo que hace un pasada de `procesar_trabajos`."""
+        trabajo = tomar_trabajo()
+        return ejecutar(trabajo)
+
+    def test_solo_staff(self):
+        self.client.force_authenticate(self.cliente)
+
+        self.assertEqual(self.client.get("/api/gestion/trabajos/").status_code, 403)
+        res = self.client.post("/api/gestion/trabajos/", {"tipo": "exportar_catalogo"}, format="json")
+        self.assertEqual(res.status_code, 403)
+        self.assertFalse(Trabajo.objects.exists())
+
+    def test_encolar_devuelve_202_y_url_de_estado(self):
+        res = self.client.post(
+            "/api/gestion/trabajos/", {"tipo": "exportar_catalogo"}, format="json"
+        )
+
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(res.data["estado"], Trabajo.PENDIENTE)
+        self.assertTrue(res.data["url"].endswith(f"/api/gestion/trabajos/{res.data['trabajo_id']}/"))
+
+        estado = self.client.get(res.data["url"])
+        self.assertEqual(estado.status_code, 200)
+        self.assertEqual(estado.data["estado"], Trabajo.PENDIENTE)
+
+    def test_tipo_desconocido_400(self):
+        res = self.client.post("/api/gestion/trabajos/", {"tipo": "otro"}, format="json")
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("exportar_catalogo", res.data["tipos"])
+
+    def test_escanear_encola(self):
+        res = self.client.post("/api/gestion/escanear/?completo=1")
+
+        self.assertEqual(res.status_code, 202)
+        trabajo = Trabajo.objects.get(pk=res.data["trabajo_id"])
+        self.assertEqual((trabajo.tipo, trabajo.parametros), ("escanear_imagenes", {"completo": True}))
+
+    def test_exportacion_se_descarga_desde_la_base(self):
+        res = self.client.post(
+            "/api/gestion/trabajos/",
+            {"tipo": "exportar_catalogo", "parametros": {"formato": "csv"}},
+            format="json",
+        )
+        self.assertEqual(
+            self.client.get(f"/api/gestion/trabajos/{res.data['trabajo_id']}/archivo/").status_code,
+            404,
+        )
+
+        trabajo = self.procesar()
+
+        self.assertEqual(trabajo.estado, Trabajo.TERMINADO, trabajo.error)
+        self.assertEqual(trabajo.resultado["filas"], 1)
+        descarga = self.client.get(trabajo.resultado["url"])
+        self.assertEqual(descarga.status_code, 200)
+        self.assertIn("attachment", descarga["Content-Disposition"])
+        self.assertIn("Aro dorado", descarga.content.decode("utf-8"))
+
+    def test_importacion_sube_el_archivo_y_la_corre_el_worker(self):
+        csv = SimpleUploadedFile(
+            "catalogo.csv",
+            b"codigo,nombre,precio,categoria\n1001,Aro dorado,150,Aros\n2002,Collar,90,Collares\n",
+            content_type="text/csv",
+        )
+        res = self.client.post("/api/gestion/trabajos/importar/", {"archivo": csv})
+        self.assertEqual(res.status_code, 202)
+
+        estado = self.client.get(res.data["url"]).data
+        self.assertEqual([a["rol"] for a in estado["archivos"]], [ArchivoTrabajo.ENTRADA])
+
+        trabajo = self.procesar()
+
+        self.assertEqual(trabajo.estado, Trabajo.TERMINADO, trabajo.error)
+        self.assertEqual(trabajo.resultado["creados"], 1)
+        self.assertEqual(trabajo.resultado["actualizados"], 1)
+        self.assertEqual(Producto.objects.get(codigo="1001").precio, Decimal("150.00"))
+
+    def test_importacion_sin_archivo_400(self):
+        res = self.client.post("/api/gestion/trabajos/importar/", {})
+        self.assertEqual(res.status_code, 400)
+
+        res = self.client.post(
+            "/api/gestion/trabajos/", {"tipo": "importar_catalogo"}, format="json"
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(Trabajo.objects.exists())
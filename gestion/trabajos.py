@@ -0,0 +1,251 @@
+import os
+import tempfile
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ArchivoTrabajo, Trabajo
+
+
+# Cada cuántos segundos el worker guarda latido + progreso
+INTERVALO_LATIDO = 5
+
+# tipo → función(parametros, reportar, trabajo) que devuelve un dict JSON-serializable
+REGISTRO = {}
+
+
+def registrar(tipo):
+    def decorador(funcion):
+        REGISTRO[tipo] = funcion
+        return funcion
+    return decorador
+
+
+class TipoDesconocido(ValueError):
+    pass
+
+
+def encolar(tipo, parametros=None, usuario=None):
+    """Crea el trabajo en la base. No ejecuta nada."""
+    if tipo not in REGISTRO:
+        raise TipoDesconocido(f"Tipo de trabajo desconocido: {tipo}")
+    return Trabajo.objects.create(
+        tipo=tipo,
+        parametros=parametros or {},
+        usuario=usuario if usuario and usuario.is_authenticated else None,
+    )
+
+
+# =====================================================
+#   WORKER
+# =====================================================
+def tomar_trabajo():
+    """Marca como en curso el pendiente más antiguo y lo devuelve (o None)."""
+    with transaction.atomic():
+        qs = Trabajo.objects.filter(estado=Trabajo.PENDIENTE).order_by("creado")
+
+        # Varios workers en paralelo no se pisan (Postgres)
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+
+        trabajo = qs.first()
+        if trabajo is None:
+            return None
+
+        ahora = timezone.now()
+        trabajo.estado = Trabajo.EN_CURSO
+        trabajo.iniciado = ahora
+        trabajo.latido = ahora
+        trabajo.intentos += 1
+        trabajo.save(update_fields=["estado", "iniciado", "latido", "intentos"])
+        return trabajo
+
+
+def reencolar_colgados(minutos=10, max_intentos=3):
+    """
+    Trabajos en curso cuyo worker dejó de dar señales (reinicio, OOM, deploy):
+    vuelven a pendiente, o pasan a fallido si ya agotaron los intentos.
+    """
+    limite = timezone.now() - timedelta(minutes=minutos)
+    colgados = Trabajo.objects.filter(estado=Trabajo.EN_CURSO, latido__lt=limite)
+
+    fallidos = colgados.filter(intentos__gte=max_intentos).update(
+        estado=Trabajo.FALLIDO,
+        error="El worker dejó de responder y se agotaron los intentos.",
+        terminado=timezone.now(),
+    )
+    reencolados = colgados.filter(intentos__lt=max_intentos).update(
+        estado=Trabajo.PENDIENTE,
+    )
+    return {"reencolados": reencolados, "fallidos": fallidos}
+
+
+class _Latido(threading.Thread):
+    """Guarda latido y último progreso cada INTERVALO_LATIDO segundos."""
+
+    def __init__(self, trabajo_id):
+        super().__init__(daemon=True)
+        self.trabajo_id = trabajo_id
+        self.progreso = None
+        self._fin = threading.Event()
+
+    def run(self):
+        try:
+            while not self._fin.wait(INTERVALO_LATIDO):
+                self.guardar()
+        finally:
+            connection.close()
+
+    def guardar(self):
+        campos = {"latido": timezone.now()}
+        if self.progreso is not None:
+            campos["progreso"] = self.progreso
+        try:
+            Trabajo.objects.filter(pk=self.trabajo_id).update(**campos)
+        except Exception:
+            # Un latido perdido no debe tirar el trabajo
+            pass
+
+    def detener(self):
+        self._fin.set()
+        self.join()
+
+
+def ejecutar(trabajo):
+    latido = _Latido(trabajo.pk)
+
+    def reportar(progreso):
+        latido.progreso = progreso
+
+    latido.start()
+    try:
+        resultado = REGISTRO[trabajo.tipo](trabajo.parametros, reportar, trabajo)
+    except Exception:
+        latido.detener()
+        trabajo.estado = Trabajo.FALLIDO
+        trabajo.error = traceback.format_exc()[-4000:]
+        trabajo.resultado = None
+    else:
+        latido.detener()
+        trabajo.estado = Trabajo.TERMINADO
+        trabajo.error = ""
+        trabajo.resultado = resultado
+
+    if latido.progreso is not None:
+        trabajo.progreso = latido.progreso
+    trabajo.terminado = timezone.now()
+    trabajo.save(update_fields=["estado", "error", "resultado", "progreso", "terminado"])
+    return trabajo
+
+
+# =====================================================
+#   ARCHIVOS (web y worker no comparten disco)
+# =====================================================
+def url_archivo(trabajo):
+    return f"/api/gestion/trabajos/{trabajo.pk}/archivo/"
+
+
+def guardar_archivo(trabajo, rol, nombre, contenido):
+    return ArchivoTrabajo.objects.create(
+        trabajo=trabajo, rol=rol, nombre=nombre,
+        contenido=contenido, tamano=len(contenido),
+    )
+
+
+@contextmanager
+def archivo_local(archivo):
+    """
+    Vuelca el ArchivoTrabajo a un archivo temporal del worker. Ruta y mtime
+    fijos por archivo: si el trabajo se reencola, el importador encuentra
+    su checkpoint y sigue desde ahí.
+    """
+    extension = os.path.splitext(archivo.nombre)[1].lower()
+    ruta = os.path.join(tempfile.gettempdir(), f"trabajo-archivo-{archivo.pk}{extension}")
+    with open(ruta, "wb") as f:
+        f.write(archivo.contenido)
+    marca = archivo.creado.timestamp()
+    os.utime(ruta, (marca, marca))
+    try:
+        yield ruta
+    finally:
+        os.remove(ruta)
+
+
+# =====================================================
+#   TIPOS DE TRABAJO
+# =====================================================
+@registrar("escanear_imagenes")
+def escanear_imagenes(parametros, reportar, trabajo):
+    from .utils.generator import ProductGenerator
+    from .utils.scanner import ImageScanner
+
+    scanner = ImageScanner()
+    items = scanner.escanear(solo_cambios=not parametros.get("completo", False))
+
+    generator = ProductGenerator(progreso=reportar)
+    creados = generator.generar_desde_media(items)
+    scanner.confirmar(excluir=generator.fallidos)
+
+    return {
+        "creados": len(creados),
+        "ids": [p.pk for p in creados],
+        "fallidos": len(generator.fallidos),
+    }
+
+
+@registrar("importar_catalogo")
+def importar_catalogo(parametros, reportar, trabajo):
+    from productos.utils.importer_pro import ImportadorMasterPro
+
+    archivo = trabajo.archivos.filter(rol=ArchivoTrabajo.ENTRADA).first()
+    if archivo is None:
+        raise ValueError(
+            "El trabajo no tiene archivo: se encola con POST "
+            "/api/gestion/trabajos/importar/ subiendo el CSV o XLSX."
+        )
+
+    with archivo_local(archivo) as ruta:
+        importador = ImportadorMasterPro(ruta)
+        if parametros.get("dry_run"):
+            return importador.simular()
+        return importador.cargar_streaming(
+            filas_por_bloque=parametros.get("bloque", 5000),
+            todo_o_nada=parametros.get("todo_o_nada", False),
+        )
+
+
+@registrar("exportar_catalogo")
+def exportar_catalogo(parametros, reportar, trabajo):
+    from productos.utils.exporter_pro import EXTENSIONES, ExportadorMasterPro
+
+    formato = parametros.get("formato", "csv")
+    if formato not in EXTENSIONES:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    nombre = f"catalogo-{timezone.now():%Y%m%d-%H%M%S}.{EXTENSIONES[formato]}"
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, nombre)
+        stats = ExportadorMasterPro().exportar_formato(ruta, formato)
+        with open(ruta, "rb") as f:
+            archivo = guardar_archivo(trabajo, ArchivoTrabajo.SALIDA, nombre, f.read())
+
+    stats.pop("ruta")
+    return {**stats, "archivo": archivo.nombre, "bytes": archivo.tamano, "url": url_archivo(trabajo)}
+
+
+@registrar("sincronizar_imagenes")
+def sincronizar_imagenes(parametros, reportar, trabajo):
+    from productos.utils.syncer_pro import SyncerMasterPro
+
+    return SyncerMasterPro().sync()
+
+
+@registrar("publicar_snapshot")
+def publicar_snapshot(parametros, reportar, trabajo):
+    from productos.snapshot import publicar_snapshot as publicar
+
+    return publicar(forzar=parametros.get("forzar", False))
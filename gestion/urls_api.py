@@ -1,7 +1,11 @@
 from django.urls import path
 from .views import (
     EscanearImagenes,
+    ImportarCatalogoView,
     ProductosPendientes,
+    TrabajoArchivo,
+    TrabajoDetalle,
+    TrabajosView,
     UpdateLote,
 )
 
@@ -9,4 +13,8 @@ urlpatterns = [
     path("escanear/", EscanearImagenes.as_view()),
     path("pendientes/", ProductosPendientes.as_view()),
     path("update/", UpdateLote.as_view()),
+    path("trabajos/", TrabajosView.as_view()),
+    path("trabajos/importar/", ImportarCatalogoView.as_view()),
+    path("trabajos/<int:pk>/", TrabajoDetalle.as_view()),
+    path("trabajos/<int:pk>/archivo/", TrabajoArchivo.as_view()),
 ]
@@ -1,23 +1,130 @@
+import logging
 import os
-import hashlib
-from cloudinary.uploader import upload
-from productos.models import Producto, Categoria
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from logging.handlers import RotatingFileHandler
+from django.conf import settings
+from productos.cache import invalidar_catalogo
+from productos.huellas import IndiceHuellas, dhash, hash_archivo
+from productos.models import Producto, Categoria, HuellaImagen
 from django.db import transaction
 
 
+def subir_cloudinary(ruta, **opciones):
+    from cloudinary.uploader import upload
+
+    return upload(ruta, **opciones)
+
+
+class FakeUploader:
+    """
+    Reemplazo local de Cloudinary para pruebas y benchmarks: simula la
+    latencia de red y, opcionalmente, una tasa de fallos transitorios.
+    """
+
+    def __init__(self, latencia=0.05, tasa_fallos=0.0, semilla=None):
+        self.latencia = latencia
+        self.tasa_fallos = tasa_fallos
+        self._random = random.Random(semilla)
+        self._lock = threading.Lock()
+        self.llamadas = 0
+
+    def __call__(self, ruta, folder="", **opciones):
+        with self._lock:
+            self.llamadas += 1
+            falla = self._random.random() < self.tasa_fallos
+        time.sleep(self.latencia)
+        if falla:
+            raise ConnectionError(f"Fallo simulado subiendo {ruta}")
+        base = os.path.splitext(os.path.basename(ruta))[0]
+        public_id = f"{folder}/{base}" if folder else base
+        return {
+            "public_id": public_id,
+            "secure_url": f"https://res.cloudinary.com/fake/image/upload/{public_id}",
+        }
+
+
+class LimitadorTasa:
+    """Token bucket compartido entre hilos: como mucho `por_segundo` llamadas/s."""
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo else 0
+        self._siguiente = time.monotonic()
+        self._lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(self._siguiente, ahora)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
 class ProductGenerator:
     """
     Genera productos completos leyendo carpetas:
     media/productos/<categoria>/
-    Evita duplicados locales y Cloudinary usando hash MD5.
+    Evita duplicados locales y Cloudinary con la tabla HuellaImagen
+    (blake2b del archivo; con perceptual=True también casi-duplicados).
+
+    Pipeline: el hash y la subida corren en un pool de hilos acotado
+    (con reintentos, backoff y límite de subidas por segundo); los
+    productos se insertan con bulk_create en lotes, cada lote en su
+    propia transacción corta.
     """
 
-    def _hash_file(self, ruta):
-        md5 = hashlib.md5()
-        with open(ruta, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                md5.update(chunk)
-        return md5.hexdigest()
+    def __init__(
+        self,
+        uploader=None,
+        hilos=8,
+        por_segundo=None,
+        reintentos=3,
+        espera_base=0.5,
+        lote=100,
+        progreso=None,
+        indice=None,
+        perceptual=False,
+    ):
+        self.uploader = uploader or subir_cloudinary
+        self.hilos = hilos
+        self.limitador = LimitadorTasa(por_segundo)
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.lote = lote
+        self.progreso = progreso
+        # IndiceHuellas ya cargado (p. ej. compartido con el syncer en la misma corrida)
+        self.indice = indice
+        self.perceptual = perceptual
+        self.fallidos = []
+        self._configurar_logs()
+
+    def _configurar_logs(self):
+        log_dir = os.path.join(settings.BASE_DIR, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+
+        log_path = os.path.join(log_dir, "generador.log")
+
+        self.logger = logging.getLogger("generador_productos")
+        self.logger.setLevel(logging.INFO)
+
+        if self.logger.handlers:
+            return
+
+        handler = RotatingFileHandler(
+            log_path,
+            maxBytes=1024 * 512,
+            backupCount=5
+        )
+        formatter = logging.Formatter(
+            "%(asctime)s — %(levelname)s — %(message)s"
+        )
+        handler.setFormatter(formatter)
+        self.logger.addHandler(handler)
 
     def _formatear_nombre(self, categoria, archivo):
         base = os.path.splitext(archivo)[0]
@@ -25,58 +132,161 @@ class ProductGenerator:
         base = base.title()
         return f"{categoria.title()} — {base}"
 
-    def generar_desde_media(self, items):
-        productos_creados = []
-
-        hashes_existentes = set(
-            Producto.objects.exclude(hash_imagen__isnull=True)
-            .values_list("hash_imagen", flat=True)
-        )
+    # =====================================================
+    #   ETAPA 1 (hilos): hash + subida
+    # =====================================================
+    def _subir(self, ruta, carpeta):
+        for intento in range(self.reintentos + 1):
+            self.limitador.esperar()
+            try:
+                return self.uploader(ruta, folder=carpeta, overwrite=False)
+            except Exception as e:
+                if intento == self.reintentos:
+                    raise
+                espera = self.espera_base * (2 ** intento)
+                espera += random.uniform(0, self.espera_base)
+                self.logger.warning(
+                    f"Reintento de {os.path.basename(ruta)} ({e}) en {espera:.1f}s"
+                )
+                time.sleep(espera)
 
-        with transaction.atomic():
-            for item in items:
+    def _procesar(self, item):
+        ruta = item["ruta"]
+        try:
+            # El escáner ya trae el blake2b calculado
+            hash_local = item.get("hash") or hash_archivo(ruta)
+            phash = dhash(ruta) if self.perceptual else None
+        except Exception as e:
+            # Archivo borrado/ilegible o error de Pillow: falla este, no la corrida
+            self.logger.error(f"No se pudo leer {item['archivo']}: {e}")
+            return "fallido", item, None
 
-                ruta = item["ruta"]
-                archivo = item["archivo"]
-                categoria_nom = item["categoria"]
+        if phash and self.indice.similar(phash) is not None:
+            return "duplicado", item, None
 
-                hash_local = self._hash_file(ruta)
+        # Reservar el hash antes de subir: dos copias del mismo archivo
+        # en carpetas distintas no se suben dos veces
+        if not self.indice.reservar(hash_local, phash):
+            return "duplicado", item, None
 
-                # Evitar duplicados reales
-                if hash_local in hashes_existentes:
-                    print(f"[SKIP] Duplicado: {archivo}")
-                    continue
+        try:
+            resultado = self._subir(ruta, f"yoquet/productos/{item['categoria']}")
+        except Exception as e:
+            self.indice.liberar(hash_local, phash)
+            self.logger.error(f"Falló subida de {item['archivo']}: {e}")
+            return "fallido", item, None
 
-                # Crear categoría si no existe
-                categoria, _ = Categoria.objects.get_or_create(
-                    nombre=categoria_nom.title()
-                )
+        return "subido", item, {
+            "hash": hash_local,
+            "phash": phash,
+            "public_id": resultado["public_id"],
+        }
 
-                # Subir a Cloudinary dentro de la carpeta por categoría
-                try:
-                    resultado = upload(
-                        ruta,
-                        folder=f"yoquet/productos/{categoria_nom}",
-                        overwrite=False,
-                    )
-                except Exception as e:
-                    print(f"[ERROR] Falló subida de {archivo}: {e}")
-                    continue
+    # =====================================================
+    #   ETAPA 2 (hilo principal): inserts por lote
+    # =====================================================
+    def _categoria(self, nombre):
+        nombre = nombre.title()
+        if nombre not in self._categorias:
+            self._categorias[nombre], _ = Categoria.objects.get_or_create(nombre=nombre)
+        return self._categorias[nombre]
 
-                # Crear nombre formato profesional
-                nombre = self._formatear_nombre(categoria_nom, archivo)
+    def _guardar_lote(self, pendientes):
+        if not pendientes:
+            return []
 
-                # Crear producto
-                p = Producto.objects.create(
-                    categoria=categoria,
-                    nombre=nombre,
+        with transaction.atomic():
+            nuevos = [
+                Producto(
+                    categoria=self._categoria(item["categoria"]),
+                    nombre=self._formatear_nombre(item["categoria"], item["archivo"]),
                     descripcion="",
                     precio=0,
-                    imagen=resultado["public_id"],
-                    hash_imagen=hash_local,
+                    imagen=subida["public_id"],
                 )
+                for item, subida in pendientes
+            ]
+            Producto.objects.bulk_create(nuevos, batch_size=self.lote)
+            HuellaImagen.objects.bulk_create(
+                [
+                    HuellaImagen(
+                        hash=subida["hash"],
+                        phash=subida["phash"],
+                        producto=p,
+                        origen=item.get("relativa", item["ruta"])[:500],
+                    )
+                    for p, (item, subida) in zip(nuevos, pendientes)
+                ],
+                batch_size=self.lote,
+                ignore_conflicts=True,
+            )
+            for p, (_, subida) in zip(nuevos, pendientes):
+                self.indice.asignar(subida["hash"], p.pk)
+            # bulk_create no dispara post_save
+            invalidar_catalogo()
+
+        return nuevos
+
+    def _reportar(self, stats, inicio):
+        if self.progreso is None:
+            return
+        segundos = time.perf_counter() - inicio
+        self.progreso({
+            **stats,
+            "segundos": round(segundos, 2),
+            "por_segundo": round(stats["procesados"] / segundos, 1) if segundos else None,
+        })
+
+    def generar_desde_media(self, items):
+        productos_creados = []
+        # Rutas que no se pudieron subir: el escáner no las confirma
+        self.fallidos = []
+        self._categorias = {}
+
+        # Una sola consulta por corrida; después todo es en memoria
+        if self.indice is None:
+            self.indice = IndiceHuellas.cargar()
+
+        stats = {"procesados": 0, "subidos": 0, "duplicados": 0, "fallidos": 0, "creados": 0}
+        inicio = time.perf_counter()
+        pendientes = []
+        en_curso = set()
+        # Ventana acotada: nunca más de 2×hilos archivos en vuelo
+        maximo = self.hilos * 2
+
+        def recoger(hechos):
+            for futuro in hechos:
+                estado, item, subida = futuro.result()
+                stats["procesados"] += 1
+                if estado == "subido":
+                    stats["subidos"] += 1
+                    pendientes.append((item, subida))
+                elif estado == "duplicado":
+                    stats["duplicados"] += 1
+                    self.logger.info(f"Duplicado, se omite: {item['archivo']}")
+                else:
+                    stats["fallidos"] += 1
+                    self.fallidos.append(item["ruta"])
+
+            if len(pendientes) >= self.lote:
+                productos_creados.extend(self._guardar_lote(pendientes))
+                stats["creados"] = len(productos_creados)
+                pendientes.clear()
+            self._reportar(stats, inicio)
+
+        with ThreadPoolExecutor(max_workers=self.hilos) as pool:
+            for item in items:
+                if len(en_curso) >= maximo:
+                    hechos, en_curso = wait(en_curso, return_when=FIRST_COMPLETED)
+                    recoger(hechos)
+                en_curso.add(pool.submit(self._procesar, item))
+
+            while en_curso:
+                hechos, en_curso = wait(en_curso, return_when=FIRST_COMPLETED)
+                recoger(hechos)
 
-                productos_creados.append(p)
-                hashes_existentes.add(hash_local)
+        productos_creados.extend(self._guardar_lote(pendientes))
+        stats["creados"] = len(productos_creados)
+        self._reportar(stats, inicio)
 
         return productos_creados
@@ -1,43 +1,200 @@
+import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from productos.huellas import hash_archivo
 
 
 class ImageScanner:
     """
-    Escanea media/productos/<categoria>/imagen.ext
+    Escanea media/productos/<categoria>/[subcarpetas/]imagen.ext
     y devuelve diccionarios con:
     - ruta absoluta
     - archivo
     - categoría
+    - relativa, tamano, mtime, hash
+
+    Guarda un manifiesto (ruta → tamaño, mtime, hash) para que los
+    escaneos siguientes devuelvan solo archivos nuevos o modificados.
     """
 
     VALID_EXT = (".jpg", ".jpeg", ".png", ".webp", ".gif")
+    MANIFIESTO_VERSION = 1
 
-    def scan_media(self):
-        base = os.path.join(settings.MEDIA_ROOT, "productos")
+    def __init__(self, base=None, manifiesto=None, hilos=4):
+        self.base = base or os.path.join(settings.MEDIA_ROOT, "productos")
+        self.manifiesto_path = manifiesto or os.path.join(
+            settings.BASE_DIR, "logs", "manifiesto_imagenes.json"
+        )
+        self.hilos = hilos
+        self._manifiesto = None
+        self._vistos = set()
+        self._pendientes = {}
+        self._completo = False
+
+    # =====================================================
+    #   MANIFIESTO
+    # =====================================================
+    def _cargar_manifiesto(self):
+        if self._manifiesto is None:
+            try:
+                with open(self.manifiesto_path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != self.MANIFIESTO_VERSION:
+                    raise ValueError("versión distinta")
+                self._manifiesto = data["archivos"]
+            except (OSError, ValueError, KeyError):
+                self._manifiesto = {}
+        return self._manifiesto
+
+    def confirmar(self, excluir=()):
+        """
+        Guarda en el manifiesto lo escaneado, una vez procesado. Las rutas
+        absolutas en `excluir` (p. ej. subidas fallidas) no se registran y
+        vuelven a aparecer en el próximo escaneo.
+        """
+        manifiesto = self._cargar_manifiesto()
+        excluir = {os.path.relpath(r, self.base).replace(os.sep, "/") for r in excluir}
+
+        for relativa, datos in self._pendientes.items():
+            if relativa not in excluir:
+                manifiesto[relativa] = datos
+
+        # Solo con un recorrido completo se sabe qué archivos ya no existen
+        if self._completo:
+            for relativa in list(manifiesto):
+                if relativa not in self._vistos:
+                    del manifiesto[relativa]
+
+        os.makedirs(os.path.dirname(self.manifiesto_path), exist_ok=True)
+        tmp = self.manifiesto_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": self.MANIFIESTO_VERSION, "archivos": manifiesto}, f)
+        os.replace(tmp, self.manifiesto_path)
+
+        self._pendientes = {}
+
+    # =====================================================
+    #   RECORRIDO
+    # =====================================================
+    def _recorrer(self, carpeta):
+        """DirEntry de imágenes bajo `carpeta`, incluyendo subcarpetas."""
+        pendientes = [carpeta]
+        while pendientes:
+            actual = pendientes.pop()
+            try:
+                with os.scandir(actual) as it:
+                    for entrada in it:
+                        if entrada.is_dir(follow_symlinks=False):
+                            pendientes.append(entrada.path)
+                        elif entrada.is_file() and entrada.name.lower().endswith(self.VALID_EXT):
+                            yield entrada
+            except OSError:
+                continue
 
-        if not os.path.exists(base):
-            return []
+    def _enviar(self, salida, item, cancelado):
+        # put con timeout: si el consumidor abandona el generador, no quedar bloqueado
+        while not cancelado.is_set():
+            try:
+                salida.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _escanear_categoria(self, categoria, ruta_cat, manifiesto, solo_cambios, salida, cancelado):
+        for entrada in self._recorrer(ruta_cat):
+            if cancelado.is_set():
+                return
+            stat = entrada.stat()
+            relativa = os.path.relpath(entrada.path, self.base).replace(os.sep, "/")
+            previo = manifiesto.get(relativa)
+            self._vistos.add(relativa)
 
-        resultados = []
+            if (
+                solo_cambios
+                and previo
+                and previo["tamano"] == stat.st_size
+                and previo["mtime"] == stat.st_mtime
+            ):
+                continue
 
-        for categoria in os.listdir(base):
-            cat_path = os.path.join(base, categoria)
+            datos = {
+                "tamano": stat.st_size,
+                "mtime": stat.st_mtime,
+                "hash": hash_archivo(entrada.path),
+            }
 
-            if not os.path.isdir(cat_path):
+            # Tocado pero con el mismo contenido: se actualiza el mtime y nada más
+            if solo_cambios and previo and previo["hash"] == datos["hash"]:
+                self._pendientes[relativa] = datos
                 continue
 
-            for archivo in os.listdir(cat_path):
+            self._pendientes[relativa] = datos
+            self._enviar(salida, {
+                "ruta": entrada.path,
+                "archivo": entrada.name,
+                "categoria": categoria,
+                "relativa": relativa,
+                **datos,
+            }, cancelado)
+
+    def escanear(self, solo_cambios=True):
+        """
+        Generador: recorre cada carpeta de categoría en un hilo y va
+        entregando los archivos a medida que aparecen. Con solo_cambios
+        se omiten los que coinciden con el manifiesto. Después de procesar
+        lo entregado hay que llamar a confirmar().
+        """
+        if not os.path.isdir(self.base):
+            return
+
+        manifiesto = self._cargar_manifiesto()
+        self._vistos = set()
+        self._pendientes = {}
+        self._completo = False
 
-                if not archivo.lower().endswith(self.VALID_EXT):
-                    continue
+        with os.scandir(self.base) as it:
+            categorias = [(e.name, e.path) for e in it if e.is_dir()]
 
-                ruta = os.path.join(cat_path, archivo)
+        if not categorias:
+            self._completo = True
+            return
 
-                resultados.append({
-                    "ruta": ruta,
-                    "archivo": archivo,
-                    "categoria": categoria,
-                })
+        salida = queue.Queue(maxsize=256)
+        cancelado = threading.Event()
+        fin = object()
+        restantes = len(categorias)
 
-        return resultados
+        def trabajar(categoria, ruta_cat):
+            try:
+                self._escanear_categoria(
+                    categoria, ruta_cat, manifiesto, solo_cambios, salida, cancelado
+                )
+            finally:
+                self._enviar(salida, fin, cancelado)
+
+        with ThreadPoolExecutor(max_workers=self.hilos) as pool:
+            futuros = [pool.submit(trabajar, c, r) for c, r in categorias]
+            try:
+                while restantes:
+                    item = salida.get()
+                    if item is fin:
+                        restantes -= 1
+                        continue
+                    yield item
+            finally:
+                # Si el consumidor corta antes, los hilos terminan solos
+                if restantes:
+                    cancelado.set()
+
+            for futuro in futuros:
+                # Propaga errores de los hilos (permisos, disco, etc.)
+                futuro.result()
+
+        self._completo = True
+
+    def scan_media(self):
+        """Compatibilidad: todas las imágenes, sin filtrar por manifiesto."""
+        return list(self.escanear(solo_cambios=False))
@@ -1,25 +1,52 @@
+import mimetypes
+import os
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.generics import get_object_or_404
 
 from productos.models import Producto
-from .serializers import ProductoEdicionSerializer
-from .utils.scanner import ImageScanner
-from .utils.generator import ProductGenerator
+from .models import ArchivoTrabajo, Trabajo
+from .serializers import ProductoEdicionSerializer, TrabajoSerializer
+from .trabajos import REGISTRO, TipoDesconocido, encolar, guardar_archivo
 
-class EscanearImagenes(APIView):
-    permission_classes = [AllowAny]
+# Para los listados: los archivos sin el contenido
+ARCHIVOS_SIN_CONTENIDO = Prefetch(
+    "archivos", queryset=ArchivoTrabajo.objects.defer("contenido").order_by("id")
+)
 
-    def post(self, request):
-        scanner = ImageScanner()
-        items = scanner.scan_media()
 
-        generator = ProductGenerator()
-        creados = generator.generar_desde_media(items)
+def respuesta_encolado(request, trabajo):
+    """202 con el id y la URL para consultar el estado del trabajo."""
+    return Response(
+        {
+            "trabajo_id": trabajo.id,
+            "estado": trabajo.estado,
+            "url": request.build_absolute_uri(f"/api/gestion/trabajos/{trabajo.id}/"),
+        },
+        status=status.HTTP_202_ACCEPTED,
+    )
 
-        s = ProductoEdicionSerializer(creados, many=True)
-        return Response(s.data, status=status.HTTP_201_CREATED)
+
+class EscanearImagenes(APIView):
+    # Encola escaneo + subidas a Cloudinary: solo staff, como /trabajos/
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        # Solo imágenes nuevas o modificadas desde el último escaneo;
+        # ?completo=1 vuelve a procesar toda la carpeta.
+        # Corre en el worker (procesar_trabajos), no en el request.
+        completo = request.query_params.get("completo") in ("1", "true")
+        trabajo = encolar(
+            "escanear_imagenes", {"completo": completo}, usuario=request.user
+        )
+        return respuesta_encolado(request, trabajo)
 
 
 
@@ -42,3 +69,116 @@ class UpdateLote(APIView):
             s.is_valid(raise_exception=True)
             s.save()
         return Response({"status": "ok"})
+
+
+class TrabajosView(APIView):
+    """GET: últimos trabajos. POST {tipo, parametros}: encola uno nuevo."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        qs = Trabajo.objects.prefetch_related(ARCHIVOS_SIN_CONTENIDO)
+        if request.query_params.get("estado"):
+            qs = qs.filter(estado=request.query_params["estado"])
+        s = TrabajoSerializer(qs[:50], many=True)
+        return Response(s.data)
+
+    def post(self, request):
+        s = TrabajoSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        if s.validated_data["tipo"] == "importar_catalogo":
+            return Response(
+                {"error": "La importación lleva archivo: usar POST /api/gestion/trabajos/importar/."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            trabajo = encolar(
+                s.validated_data["tipo"],
+                s.validated_data.get("parametros"),
+                usuario=request.user,
+            )
+        except TipoDesconocido as e:
+            return Response(
+                {"error": str(e), "tipos": sorted(REGISTRO)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return respuesta_encolado(request, trabajo)
+
+
+class ImportarCatalogoView(APIView):
+    """
+    POST multipart con `archivo` (CSV o XLSX) y opcionalmente dry_run,
+    todo_o_nada y bloque. El archivo se guarda en la base para que lo lea
+    el worker, que corre en otro servicio.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    EXTENSIONES = (".csv", ".xlsx")
+    VERDADEROS = ("1", "true", "si", "sí")
+
+    def post(self, request):
+        subido = request.FILES.get("archivo")
+        if subido is None:
+            return Response(
+                {"error": "Falta el archivo."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if os.path.splitext(subido.name)[1].lower() not in self.EXTENSIONES:
+            return Response(
+                {"error": "Formato no soportado. Use CSV o XLSX."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        parametros = {
+            "dry_run": request.data.get("dry_run", "").lower() in self.VERDADEROS,
+            "todo_o_nada": request.data.get("todo_o_nada", "").lower() in self.VERDADEROS,
+        }
+        try:
+            if request.data.get("bloque"):
+                parametros["bloque"] = max(1, int(request.data["bloque"]))
+        except ValueError:
+            return Response(
+                {"error": "'bloque' tiene que ser un número."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Que el worker nunca vea el trabajo sin su archivo
+        with transaction.atomic():
+            trabajo = encolar("importar_catalogo", parametros, usuario=request.user)
+            guardar_archivo(trabajo, ArchivoTrabajo.ENTRADA, subido.name, subido.read())
+        return respuesta_encolado(request, trabajo)
+
+
+class TrabajoDetalle(APIView):
+    """Estado y progreso de un trabajo."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        trabajo = get_object_or_404(
+            Trabajo.objects.prefetch_related(ARCHIVOS_SIN_CONTENIDO), pk=pk
+        )
+        return Response(TrabajoSerializer(trabajo).data)
+
+
+class TrabajoArchivo(APIView):
+    """Descarga el archivo que generó el trabajo (p. ej. una exportación)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, pk):
+        archivo = (
+            ArchivoTrabajo.objects.filter(trabajo_id=pk, rol=ArchivoTrabajo.SALIDA)
+            .order_by("-id")
+            .first()
+        )
+        if archivo is None:
+            return Response(
+                {"error": "El trabajo no generó ningún archivo (todavía)."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        tipo, _ = mimetypes.guess_type(archivo.nombre)
+        response = HttpResponse(
+            bytes(archivo.contenido), content_type=tipo or "application/octet-stream"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{archivo.nombre}"'
+        return response
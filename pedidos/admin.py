@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Pedido, PedidoItem
+from .models import ClaveIdempotencia, Pedido, PedidoItem
 
 class PedidoItemInline(admin.TabularInline):
     model = PedidoItem
@@ -11,3 +11,10 @@ class PedidoAdmin(admin.ModelAdmin):
     list_filter = ("creado",)
     search_fields = ("usuario__username", "email", "nombre")
     inlines = [PedidoItemInline]
+
+
+@admin.register(ClaveIdempotencia)
+class ClaveIdempotenciaAdmin(admin.ModelAdmin):
+    list_display = ("clave", "usuario", "status_code", "creado")
+    search_fields = ("clave", "usuario__username")
+    readonly_fields = ("respuesta",)
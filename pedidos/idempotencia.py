@@ -0,0 +1,75 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import ClaveIdempotencia
+
+
+HEADER = "Idempotency-Key"
+
+
+class ClaveRepetida(Exception):
+    """Otra request con la misma clave confirmó primero."""
+
+
+def vencimiento():
+    return timezone.now() - timedelta(hours=settings.PEDIDOS_IDEMPOTENCIA_TTL_HORAS)
+
+
+def huella_request(data):
+    crudo = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(crudo.encode("utf-8")).hexdigest()
+
+
+def respuesta_guardada(usuario, clave, huella):
+    """Response guardada para la clave (si sigue vigente) o None."""
+    registro = ClaveIdempotencia.objects.filter(
+        usuario=usuario, clave=clave, creado__gte=vencimiento()
+    ).first()
+
+    if registro is None:
+        return None
+
+    if registro.huella != huella:
+        return Response(
+            {"error": f"El {HEADER} ya se usó con otro pedido."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    return Response(registro.respuesta, status=registro.status_code)
+
+
+def reservar_clave(usuario, clave, huella):
+    """
+    Inserta la clave dentro de la transacción del pedido.
+
+    Si otra request con la misma clave está en curso, el INSERT queda
+    esperando en el índice único hasta que esa termine: si confirmó se
+    lanza ClaveRepetida (hay que devolver su respuesta); si hizo rollback
+    el INSERT pasa y esta request procesa el pedido normalmente.
+    """
+    ClaveIdempotencia.objects.filter(
+        usuario=usuario, clave=clave, creado__lt=vencimiento()
+    ).delete()
+
+    try:
+        with transaction.atomic():
+            return ClaveIdempotencia.objects.create(
+                usuario=usuario, clave=clave, huella=huella
+            )
+    except IntegrityError:
+        raise ClaveRepetida()
+
+
+def guardar_respuesta(registro, payload, status_code):
+    # Se guarda tal cual la vio el cliente (Decimal → número, etc.)
+    registro.respuesta = json.loads(JSONRenderer().render(payload))
+    registro.status_code = status_code
+    registro.save(update_fields=["respuesta", "status_code"])
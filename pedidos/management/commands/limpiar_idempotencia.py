@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from pedidos.idempotencia import vencimiento
+from pedidos.models import ClaveIdempotencia
+
+
+class Command(BaseCommand):
+    help = "Borra las Idempotency-Key vencidas (PEDIDOS_IDEMPOTENCIA_TTL_HORAS)"
+
+    def handle(self, *args, **opts):
+        borradas, _ = ClaveIdempotencia.objects.filter(creado__lt=vencimiento()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Claves vencidas borradas: {borradas}"))
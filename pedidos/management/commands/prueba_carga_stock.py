@@ -0,0 +1,84 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from pedidos.stock import StockInsuficiente, reservar_stock
+from productos.models import Categoria, Producto
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de la reserva de stock: N hilos compran el mismo "
+        "producto a la vez y se verifica que no haya sobreventa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hilos", type=int, default=16)
+        parser.add_argument("--intentos", type=int, default=50, help="Compras por hilo")
+        parser.add_argument("--stock", type=int, default=200)
+        parser.add_argument("--cantidad", type=int, default=1, help="Unidades por compra")
+
+    def handle(self, *args, **opts):
+        categoria, _ = Categoria.objects.get_or_create(nombre="__prueba_carga__")
+        producto = Producto.objects.create(
+            categoria=categoria,
+            nombre="Producto prueba de carga",
+            precio=1,
+            stock=opts["stock"],
+        )
+
+        contadores = {"vendidas": 0, "rechazadas": 0, "errores": 0}
+        lock = threading.Lock()
+        barrera = threading.Barrier(opts["hilos"])
+
+        def comprador():
+            try:
+                barrera.wait()
+                for _ in range(opts["intentos"]):
+                    resultado = "vendidas"
+                    try:
+                        with transaction.atomic():
+                            reservar_stock({producto.pk: opts["cantidad"]})
+                    except StockInsuficiente:
+                        resultado = "rechazadas"
+                    except OperationalError:
+                        # SQLite: "database is locked" bajo mucha concurrencia
+                        resultado = "errores"
+                    with lock:
+                        contadores[resultado] += 1
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=comprador) for _ in range(opts["hilos"])]
+        inicio = time.perf_counter()
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        duracion = time.perf_counter() - inicio
+
+        try:
+            producto.refresh_from_db(fields=["stock"])
+            stock_final = producto.stock
+        finally:
+            producto.delete()
+            if not categoria.productos.exists():
+                categoria.delete()
+
+        total = sum(contadores.values())
+        unidades_vendidas = contadores["vendidas"] * opts["cantidad"]
+
+        self.stdout.write(f"Motor: {connection.vendor}")
+        self.stdout.write(f"Hilos: {opts['hilos']} — intentos: {total}")
+        self.stdout.write(f"Vendidas: {contadores['vendidas']} — rechazadas: {contadores['rechazadas']} — errores: {contadores['errores']}")
+        self.stdout.write(f"Stock inicial: {opts['stock']} — final: {stock_final}")
+        self.stdout.write(f"Throughput: {total / duracion:.1f} reservas/s ({duracion:.2f}s)")
+
+        if stock_final != opts["stock"] - unidades_vendidas:
+            raise CommandError("❌ Stock final inconsistente con las ventas registradas")
+        if unidades_vendidas > opts["stock"]:
+            raise CommandError("❌ SOBREVENTA detectada")
+
+        self.stdout.write(self.style.SUCCESS("✔ Sin sobreventa"))
@@ -34,3 +34,32 @@ class PedidoItem(models.Model):
 
     def __str__(self):
         return f"{self.cantidad} x {self.producto.nombre}"
+
+
+class ClaveIdempotencia(models.Model):
+    """
+    Respuesta guardada de un POST /api/pedido/crear/ con header Idempotency-Key.
+    Los reintentos con la misma clave devuelven esta respuesta sin volver
+    a procesar el carrito.
+    """
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="claves_idempotencia"
+    )
+    clave = models.CharField(max_length=255)
+    huella = models.CharField(max_length=64)  # sha256 del body
+    status_code = models.PositiveSmallIntegerField(default=201)
+    respuesta = models.JSONField(default=dict)
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["usuario", "clave"],
+                name="pedidos_idempotencia_unica",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.clave} ({self.usuario_id})"
@@ -0,0 +1,48 @@
+from django.db.models import F
+
+from productos.models import Producto
+
+
+class StockInsuficiente(Exception):
+    """Uno o más productos no tienen stock para la cantidad pedida."""
+
+    def __init__(self, items):
+        self.items = items
+        super().__init__(f"Stock insuficiente para {len(items)} producto(s)")
+
+
+def reservar_stock(cantidades):
+    """
+    Descuenta stock para {producto_id: cantidad}.
+
+    Un UPDATE condicional por producto (stock = stock - n WHERE stock >= n),
+    siempre en orden de ID para que dos checkouts concurrentes tomen los
+    locks de fila en el mismo orden y no haya deadlocks.
+
+    Debe llamarse dentro de transaction.atomic(): si algún producto no
+    alcanza se lanza StockInsuficiente con todos los faltantes y la
+    transacción deshace los descuentos ya aplicados.
+    """
+    sin_stock = []
+
+    for producto_id in sorted(cantidades):
+        cantidad = cantidades[producto_id]
+        actualizadas = Producto.objects.filter(
+            pk=producto_id, stock__gte=cantidad
+        ).update(stock=F("stock") - cantidad)
+
+        if not actualizadas:
+            sin_stock.append(producto_id)
+
+    if sin_stock:
+        disponibles = dict(
+            Producto.objects.filter(pk__in=sin_stock).values_list("id", "stock")
+        )
+        raise StockInsuficiente([
+            {
+                "id": producto_id,
+                "solicitado": cantidades[producto_id],
+                "disponible": disponibles.get(producto_id, 0),
+            }
+            for producto_id in sin_stock
+        ])
@@ -0,0 +1,215 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from productos.models import Categoria, Producto
+
+from .idempotencia import ClaveRepetida, respuesta_guardada
+from .models import Pedido, PedidoItem
+
+
+# Stock apagado: reservar_stock hace un UPDATE por producto a propósito
+@override_settings(PEDIDOS_CONTROLAR_STOCK=False)
+class CrearPedidoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user(
+            username="cliente", email="cliente@example.com", password="clave-segura-123"
+        )
+        categoria = Categoria.objects.create(nombre="Aros")
+        cls.productos = Producto.objects.bulk_create([
+            Producto(categoria=categoria, nombre=f"Aro {i}", precio=Decimal("100.00") + i)
+            for i in range(40)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.url = reverse("crear_pedido")
+
+    def datos(self, items):
+        return {
+            "nombre": "Cliente",
+            "email": "cliente@example.com",
+            "direccion": "Calle 123",
+            "metodoPago": "transferencia",
+            "items": items,
+        }
+
+    def test_misma_cantidad_de_consultas_para_1_y_40_lineas(self):
+        with CaptureQueriesContext(connection) as una_linea:
+            res = self.client.post(
+                self.url, self.datos([{"id": self.productos[0].pk}]), format="json"
+            )
+        self.assertEqual(res.status_code, 201)
+
+        items = [{"id": p.pk, "cantidad": 2} for p in self.productos]
+        with self.assertNumQueries(len(una_linea)):
+            res = self.client.post(self.url, self.datos(items), format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(PedidoItem.objects.filter(pedido_id=res.data["pedido_id"]).count(), 40)
+
+    def test_lineas_repetidas_se_suman(self):
+        producto = self.productos[0]
+        items = [
+            {"id": producto.pk, "cantidad": 2},
+            {"id": str(producto.pk), "cantidad": 3},
+        ]
+        res = self.client.post(self.url, self.datos(items), format="json")
+
+        self.assertEqual(res.status_code, 201)
+        pedido = Pedido.objects.get(pk=res.data["pedido_id"])
+        item = pedido.items.get()
+        self.assertEqual(item.cantidad, 5)
+        self.assertEqual(pedido.total, producto.precio * 5)
+
+    def test_productos_inexistentes_devuelven_faltantes(self):
+        items = [{"id": self.productos[0].pk}, {"id": 999999}, {"id": 999998}]
+        res = self.client.post(self.url, self.datos(items), format="json")
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data["faltantes"], [999998, 999999])
+        self.assertFalse(Pedido.objects.exists())
+
+
+@override_settings(PEDIDOS_CONTROLAR_STOCK=True)
+class StockPedidoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user(
+            username="cliente", email="cliente@example.com", password="clave-segura-123"
+        )
+        categoria = Categoria.objects.create(nombre="Aros")
+        cls.con_stock = Producto.objects.create(
+            categoria=categoria, nombre="Aro con stock", precio=Decimal("100.00"), stock=10
+        )
+        cls.sin_stock = Producto.objects.create(
+            categoria=categoria, nombre="Aro agotado", precio=Decimal("50.00"), stock=1
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.url = reverse("crear_pedido")
+
+    def pedir(self, items):
+        return self.client.post(self.url, {
+            "nombre": "Cliente",
+            "email": "cliente@example.com",
+            "direccion": "Calle 123",
+            "metodoPago": "transferencia",
+            "items": items,
+        }, format="json")
+
+    def test_descuenta_stock(self):
+        res = self.pedir([{"id": self.con_stock.pk, "cantidad": 3}])
+
+        self.assertEqual(res.status_code, 201)
+        self.con_stock.refresh_from_db()
+        self.assertEqual(self.con_stock.stock, 7)
+
+    def test_sin_stock_devuelve_409_con_detalle(self):
+        res = self.pedir([{"id": self.sin_stock.pk, "cantidad": 2}])
+
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.data["sin_stock"], [{
+            "id": self.sin_stock.pk,
+            "solicitado": 2,
+            "disponible": 1,
+            "nombre": "Aro agotado",
+        }])
+
+    def test_todo_o_nada(self):
+        # El primero alcanza y se descuenta dentro de la transacción;
+        # el segundo no, así que se deshace todo
+        res = self.pedir([
+            {"id": self.con_stock.pk, "cantidad": 3},
+            {"id": self.sin_stock.pk, "cantidad": 2},
+        ])
+
+        self.assertEqual(res.status_code, 409)
+        self.con_stock.refresh_from_db()
+        self.sin_stock.refresh_from_db()
+        self.assertEqual(self.con_stock.stock, 10)
+        self.assertEqual(self.sin_stock.stock, 1)
+        self.assertFalse(Pedido.objects.exists())
+        self.assertFalse(PedidoItem.objects.exists())
+
+
+@override_settings(PEDIDOS_CONTROLAR_STOCK=False)
+class IdempotenciaPedidoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = get_user_model().objects.create_user(
+            username="cliente", email="cliente@example.com", password="clave-segura-123"
+        )
+        categoria = Categoria.objects.create(nombre="Aros")
+        cls.producto = Producto.objects.create(
+            categoria=categoria, nombre="Aro", precio=Decimal("100.00")
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.url = reverse("crear_pedido")
+
+    def pedir(self, cantidad=1, clave="clave-1"):
+        return self.client.post(self.url, {
+            "nombre": "Cliente",
+            "email": "cliente@example.com",
+            "direccion": "Calle 123",
+            "metodoPago": "transferencia",
+            "items": [{"id": self.producto.pk, "cantidad": cantidad}],
+        }, format="json", HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_reintento_devuelve_la_misma_respuesta(self):
+        primera = self.pedir()
+        segunda = self.pedir()
+
+        self.assertEqual(primera.status_code, 201)
+        self.assertEqual(segunda.status_code, 201)
+        self.assertEqual(segunda.data["pedido_id"], primera.data["pedido_id"])
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    def test_misma_clave_con_otro_body_devuelve_422(self):
+        self.assertEqual(self.pedir(cantidad=1).status_code, 201)
+
+        res = self.pedir(cantidad=2)
+
+        self.assertEqual(res.status_code, 422)
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    def test_duplicado_concurrente_que_ya_confirmo(self):
+        # La otra request confirma entre la lectura inicial (que no ve
+        # nada) y el INSERT de la clave, que choca con el índice único
+        self.pedir()
+        pedido_id = Pedido.objects.get().pk
+        lecturas = [None]
+
+        def respuesta(usuario, clave, huella):
+            if lecturas:
+                return lecturas.pop()
+            return respuesta_guardada(usuario, clave, huella)
+
+        with mock.patch("pedidos.views.respuesta_guardada", side_effect=respuesta):
+            res = self.pedir()
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data["pedido_id"], pedido_id)
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    def test_duplicado_concurrente_en_curso_devuelve_409(self):
+        with mock.patch("pedidos.views.reservar_clave", side_effect=ClaveRepetida):
+            res = self.pedir()
+
+        self.assertEqual(res.status_code, 409)
+        self.assertFalse(Pedido.objects.exists())
@@ -3,20 +3,87 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
+from django.conf import settings
 from django.db import transaction
 
+from .idempotencia import (
+    HEADER as IDEMPOTENCY_HEADER,
+    ClaveRepetida,
+    guardar_respuesta,
+    huella_request,
+    reservar_clave,
+    respuesta_guardada,
+)
 from .models import Pedido, PedidoItem
+from .stock import StockInsuficiente, reservar_stock
 from productos.models import Producto
 
 
 class CrearPedidoView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
+    def _agrupar_items(self, items):
+        """
+        {producto_id: cantidad} sumando las líneas repetidas del carrito.
+        Devuelve (cantidades, errores).
+        """
+        cantidades = {}
+        errores = []
+
+        for item in items:
+            try:
+                producto_id = int(item["id"])
+                cantidad = max(1, int(item.get("cantidad", 1)))
+            except (KeyError, TypeError, ValueError):
+                errores.append(f"Ítem inválido: {item}")
+                continue
+
+            cantidades[producto_id] = cantidades.get(producto_id, 0) + cantidad
+
+        return cantidades, errores
+
+    def _crear_pedido(self, usuario, data, cantidades, productos, total):
+        pedido = Pedido.objects.create(
+            usuario=usuario,
+            nombre=data["nombre"],
+            email=data["email"],
+            direccion=data["direccion"],
+            metodo_pago=data["metodoPago"],
+            total=total  # total seguro desde backend
+        )
+
+        # Un solo INSERT para todos los items
+        PedidoItem.objects.bulk_create([
+            PedidoItem(
+                pedido=pedido,
+                producto=productos[pid],
+                cantidad=cantidad,
+                precio_unitario=productos[pid].precio,
+            )
+            for pid, cantidad in cantidades.items()
+        ])
+        return pedido
+
     def post(self, request):
         usuario = request.user
         data = request.data
 
+        # ===============================
+        #  Reintentos con Idempotency-Key
+        # ===============================
+        clave = request.headers.get(IDEMPOTENCY_HEADER, "").strip()
+        huella = None
+        if clave:
+            if len(clave) > 255:
+                return Response(
+                    {"error": f"{IDEMPOTENCY_HEADER} demasiado larga."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            huella = huella_request(data)
+            previa = respuesta_guardada(usuario, clave, huella)
+            if previa is not None:
+                return previa
+
         items = data.get("items", [])
         if not items:
             return Response(
@@ -35,55 +102,77 @@ class CrearPedidoView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+        cantidades, errores = self._agrupar_items(items)
+        if errores:
+            return Response(
+                {"error": "Hay ítems inválidos en el carrito.", "detalle": errores},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         # ===============================
-        #  Cálculo REAL del total (anti fraude)
+        #  Productos en UNA sola consulta
         # ===============================
-        total_calculado = 0
-        productos_validos = []
-
-        for item in items:
-            try:
-                producto = Producto.objects.get(id=item["id"])
-            except Producto.DoesNotExist:
-                return Response(
-                    {"error": f"Producto con ID {item['id']} no existe."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            cantidad = max(1, int(item.get("cantidad", 1)))
-            subtotal = producto.precio * cantidad
+        productos = Producto.objects.only("id", "nombre", "precio").in_bulk(
+            list(cantidades)
+        )
 
-            total_calculado += subtotal
-            productos_validos.append((producto, cantidad))
+        faltantes = sorted(pid for pid in cantidades if pid not in productos)
+        if faltantes:
+            return Response(
+                {
+                    "error": "Hay productos que no existen.",
+                    "faltantes": faltantes,
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         # ===============================
-        #  Crear pedido (transacción atómica)
+        #  Cálculo REAL del total (anti fraude)
         # ===============================
-        pedido = Pedido.objects.create(
-            usuario=usuario,
-            nombre=data["nombre"],
-            email=data["email"],
-            direccion=data["direccion"],
-            metodo_pago=data["metodoPago"],
-            total=total_calculado  # total seguro desde backend
+        total_calculado = sum(
+            productos[pid].precio * cantidad for pid, cantidad in cantidades.items()
         )
 
         # ===============================
-        #  Crear items
+        #  Reserva de stock + pedido (todo o nada)
         # ===============================
-        for producto, cantidad in productos_validos:
-            PedidoItem.objects.create(
-                pedido=pedido,
-                producto=producto,
-                cantidad=cantidad,
-                precio_unitario=producto.precio,
+        try:
+            with transaction.atomic():
+                registro = reservar_clave(usuario, clave, huella) if clave else None
+
+                if settings.PEDIDOS_CONTROLAR_STOCK:
+                    reservar_stock(cantidades)
+                pedido = self._crear_pedido(
+                    usuario, data, cantidades, productos, total_calculado
+                )
+
+                payload = {
+                    "message": "Pedido creado correctamente",
+                    "pedido_id": pedido.id,
+                    "total": total_calculado
+                }
+                if registro is not None:
+                    guardar_respuesta(registro, payload, status.HTTP_201_CREATED)
+        except ClaveRepetida:
+            previa = respuesta_guardada(usuario, clave, huella)
+            if previa is not None:
+                return previa
+            # La otra request todavía no dejó su respuesta a la vista
+            # (o venció justo en el medio): que el cliente reintente
+            return Response(
+                {"error": "Ya hay una solicitud en curso con este "
+                          f"{IDEMPOTENCY_HEADER}. Reintentá en unos segundos."},
+                status=status.HTTP_409_CONFLICT
+            )
+        except StockInsuficiente as e:
+            for item in e.items:
+                item["nombre"] = productos[item["id"]].nombre
+            return Response(
+                {
+                    "error": "No hay stock suficiente para algunos productos.",
+                    "sin_stock": e.items,
+                },
+                status=status.HTTP_409_CONFLICT
             )
 
-        return Response(
-            {
-                "message": "Pedido creado correctamente",
-                "pedido_id": pedido.id,
-                "total": total_calculado
-            },
-            status=status.HTTP_201_CREATED
-        )
+        return Response(payload, status=status.HTTP_201_CREATED)
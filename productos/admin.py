@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Categoria, Producto
+from .models import Categoria, HuellaImagen, Producto
 
 
 # ============================================================
@@ -27,7 +27,7 @@ class ProductoAdmin(admin.ModelAdmin):
 
     # Filtros y búsqueda
     list_filter = ("categoria", "destacado")
-    search_fields = ("nombre", "descripcion")
+    search_fields = ("codigo", "nombre", "descripcion")
 
     # 🔥 Quitamos list_editable por ahora (lo agregamos después)
     list_editable = ()
@@ -38,6 +38,7 @@ class ProductoAdmin(admin.ModelAdmin):
     fieldsets = (
         ("Información del producto", {
             "fields": (
+                "codigo",
                 "nombre",
                 "categoria",
                 "descripcion",
@@ -46,6 +47,7 @@ class ProductoAdmin(admin.ModelAdmin):
                 "precio",
                 "stock",
                 "destacado",
+                "orden",
             )
         }),
     )
@@ -83,3 +85,14 @@ class ProductoAdmin(admin.ModelAdmin):
         return "Sin imagen"
 
     preview.short_description = "Vista previa"
+
+
+# ============================================================
+#   HUELLAS DE IMÁGENES (deduplicación de ingestas)
+# ============================================================
+
+@admin.register(HuellaImagen)
+class HuellaImagenAdmin(admin.ModelAdmin):
+    list_display = ("hash", "producto", "origen", "creado")
+    search_fields = ("hash", "origen", "producto__nombre", "producto__codigo")
+    raw_id_fields = ("producto",)
@@ -2,3 +2,8 @@ from django.apps import AppConfig
 class ProductosConfig(AppConfig):
     default_auto_field='django.db.models.BigAutoField'
     name='productos'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Valida CLOUDINARY_STORAGE al arrancar, no en el primer request
+        from . import imagenes  # noqa: F401
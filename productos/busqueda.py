@@ -0,0 +1,208 @@
+import bisect
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import connection
+from django.db.models import (
+    BooleanField,
+    Case,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Round
+from rest_framework.filters import BaseFilterBackend
+
+from .cache import version_catalogo
+from .models import Producto
+
+
+# Configuración de texto creada en la migración 0007 (spanish + unaccent)
+CONFIG_PG = "spanish_unaccent"
+
+# Decimales de la relevancia en Postgres (ver BusquedaPostgres)
+DECIMALES_RELEVANCIA = 6
+
+# Pesos por campo para el índice en memoria (mismo criterio que A/B/C en Postgres)
+PESOS = {"nombre": 1.0, "categoria": 0.4, "descripcion": 0.2}
+
+_RE_TOKEN = re.compile(r"\w+")
+
+
+def normalizar(texto):
+    """minúsculas y sin acentos."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return texto.lower()
+
+
+def tokenizar(texto):
+    tokens = []
+    for t in _RE_TOKEN.findall(normalizar(texto)):
+        # Plural muy básico: "tazas" → "taza", "flores" → "flor"
+        if len(t) > 4 and t.endswith("es"):
+            t = t[:-2]
+        elif len(t) > 3 and t.endswith("s"):
+            t = t[:-1]
+        tokens.append(t)
+    return tokens
+
+
+# ============================================
+#   POSTGRES: tsvector + GIN, con trigramas de respaldo
+# ============================================
+class BusquedaPostgres:
+    """
+    Una sola consulta: coincidencias léxicas (tsvector, índice GIN) primero,
+    ordenadas por rank, y después las de trigramas sobre el nombre (typos,
+    palabras cortadas) con el operador % (índice gin_trgm_ops, umbral
+    pg_trgm.similarity_threshold).
+    """
+
+    def buscar(self, queryset, texto):
+        consulta = SearchQuery(texto, config=CONFIG_PG, search_type="websearch")
+        lexica = Q(busqueda=consulta)
+        return (
+            # Lookup como expresión: django.contrib.postgres no está en INSTALLED_APPS
+            queryset.filter(lexica | TrigramSimilar(F("nombre"), texto))
+            .annotate(
+                lexica=ExpressionWrapper(lexica, output_field=BooleanField()),
+                # Redondeado: ts_rank es real (float4) y la paginación con
+                # cursor compara por igualdad contra el valor de la última fila
+                relevancia=Round(
+                    Case(
+                        When(lexica, then=SearchRank(F("busqueda"), consulta)),
+                        default=TrigramSimilarity("nombre", texto),
+                        output_field=FloatField(),
+                    ),
+                    DECIMALES_RELEVANCIA,
+                ),
+            )
+            .order_by("-lexica", "-relevancia", "pk")
+        )
+
+
+# ============================================
+#   SQLITE (desarrollo): índice invertido en memoria
+# ============================================
+class IndiceInvertido:
+
+    def __init__(self, filas):
+        self.postings = defaultdict(dict)
+
+        for pk, nombre, descripcion, categoria in filas:
+            for campo, texto in (
+                ("nombre", nombre),
+                ("categoria", categoria),
+                ("descripcion", descripcion),
+            ):
+                for token in tokenizar(texto):
+                    actual = self.postings[token].get(pk, 0.0)
+                    self.postings[token][pk] = actual + PESOS[campo]
+
+        self.tokens = sorted(self.postings)
+
+    def _coincidencias(self, termino):
+        """Postings del término exacto y de los tokens que empiezan con él."""
+        puntajes = defaultdict(float)
+        inicio = bisect.bisect_left(self.tokens, termino)
+        for token in self.tokens[inicio:]:
+            if not token.startswith(termino):
+                break
+            factor = 1.0 if token == termino else 0.5
+            for pk, peso in self.postings[token].items():
+                puntajes[pk] = max(puntajes[pk], peso * factor)
+        return puntajes
+
+    def buscar(self, texto):
+        """{pk: puntaje} de los productos que contienen todos los términos."""
+        terminos = tokenizar(texto)
+        if not terminos:
+            return {}
+
+        resultado = None
+        for termino in terminos:
+            puntajes = self._coincidencias(termino)
+            if resultado is None:
+                resultado = dict(puntajes)
+            else:
+                resultado = {
+                    pk: resultado[pk] + p for pk, p in puntajes.items() if pk in resultado
+                }
+            if not resultado:
+                return {}
+        return resultado
+
+
+class BusquedaMemoria:
+    """
+    Reconstruye el índice solo cuando cambia la versión del catálogo.
+    Devuelve todos los resultados (sin tope), así el total y las páginas
+    del paginador son correctos también en búsquedas amplias.
+    """
+
+    _lock = threading.Lock()
+    _version = None
+    _indice = None
+
+    @classmethod
+    def indice(cls):
+        version = version_catalogo()
+        with cls._lock:
+            if cls._indice is None or cls._version != version:
+                filas = Producto.objects.values_list(
+                    "id", "nombre", "descripcion", "categoria__nombre"
+                )
+                cls._indice = IndiceInvertido(filas.iterator(chunk_size=2000))
+                cls._version = version
+            return cls._indice
+
+    def buscar(self, queryset, texto):
+        puntajes = self.indice().buscar(texto)
+        if not puntajes:
+            return queryset.none()
+
+        relevancia = Case(
+            *[When(pk=pk, then=Value(p)) for pk, p in puntajes.items()],
+            output_field=FloatField(),
+        )
+        return (
+            queryset.filter(pk__in=list(puntajes))
+            .annotate(relevancia=relevancia)
+            .order_by("-relevancia", "pk")
+        )
+
+
+def backend_busqueda():
+    if connection.vendor == "postgresql":
+        return BusquedaPostgres()
+    return BusquedaMemoria()
+
+
+# ============================================
+#   FILTRO DRF (?q=)
+# ============================================
+class BusquedaFilter(BaseFilterBackend):
+    """
+    Búsqueda por relevancia con ?q=. Si además viene ?ordering=,
+    OrderingFilter lo aplica por encima de la relevancia.
+    """
+
+    search_param = "q"
+
+    def filter_queryset(self, request, queryset, view):
+        texto = request.query_params.get(self.search_param, "").strip()
+        if not texto:
+            return queryset
+        return backend_busqueda().buscar(queryset, texto)
@@ -0,0 +1,110 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.response import Response
+
+from .models import CatalogoVersion
+
+
+# ============================================
+#   VERSIÓN GLOBAL DEL CATÁLOGO
+# ============================================
+# Vive en la base para que la vean todos los workers de gunicorn
+# y también los comandos de management (importadores, sync, etc).
+VERSION_PK = 1
+
+CACHE_ALIAS = getattr(settings, "CATALOGO_CACHE_ALIAS", "catalogo")
+
+
+def estado_catalogo(request=None):
+    """
+    Devuelve {"version", "actualizado"} de la fila de versión.
+    Si se pasa el request, se memoriza ahí para no repetir la consulta.
+    """
+    if request is not None and hasattr(request, "_catalogo_estado"):
+        return request._catalogo_estado
+
+    estado = (
+        CatalogoVersion.objects.filter(pk=VERSION_PK)
+        .values("version", "actualizado")
+        .first()
+    ) or {"version": 0, "actualizado": None}
+
+    if request is not None:
+        request._catalogo_estado = estado
+    return estado
+
+
+def version_catalogo(request=None):
+    return estado_catalogo(request)["version"]
+
+
+def _incrementar_version():
+    actualizadas = CatalogoVersion.objects.filter(pk=VERSION_PK).update(
+        version=F("version") + 1,
+        actualizado=timezone.now(),
+    )
+    if not actualizadas:
+        CatalogoVersion.objects.get_or_create(pk=VERSION_PK, defaults={"version": 1})
+
+    # Snapshot estático (productos.snapshot): lo rearma el worker de trabajos
+    from .snapshot import programar_publicacion
+    programar_publicacion()
+
+
+def invalidar_catalogo(using=None):
+    """
+    Incrementa la versión del catálogo cuando confirma la transacción actual
+    (o en el acto si no hay transacción abierta). Las operaciones masivas
+    (bulk_create, bulk_update, .update()) no disparan señales, así que
+    deben llamarla a mano.
+    """
+    transaction.on_commit(_incrementar_version, using=using)
+
+
+# ============================================
+#   CACHE DE RESPUESTAS
+# ============================================
+def url_normalizada(request):
+    """path + query string con los parámetros ordenados (search, ordering, page...)."""
+    params = sorted(
+        (k, v) for k, valores in request.query_params.lists() for v in valores
+    )
+    return f"{request.path}?{urlencode(params)}"
+
+
+def clave_respuesta(request, version):
+    """URL normalizada + versión del catálogo."""
+    crudo = url_normalizada(request)
+    digest = hashlib.md5(crudo.encode("utf-8")).hexdigest()
+    return f"catalogo:v{version}:{digest}"
+
+
+class CatalogoCacheMixin:
+    """
+    Cachea el resultado de list() en el alias CATALOGO_CACHE_ALIAS.
+    Al cambiar la versión del catálogo las claves viejas dejan de usarse
+    y el backend (LRU) las va desalojando solo.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.method not in permissions.SAFE_METHODS:
+            return super().list(request, *args, **kwargs)
+
+        cache = caches[CACHE_ALIAS]
+        clave = clave_respuesta(request, version_catalogo(request))
+
+        data = cache.get(clave)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(clave, response.data)
+        return response
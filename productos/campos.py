@@ -0,0 +1,99 @@
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+
+
+# ============================================
+#   ?fields= / ?expand=
+# ============================================
+def _lista_param(request, param):
+    crudo = request.query_params.get(param)
+    if crudo is None:
+        return None
+    return list(dict.fromkeys(c.strip() for c in crudo.split(",") if c.strip()))
+
+
+def _validar(param, pedidos, disponibles):
+    invalidos = [c for c in pedidos if c not in disponibles]
+    if invalidos:
+        raise ValidationError({
+            param: f"Desconocidos: {', '.join(invalidos)}. "
+                   f"Disponibles: {', '.join(disponibles)}."
+        })
+    return pedidos
+
+
+def columnas_de(mapeo, campos):
+    """Une (sin repetir, en orden) las columnas que necesita cada campo."""
+    columnas = []
+    for campo in campos:
+        columnas.extend(mapeo.get(campo, ()))
+    return list(dict.fromkeys(columnas))
+
+
+class CamposDinamicosViewMixin:
+    """
+    Lee ?fields=a,b,c y ?expand=x de las lecturas (GET/HEAD) y los pasa al
+    serializer por el contexto ("campos" / "expandir"). Los campos y
+    expansiones válidos salen de COLUMNAS / EXPANDIBLES del serializer de
+    la acción; un nombre desconocido es un 400.
+    """
+
+    # Acciones que leen aunque lleguen por POST (p. ej. productos/batch/)
+    acciones_lectura = ()
+
+    def es_lectura(self):
+        return (
+            self.request.method in permissions.SAFE_METHODS
+            or getattr(self, "action", None) in self.acciones_lectura
+        )
+
+    def _serializer_campos(self):
+        return self.get_serializer_class()
+
+    def campos_pedidos(self):
+        """Lista de campos pedidos, o None si no vino ?fields=."""
+        if not hasattr(self, "_campos_pedidos"):
+            pedidos = _lista_param(self.request, "fields")
+            if pedidos is not None:
+                disponibles = list(self._serializer_campos().COLUMNAS)
+                pedidos = _validar("fields", pedidos, disponibles)
+            self._campos_pedidos = pedidos
+        return self._campos_pedidos
+
+    def expandir_pedidos(self):
+        if not hasattr(self, "_expandir_pedidos"):
+            pedidos = _lista_param(self.request, "expand") or []
+            disponibles = list(getattr(self._serializer_campos(), "EXPANDIBLES", ()))
+            self._expandir_pedidos = set(_validar("expand", pedidos, disponibles))
+        return self._expandir_pedidos
+
+    def get_serializer_context(self):
+        ctx = super().get_serializer_context()
+        if self.request is not None and self.es_lectura():
+            ctx["campos"] = self.campos_pedidos()
+            ctx["expandir"] = self.expandir_pedidos()
+        return ctx
+
+
+class CamposDinamicosMixin:
+    """
+    Para serializers: deja solo los campos de context["campos"] (si vino)
+    y quita los de SOLO_EXPANDIDO que no estén en context["expandir"].
+    Los campos write_only no se tocan.
+    """
+
+    SOLO_EXPANDIDO = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = self.context.get("campos")
+        expandir = self.context.get("expandir") or set()
+
+        for nombre in list(self.fields):
+            campo = self.fields[nombre]
+            if campo.write_only:
+                continue
+            if campos is not None and nombre not in campos:
+                self.fields.pop(nombre)
+            elif nombre in self.SOLO_EXPANDIDO and nombre not in expandir:
+                self.fields.pop(nombre)
@@ -0,0 +1,50 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import permissions
+
+from .cache import estado_catalogo, url_normalizada
+
+
+class CatalogoCondicionalMixin:
+    """
+    GET condicional (ETag / Last-Modified) para los listados del catálogo.
+
+    Los validadores salen solo de la fila de versión del catálogo (que ya
+    se consulta para la clave del cache) + la URL normalizada: toda
+    escritura del catálogo incrementa la versión, así que no hace falta
+    agregar sobre el queryset. Un If-None-Match / If-Modified-Since
+    vigente devuelve 304 con una sola consulta y sin serializar nada.
+    """
+
+    def validadores_catalogo(self, request):
+        estado = estado_catalogo(request)
+        ultimo = estado["actualizado"]
+
+        crudo = f"{url_normalizada(request)}|{estado['version']}"
+        etag = '"%s"' % hashlib.md5(crudo.encode("utf-8")).hexdigest()
+        return etag, ultimo
+
+    def list(self, request, *args, **kwargs):
+        if request.method not in permissions.SAFE_METHODS:
+            return super().list(request, *args, **kwargs)
+
+        etag, ultimo = self.validadores_catalogo(request)
+        timestamp = int(ultimo.timestamp()) if ultimo else None
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        # Obliga a revalidar: sin esto el navegador aplicaría
+        # cache heurístico a partir de Last-Modified.
+        patch_cache_control(response, no_cache=True)
+        return response
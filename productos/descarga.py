@@ -0,0 +1,101 @@
+import os
+import re
+import tempfile
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+
+from .utils.exporter_pro import EXTENSIONES, PARTES_TEXTO, ExportadorMasterPro
+
+
+FORMATOS_DESCARGA = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Tamaño de cada pedazo enviado al cliente
+TAM_BLOQUE = 64 * 1024
+
+_RE_GZIP = re.compile(r"\bgzip\b")
+
+
+def acepta_gzip(request):
+    return bool(_RE_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", "")))
+
+
+def _agrupar(partes):
+    """Junta las partes (str) en bloques de ~TAM_BLOQUE bytes."""
+    buffer = []
+    tam = 0
+    for parte in partes:
+        datos = parte.encode("utf-8")
+        buffer.append(datos)
+        tam += len(datos)
+        if tam >= TAM_BLOQUE:
+            yield b"".join(buffer)
+            buffer = []
+            tam = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def comprimir_gzip(bloques):
+    """Gzip incremental (wbits=31 → cabecera gzip) sobre un iterable de bytes."""
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloque in bloques:
+        salida = compresor.compress(bloque)
+        if salida:
+            yield salida
+    yield compresor.flush()
+
+
+def _bloques_xlsx(exportador):
+    """
+    openpyxl necesita un archivo para cerrar el zip: se escribe en un
+    temporal (no en memoria) y se envía por partes.
+    """
+    fd, ruta = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        exportador.exportar_formato(ruta, "xlsx")
+        with open(ruta, "rb") as f:
+            while True:
+                bloque = f.read(TAM_BLOQUE)
+                if not bloque:
+                    break
+                yield bloque
+    finally:
+        os.remove(ruta)
+
+
+def respuesta_exportacion(request, formato):
+    """
+    StreamingHttpResponse con el catálogo en el formato pedido. Las filas
+    salen de ExportadorMasterPro.filas() (cursor del lado del servidor),
+    así que el worker nunca tiene el catálogo completo en memoria.
+    """
+    exportador = ExportadorMasterPro()
+
+    if formato == "xlsx":
+        # El xlsx ya es un zip: comprimirlo de nuevo no ahorra nada
+        bloques = _bloques_xlsx(exportador)
+        gzip = False
+    else:
+        bloques = _agrupar(PARTES_TEXTO[formato](exportador.filas()))
+        gzip = acepta_gzip(request)
+        if gzip:
+            bloques = comprimir_gzip(bloques)
+
+    response = StreamingHttpResponse(bloques, content_type=FORMATOS_DESCARGA[formato])
+
+    nombre = f"catalogo-{timezone.localdate():%Y%m%d}.{EXTENSIONES[formato]}"
+    response["Content-Disposition"] = f'attachment; filename="{nombre}"'
+    response["Cache-Control"] = "no-store"
+    if gzip:
+        response["Content-Encoding"] = "gzip"
+    if formato != "xlsx":
+        patch_vary_headers(response, ("Accept-Encoding",))
+    return response
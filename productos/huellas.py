@@ -0,0 +1,115 @@
+import hashlib
+import threading
+
+from .models import HuellaImagen
+
+
+BLOQUE_HASH = 1024 * 1024
+
+# Distancia de Hamming (sobre 64 bits) hasta la que dos dHash se
+# consideran la misma imagen recomprimida o redimensionada
+UMBRAL_PERCEPTUAL = 6
+
+
+def hash_archivo(ruta):
+    """blake2b de 128 bits de los bytes del archivo, en hex."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, "rb") as f:
+        for chunk in iter(lambda: f.read(BLOQUE_HASH), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def dhash(ruta, lado=8):
+    """
+    Hash perceptual (dHash) de 64 bits en hex, o None si Pillow no está
+    instalado o el archivo no se puede abrir como imagen.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(ruta) as img:
+            gris = img.convert("L").resize((lado + 1, lado))
+            pixeles = list(gris.getdata())
+    except (OSError, ValueError):
+        return None
+
+    bits = 0
+    for fila in range(lado):
+        for col in range(lado):
+            izq = pixeles[fila * (lado + 1) + col]
+            der = pixeles[fila * (lado + 1) + col + 1]
+            bits = (bits << 1) | (izq > der)
+    return f"{bits:016x}"
+
+
+def distancia(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class IndiceHuellas:
+    """
+    Todas las huellas conocidas, leídas en UNA consulta al empezar la
+    corrida. Las consultas posteriores son en memoria y seguras entre
+    hilos; reservar() marca un hash como tomado antes de subirlo.
+    """
+
+    def __init__(self, filas=()):
+        self._lock = threading.Lock()
+        self.por_hash = {}
+        # phash → hash del archivo (los reservados todavía no tienen producto)
+        self.phashes = {}
+        for hash_, phash, producto_id in filas:
+            self.por_hash[hash_] = producto_id
+            if phash:
+                self.phashes[phash] = hash_
+
+    @classmethod
+    def cargar(cls):
+        return cls(HuellaImagen.objects.values_list("hash", "phash", "producto_id"))
+
+    def __contains__(self, hash_):
+        return hash_ in self.por_hash
+
+    def __len__(self):
+        return len(self.por_hash)
+
+    def producto(self, hash_):
+        return self.por_hash.get(hash_)
+
+    def similar(self, phash, umbral=UMBRAL_PERCEPTUAL):
+        """
+        Hash de una imagen casi idéntica ya registrada o reservada en esta
+        corrida, o None. producto() da su producto_id, si ya lo tiene.
+        """
+        if not phash:
+            return None
+        with self._lock:
+            candidatos = list(self.phashes.items())
+        for otro, hash_ in candidatos:
+            if distancia(phash, otro) <= umbral:
+                return hash_
+        return None
+
+    def reservar(self, hash_, phash=None):
+        """True si el hash estaba libre (y queda tomado); False si ya existía."""
+        with self._lock:
+            if hash_ in self.por_hash:
+                return False
+            self.por_hash[hash_] = None
+            if phash:
+                self.phashes[phash] = hash_
+            return True
+
+    def liberar(self, hash_, phash=None):
+        with self._lock:
+            self.por_hash.pop(hash_, None)
+            if phash:
+                self.phashes.pop(phash, None)
+
+    def asignar(self, hash_, producto_id):
+        with self._lock:
+            self.por_hash[hash_] = producto_id
@@ -0,0 +1,122 @@
+import re
+import warnings
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+# =============================================
+#   CONFIGURACIÓN (se resuelve una sola vez)
+# =============================================
+CLOUD_NAME = getattr(settings, "CLOUDINARY_STORAGE", {}).get("CLOUD_NAME")
+if not CLOUD_NAME:
+    # Sin esto las URLs saldrían como res.cloudinary.com/None/...
+    # En dev (DEBUG) se permite correr sin Cloudinary, como en settings/dev.py
+    if not settings.DEBUG:
+        raise ImproperlyConfigured(
+            "Falta CLOUDINARY_STORAGE['CLOUD_NAME'] (variable CLOUDINARY_CLOUD_NAME)."
+        )
+    warnings.warn("Sin CLOUDINARY_STORAGE['CLOUD_NAME']: las URLs de imagen no van a resolver.")
+
+CLOUDINARY_HOST = "res.cloudinary.com"
+MARCA_UPLOAD = "/image/upload/"
+
+# Transformaciones de Cloudinary por tipo de endpoint.
+# Se pueden pisar (o desactivar con "") desde settings.CLOUDINARY_PRESETS.
+PRESETS = {
+    "thumbnail": "c_fill,w_200,h_200,q_auto,f_auto",
+    "card": "c_limit,w_600,q_auto,f_auto",
+    "detail": "c_limit,w_1600,q_auto,f_auto",
+}
+PRESETS.update(getattr(settings, "CLOUDINARY_PRESETS", {}))
+
+CACHE_MAXSIZE = 4096
+
+_RE_UPLOAD_REPETIDO = re.compile(r"(image/upload/)+")
+_RE_PREFIJO_PRODUCTOS = re.compile(r"^productos/")
+_ESQUEMAS = ("http://", "https://")
+
+
+# =============================================
+#   LIMPIEZA DE RUTAS
+# =============================================
+def clean_cloudinary_path(path: str) -> str:
+    if not path:
+        return ""
+
+    if path.startswith(_ESQUEMAS):
+        return path
+
+    path = path.strip().lstrip("/")
+
+    # Normalizaciones
+    path = _RE_UPLOAD_REPETIDO.sub("image/upload/", path)
+    path = path.replace("yoquet/", "")
+    path = path.replace("media/", "")
+    path = _RE_PREFIJO_PRODUCTOS.sub("", path)
+
+    return path
+
+
+def build_cloudinary_final_url(path: str) -> str:
+    if not path:
+        return None
+
+    if CLOUDINARY_HOST in path:
+        return path
+
+    return f"https://{CLOUDINARY_HOST}/{CLOUD_NAME}/image/upload/{path}"
+
+
+def aplicar_preset(url, preset):
+    """Inserta la transformación del preset después de /image/upload/."""
+    transformacion = PRESETS.get(preset) if preset else None
+    if not url or not transformacion or CLOUDINARY_HOST not in url:
+        return url
+
+    pos = url.find(MARCA_UPLOAD)
+    if pos < 0:
+        return url
+
+    corte = pos + len(MARCA_UPLOAD)
+    resto = url[corte:]
+    if resto.startswith(transformacion + "/"):
+        return url
+    return f"{url[:corte]}{transformacion}/{resto}"
+
+
+# =============================================
+#   RESOLVER
+# =============================================
+@lru_cache(maxsize=CACHE_MAXSIZE)
+def _resolver(raw, preset):
+    raw = raw.strip()
+
+    if raw.startswith(_ESQUEMAS):
+        url = raw
+    else:
+        url = build_cloudinary_final_url(clean_cloudinary_path(raw))
+
+    return aplicar_preset(url, preset)
+
+
+def resolver_imagen(raw, preset=None):
+    """
+    URL final de la imagen de un producto a partir del valor crudo de
+    Producto.imagen. Memoriza por (valor, preset).
+    """
+    if not raw:
+        return None
+
+    if not isinstance(raw, str):
+        # Caso Cloudinary real (CloudinaryResource / FieldFile)
+        try:
+            url = raw.url
+        except Exception:
+            url = None
+        if url:
+            return aplicar_preset(url, preset)
+        raw = str(raw)
+
+    return _resolver(raw, preset)
@@ -0,0 +1,118 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from backend.middleware import brotli, comprimir
+from productos.models import Producto
+from productos.serializers import ProductoListSerializer
+
+
+PAGINAS = {
+    # nombre → (?fields=, ?expand=) como los pide el frontend
+    "listado": (None, ()),
+    "listado_expandido": (
+        ["id", "nombre", "precio", "imagen", "descripcion", "destacado", "categoria"],
+        ("categoria",),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de CompresionAPIMiddleware: bytes ahorrados y CPU por "
+        "request sobre páginas de 30 productos, para cada códec y nivel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--por-pagina", type=int, default=30)
+        parser.add_argument("--repeticiones", type=int, default=200)
+        parser.add_argument("--niveles-gzip", type=int, nargs="+", default=[1, 6, 9])
+        parser.add_argument("--niveles-brotli", type=int, nargs="+", default=[1, 4, 6, 11])
+        parser.add_argument(
+            "--sinteticos", action="store_true",
+            help="No leer la base: productos inventados con nombres y URLs realistas",
+        )
+        parser.add_argument("--semilla", type=int, default=42)
+
+    # ---------------------------------------------
+    #   DATOS
+    # ---------------------------------------------
+    def _sinteticos(self, cantidad, semilla):
+        rnd = random.Random(semilla)
+        categorias = ["Aros", "Collares", "Pulseras", "Anillos", "Tobilleras"]
+        materiales = ["dorado", "plateado", "acero", "perlas", "cristal", "cuero"]
+        filas = []
+        for i in range(cantidad):
+            cat_id = rnd.randrange(len(categorias))
+            categoria = categorias[cat_id]
+            material = rnd.choice(materiales)
+            filas.append({
+                "id": 1000 + i,
+                "nombre": f"{categoria} — {categoria[:-1]} {material} {rnd.randint(1, 99)}",
+                "precio": Decimal(rnd.randint(1500, 45000)),
+                "imagen": f"yoquet/productos/{categoria.lower()}/{material}-{i:04d}",
+                "descripcion": f"{categoria[:-1]} {material} hecho a mano. " * rnd.randint(1, 3),
+                "destacado": rnd.random() < 0.2,
+                "categoria_id": cat_id + 1,
+                "categoria__nombre": categoria,
+                "categoria__descripcion": f"Todos nuestros {categoria.lower()}",
+            })
+        return filas
+
+    def _filas(self, opts, campos, expandir):
+        if not opts["sinteticos"]:
+            qs = ProductoListSerializer.valores(
+                Producto.objects.order_by("-destacado", "nombre"), campos, expandir
+            )
+            filas = list(qs[:opts["por_pagina"]])
+            if len(filas) == opts["por_pagina"]:
+                return filas, "base"
+        return self._sinteticos(opts["por_pagina"], opts["semilla"]), "sintéticos"
+
+    def _pagina(self, opts, campos, expandir):
+        filas, origen = self._filas(opts, campos, expandir)
+        context = {"campos": campos, "expandir": set(expandir), "imagen_preset": "card"}
+        data = {
+            "count": 1234,
+            "next": "https://yoquet-disenos-backend.onrender.com/api/productos/?page=2",
+            "previous": None,
+            "results": ProductoListSerializer.serializar_rapido(filas, context),
+        }
+        return JSONRenderer().render(data), origen
+
+    # ---------------------------------------------
+    #   MEDICIÓN
+    # ---------------------------------------------
+    def _medir(self, contenido, codificacion, nivel, repeticiones):
+        inicio = time.process_time()
+        for _ in range(repeticiones):
+            comprimido = comprimir(contenido, codificacion, nivel)
+        cpu_ms = (time.process_time() - inicio) * 1000 / repeticiones
+        return len(comprimido), cpu_ms
+
+    def handle(self, *args, **opts):
+        codecs = [("gzip", n) for n in opts["niveles_gzip"]]
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("brotli no instalado: solo gzip"))
+        else:
+            codecs += [("br", n) for n in opts["niveles_brotli"]]
+
+        for nombre, (campos, expandir) in PAGINAS.items():
+            contenido, origen = self._pagina(opts, campos, expandir)
+            original = len(contenido)
+            self.stdout.write(self.style.SUCCESS(
+                f"\n{nombre}: {opts['por_pagina']} productos ({origen}) — {original} bytes"
+            ))
+            self.stdout.write(f"  {'códec':<8}{'bytes':>8}{'ahorro':>9}{'ratio':>8}{'CPU ms/req':>12}")
+
+            for codificacion, nivel in codecs:
+                tamano, cpu_ms = self._medir(
+                    contenido, codificacion, nivel, opts["repeticiones"]
+                )
+                self.stdout.write(
+                    f"  {f'{codificacion}-{nivel}':<8}{tamano:>8}{original - tamano:>9}"
+                    f"{original / tamano:>7.1f}x{cpu_ms:>12.3f}"
+                )
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from productos.utils.importer_pro import ImportadorMasterPro
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del importador con CSV sintéticos. Todo corre dentro de "
+        "una transacción que se deshace al final: no deja datos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--filas", type=int, nargs="+", default=[1000, 10000, 100000]
+        )
+        parser.add_argument("--categorias", type=int, default=20)
+        parser.add_argument("--chunk", type=int, default=1000)
+        parser.add_argument(
+            "--comparar", action="store_true",
+            help="Corre también el modo fila por fila (lento con muchas filas)",
+        )
+
+    def _csv_sintetico(self, filas, categorias):
+        df = pd.DataFrame({
+            "codigo": [f"BENCH-{i:07d}" for i in range(filas)],
+            "nombre": [f"Producto sintético {i}" for i in range(filas)],
+            "precio": [round(100 + (i % 997) * 1.37, 2) for i in range(filas)],
+            "categoria": [f"Bench {i % categorias}" for i in range(filas)],
+            "descripcion": "",
+            "destacado": [i % 50 == 0 for i in range(filas)],
+        })
+        fd, path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        df.to_csv(path, index=False)
+        return path
+
+    def _medir(self, path, bulk, chunk):
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                inicio = time.perf_counter()
+                # Primera pasada crea, la segunda reimporta el mismo archivo (sin cambios)
+                creados = ImportadorMasterPro(path, bulk=bulk, chunk_size=chunk).cargar()
+                medio = time.perf_counter()
+                reimportados = ImportadorMasterPro(path, bulk=bulk, chunk_size=chunk).cargar()
+                fin = time.perf_counter()
+            transaction.set_rollback(True)
+        return {
+            "alta_s": medio - inicio,
+            "reimportacion_s": fin - medio,
+            "consultas": len(ctx.captured_queries),
+            "resultado": (creados, reimportados),
+        }
+
+    def handle(self, *args, **opts):
+        modos = [("bulk", True)] + ([("filas", False)] if opts["comparar"] else [])
+
+        for filas in opts["filas"]:
+            path = self._csv_sintetico(filas, opts["categorias"])
+            try:
+                for nombre, bulk in modos:
+                    r = self._medir(path, bulk, opts["chunk"])
+                    self.stdout.write(
+                        f"{filas:>7} filas [{nombre:5}] "
+                        f"alta {r['alta_s']:7.2f}s ({filas / r['alta_s']:,.0f} filas/s) — "
+                        f"reimportación {r['reimportacion_s']:7.2f}s — "
+                        f"{r['consultas']} consultas"
+                    )
+            finally:
+                os.remove(path)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado (sin cambios en la base)"))
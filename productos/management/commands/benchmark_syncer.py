@@ -0,0 +1,57 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from productos.utils.emparejador import Emparejador
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del emparejador archivo → producto de SyncerMasterPro con "
+        "datos sintéticos. No usa la base ni el disco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--productos", type=int, default=5000)
+        parser.add_argument("--archivos", type=int, default=5000)
+        parser.add_argument("--semilla", type=int, default=42)
+
+    def _archivo(self, rnd, i):
+        """Mezcla de nombres exactos, con sufijo, parciales y sin producto."""
+        tipo = rnd.random()
+        if tipo < 0.5:
+            return f"yq-{i:06d}.jpg"
+        if tipo < 0.75:
+            return f"YQ_{i:06d}_{rnd.choice(['frente', 'dorso', '2'])}.png"
+        if tipo < 0.9:
+            return f"{i:06d}.webp"
+        return f"foto-sin-codigo-{i}.jpg"
+
+    def handle(self, *args, **opts):
+        rnd = random.Random(opts["semilla"])
+        productos = [(i, f"YQ-{i:06d}") for i in range(opts["productos"])]
+        archivos = [
+            self._archivo(rnd, rnd.randrange(opts["productos"]))
+            for _ in range(opts["archivos"])
+        ]
+
+        inicio = time.perf_counter()
+        emparejador = Emparejador(productos)
+        indice_s = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        resultado = emparejador.emparejar_todos(archivos)
+        emparejar_s = time.perf_counter() - inicio
+
+        self.stdout.write(f"Productos: {len(productos)} — archivos: {len(archivos)}")
+        self.stdout.write(f"Índice: {indice_s:.3f}s — emparejado: {emparejar_s:.3f}s")
+        self.stdout.write(
+            f"Asignadas: {len(resultado['asignaciones'])} — "
+            f"ambiguas: {len(resultado['ambiguas'])} — "
+            f"repetidas: {len(resultado['repetidas'])} — "
+            f"sin producto: {len(resultado['sin_producto'])}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {len(archivos) / max(emparejar_s, 1e-9):.0f} archivos/s"
+        ))
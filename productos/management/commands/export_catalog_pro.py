@@ -1,9 +1,10 @@
-from django.core.management.base import BaseCommand
-from productos.utils.exporter_pro import ExportadorMasterPro
+from django.core.management.base import BaseCommand, CommandError
+from productos.snapshot import publicar_snapshot
+from productos.utils.exporter_pro import EXTENSIONES, ExportadorMasterPro
 
 
 class Command(BaseCommand):
-    help = "Exportador MASTER PRO — JSON + XLSX"
+    help = "Exportador MASTER PRO — JSON + XLSX (o JSONL / CSV / Parquet con --formato)"
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -12,9 +13,52 @@ class Command(BaseCommand):
         parser.add_argument(
             "--excel", default="catalogo.xlsx", type=str
         )
+        parser.add_argument(
+            "--formato",
+            nargs="+",
+            choices=sorted(EXTENSIONES),
+            help="Uno o más formatos a exportar en vez del par JSON + XLSX",
+        )
+        parser.add_argument(
+            "--salida",
+            default="catalogo",
+            type=str,
+            help="Ruta base de salida para --formato (se agrega la extensión)",
+        )
+        parser.add_argument(
+            "--chunk", default=2000, type=int, help="Filas por lectura a la base"
+        )
+        parser.add_argument(
+            "--sin-snapshot",
+            action="store_true",
+            help="No republicar el snapshot estático del catálogo al terminar",
+        )
 
     def handle(self, *args, **opts):
-        exp = ExportadorMasterPro()
-        res = exp.exportar(json_path=opts["json"], excel_path=opts["excel"])
-        self.stdout.write(self.style.SUCCESS("Exportación completada"))
-        self.stdout.write(str(res))
+        exp = ExportadorMasterPro(chunk_size=opts["chunk"])
+
+        if not opts["formato"]:
+            res = exp.exportar(json_path=opts["json"], excel_path=opts["excel"])
+            self.stdout.write(self.style.SUCCESS("Exportación completada"))
+            self.stdout.write(str(res))
+        else:
+            self.exportar_formatos(exp, opts)
+
+        if not opts["sin_snapshot"]:
+            snap = publicar_snapshot()
+            self.stdout.write(self.style.SUCCESS(
+                f"✔ Snapshot v{snap['version']} → {snap['url']}"
+            ))
+
+    def exportar_formatos(self, exp, opts):
+        for formato in opts["formato"]:
+            ruta = f"{opts['salida']}.{EXTENSIONES[formato]}"
+            try:
+                stats = exp.exportar_formato(ruta, formato)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            self.stdout.write(self.style.SUCCESS(
+                f"✔ {formato}: {stats['filas']} filas → {ruta} "
+                f"({stats['segundos']}s, {stats['filas_por_segundo']} filas/s)"
+            ))
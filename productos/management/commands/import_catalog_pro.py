@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand
+from productos.utils.importer_pro import ImportadorMasterPro
+
+
+class Command(BaseCommand):
+    help = "Importador MASTER PRO — CSV / XLSX de proveedores"
+
+    def add_arguments(self, parser):
+        parser.add_argument("archivo", type=str)
+        parser.add_argument(
+            "--filas", action="store_true",
+            help="Modo fila por fila (sin bulk)",
+        )
+        parser.add_argument("--chunk", type=int, default=1000)
+
+        # Archivos grandes
+        parser.add_argument(
+            "--streaming", action="store_true",
+            help="Lee y confirma por bloques con memoria acotada (reanudable)",
+        )
+        parser.add_argument("--bloque", type=int, default=5000)
+        parser.add_argument(
+            "--desde-cero", action="store_true",
+            help="Ignora el checkpoint guardado y empieza desde la primera fila",
+        )
+        parser.add_argument(
+            "--todo-o-nada", action="store_true",
+            help="Streaming vía tabla de staging, aplicado en una sola transacción",
+        )
+
+        # Simulación
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Muestra qué se crearía / actualizaría sin escribir nada",
+        )
+        parser.add_argument(
+            "--reporte", type=str, default=None,
+            help="Con --dry-run: guarda el detalle campo por campo en este JSON",
+        )
+
+    def handle(self, *args, **opts):
+        imp = ImportadorMasterPro(
+            opts["archivo"], bulk=not opts["filas"], chunk_size=opts["chunk"]
+        )
+
+        if opts["dry_run"]:
+            reporte = imp.simular(filas_por_bloque=opts["bloque"])
+            self.stdout.write(self.style.SUCCESS("Simulación completada (sin cambios en la base)"))
+            self.stdout.write(f"Crear: {len(reporte['crear'])}")
+            self.stdout.write(f"Actualizar: {len(reporte['actualizar'])}")
+            self.stdout.write(f"Sin cambios: {reporte['sin_cambios']}")
+            self.stdout.write(f"Errores: {reporte['errores']}")
+
+            if opts["reporte"]:
+                with open(opts["reporte"], "w", encoding="utf-8") as f:
+                    json.dump(reporte, f, indent=2, ensure_ascii=False)
+                self.stdout.write(f"Detalle: {opts['reporte']}")
+            else:
+                for item in reporte["actualizar"][:20]:
+                    self.stdout.write(f"  {item['codigo']}: {item['cambios']}")
+            return
+
+        if opts["streaming"] or opts["todo_o_nada"]:
+            res = imp.cargar_streaming(
+                filas_por_bloque=opts["bloque"],
+                reanudar=not opts["desde_cero"],
+                todo_o_nada=opts["todo_o_nada"],
+            )
+        else:
+            res = imp.cargar()
+
+        self.stdout.write(self.style.SUCCESS("Importación completada"))
+        self.stdout.write(str(res))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from productos.snapshot import publicar_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Publica el snapshot estático del catálogo (JSON + .gz/.br) en la base; "
+        "el proceso web lo sirve desde STATIC_ROOT/catalogo/"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--forzar", action="store_true",
+            help="Rearmar aunque el último snapshot ya esté en la versión actual",
+        )
+
+    def handle(self, *args, **opts):
+        res = publicar_snapshot(forzar=opts["forzar"])
+        if res.get("omitido"):
+            self.stdout.write(f"↪ Snapshot al día (v{res['version']}): {res['url']}")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ Snapshot v{res['version']}: {res['productos']} productos, "
+            f"{res['categorias']} categorías → {res['url']}"
+        ))
+        self.stdout.write(f"   bytes: {res['bytes']}  (viejos borrados: {res['borrados']})")
@@ -8,4 +8,12 @@ class Command(BaseCommand):
     def handle(self, *args, **opts):
         resultados = SyncerMasterPro().sync()
         self.stdout.write(self.style.SUCCESS("Sincronización finalizada"))
-        self.stdout.write(str(resultados))
+        self.stdout.write(
+            f"asignadas: {resultados['asignadas']} — omitidas: {resultados['omitidas']} "
+            f"— errores: {resultados['errores']}"
+        )
+
+        for amb in resultados["ambiguas"]:
+            self.stdout.write(self.style.WARNING(
+                f"⚠ Ambigua: {amb['archivo']} → {', '.join(amb['codigos'])}"
+            ))
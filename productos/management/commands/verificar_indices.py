@@ -0,0 +1,85 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from productos.models import Producto
+from productos.paginacion import filtro_keyset
+from productos.serializers import ProductoListSerializer
+
+
+TABLA = Producto._meta.db_table
+
+_RE_SORT_PG = re.compile(r"(^|->)\s*Sort\s+\(")
+
+
+def plan_sin_indice(vendor, plan):
+    """Devuelve las líneas de EXPLAIN que indican scan secuencial u orden en memoria."""
+    malas = []
+    for linea in plan.splitlines():
+        if vendor == "sqlite":
+            if "USE TEMP B-TREE" in linea:
+                malas.append(linea)
+            elif f"SCAN {TABLA}" in linea and "USING" not in linea:
+                malas.append(linea)
+        elif vendor == "postgresql":
+            if f"Seq Scan on {TABLA}" in linea or _RE_SORT_PG.search(linea):
+                malas.append(linea)
+    return malas
+
+
+class Command(BaseCommand):
+    help = "Verifica con EXPLAIN que las consultas del catálogo usan índices"
+
+    def consultas(self):
+        lista = Producto.objects.select_related("categoria")
+        valores = ProductoListSerializer.valores
+        return {
+            # productos.views.ProductoViewSet (orden por defecto)
+            "productos": valores(lista.order_by("-destacado", "nombre"))[:30],
+            # productos.views.ProductoViewSet ?cursor= (página profunda)
+            "productos_cursor": valores(
+                lista.order_by("-destacado", "nombre", "id").filter(filtro_keyset(
+                    [("destacado", True), ("nombre", False), ("id", False)],
+                    [False, "m", 1000],
+                ))
+            )[:31],
+            # productos.views.ProductoViewSet ?ordering=precio
+            "productos_por_precio": valores(lista.order_by("precio"))[:30],
+            # productos.views.ProductosPorCategoriaView
+            "por_categoria": valores(
+                lista.filter(categoria_id=1).order_by("orden", "-destacado", "nombre")
+            )[:30],
+            # productos.views.ProductosDestacadosView
+            "destacados": valores(
+                lista.filter(destacado=True).order_by("-actualizado")
+            )[:12],
+            # gestion.views.ProductosPendientes
+            "pendientes": Producto.objects.filter(precio=0),
+        }
+
+    def handle(self, *args, **opts):
+        vendor = connection.vendor
+        if vendor not in ("sqlite", "postgresql"):
+            raise CommandError(f"Motor no soportado: {vendor}")
+
+        if vendor == "postgresql":
+            # Con tablas chicas el planner prefiere Seq Scan aunque exista el índice
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+        fallidas = []
+        for nombre, qs in self.consultas().items():
+            plan = qs.explain()
+            malas = plan_sin_indice(vendor, plan)
+
+            if malas:
+                fallidas.append(nombre)
+                self.stdout.write(self.style.ERROR(f"✗ {nombre}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"✔ {nombre}"))
+            self.stdout.write(plan)
+            self.stdout.write("")
+
+        if fallidas:
+            raise CommandError(f"Consultas sin índice: {', '.join(fallidas)}")
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0005_catalogoversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='orden',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['-destacado', 'nombre'], name='producto_dest_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['categoria', 'orden', '-destacado', 'nombre'], name='producto_cat_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('destacado', True)), fields=['-actualizado'], name='producto_destacados_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('precio', 0)), fields=['-destacado', 'nombre'], name='producto_pendientes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['precio'], name='producto_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['orden'], name='producto_orden_idx'),
+        ),
+    ]
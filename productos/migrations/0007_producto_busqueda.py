@@ -0,0 +1,95 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Solo Postgres: extensiones, configuración de texto sin acentos,
+# triggers que mantienen producto.busqueda e índices GIN.
+SQL_POSTGRES = """
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'spanish_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION productos_producto_busqueda_trigger() RETURNS trigger AS $$
+DECLARE
+    cat text;
+BEGIN
+    SELECT nombre INTO cat FROM productos_categoria WHERE id = NEW.categoria_id;
+    NEW.busqueda :=
+        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.nombre, '')), 'A') ||
+        setweight(to_tsvector('spanish_unaccent', coalesce(cat, '')), 'B') ||
+        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.descripcion, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER productos_producto_busqueda
+    BEFORE INSERT OR UPDATE OF nombre, descripcion, categoria_id
+    ON productos_producto
+    FOR EACH ROW EXECUTE FUNCTION productos_producto_busqueda_trigger();
+
+CREATE OR REPLACE FUNCTION productos_categoria_busqueda_trigger() RETURNS trigger AS $$
+BEGIN
+    IF NEW.nombre IS DISTINCT FROM OLD.nombre THEN
+        UPDATE productos_producto SET nombre = nombre WHERE categoria_id = NEW.id;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER productos_categoria_busqueda
+    AFTER UPDATE OF nombre ON productos_categoria
+    FOR EACH ROW EXECUTE FUNCTION productos_categoria_busqueda_trigger();
+
+CREATE INDEX IF NOT EXISTS producto_busqueda_gin
+    ON productos_producto USING gin (busqueda);
+CREATE INDEX IF NOT EXISTS producto_nombre_trgm
+    ON productos_producto USING gin (nombre gin_trgm_ops);
+
+-- Backfill
+UPDATE productos_producto SET nombre = nombre;
+"""
+
+SQL_POSTGRES_REVERSA = """
+DROP INDEX IF EXISTS producto_nombre_trgm;
+DROP INDEX IF EXISTS producto_busqueda_gin;
+DROP TRIGGER IF EXISTS productos_categoria_busqueda ON productos_categoria;
+DROP FUNCTION IF EXISTS productos_categoria_busqueda_trigger();
+DROP TRIGGER IF EXISTS productos_producto_busqueda ON productos_producto;
+DROP FUNCTION IF EXISTS productos_producto_busqueda_trigger();
+DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent;
+"""
+
+
+def crear_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(SQL_POSTGRES, params=None)
+
+
+def borrar_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(SQL_POSTGRES_REVERSA, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_producto_orden_indices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(crear_busqueda, borrar_busqueda),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0008_producto_codigo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilaImportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lote', models.CharField(max_length=32)),
+                ('fila', models.PositiveIntegerField()),
+                ('datos', models.JSONField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lote', 'fila'], name='fila_importacion_lote_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0009_filaimportacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HuellaImagen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True)),
+                ('phash', models.CharField(blank=True, db_index=True, max_length=16, null=True)),
+                ('origen', models.CharField(blank=True, max_length=500)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='huellas', to='productos.producto')),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0010_huellaimagen'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='producto_dest_nombre_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='producto_cat_orden_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='producto_precio_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='producto_orden_idx',
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['-destacado', 'nombre', 'id'], name='producto_dest_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['categoria', 'orden', '-destacado', 'nombre', 'id'], name='producto_cat_orden_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['precio', 'id'], name='producto_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['orden', 'id'], name='producto_orden_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.2 on 2026-10-18 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0012_indice_pendientes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=64, unique=True)),
+                ('version', models.PositiveBigIntegerField()),
+                ('contenido', models.BinaryField()),
+                ('gzip', models.BinaryField()),
+                ('brotli', models.BinaryField(null=True)),
+                ('manifiesto', models.JSONField()),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
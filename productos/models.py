@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 class Categoria(models.Model):
@@ -15,11 +16,14 @@ class Categoria(models.Model):
 
 class Producto(models.Model):
     categoria = models.ForeignKey(Categoria, related_name="productos", on_delete=models.CASCADE)
+    # Código del proveedor; clave de los importadores/exportadores
+    codigo = models.CharField(max_length=64, unique=True, null=True, blank=True)
     nombre = models.CharField(max_length=550)
     descripcion = models.TextField(blank=True)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=0)
     destacado = models.BooleanField(default=False)
+    orden = models.PositiveIntegerField(default=0)
 
     # URL directa de Cloudinary
     imagen = models.URLField(max_length=600, null=True, blank=True)
@@ -27,8 +31,106 @@ class Producto(models.Model):
     creado = models.DateTimeField(auto_now_add=True)
     actualizado = models.DateTimeField(auto_now=True)
 
+    # tsvector mantenido por trigger en Postgres (ver migración 0007).
+    # En SQLite queda vacío y se usa el índice en memoria de productos.busqueda.
+    busqueda = SearchVectorField(null=True, editable=False)
+
     class Meta:
         ordering = ["-destacado", "nombre"]
+        indexes = [
+            # Listado general (ordering por defecto + id para el cursor)
+            models.Index(
+                fields=["-destacado", "nombre", "id"],
+                name="producto_dest_nombre_idx",
+            ),
+            # Productos por categoría: filtro + orden completo
+            models.Index(
+                fields=["categoria", "orden", "-destacado", "nombre", "id"],
+                name="producto_cat_orden_idx",
+            ),
+            # Destacados más recientes
+            models.Index(
+                fields=["-actualizado"],
+                condition=models.Q(destacado=True),
+                name="producto_destacados_idx",
+            ),
+            # gestion: productos pendientes de precio (precio = 0 + orden por
+            # defecto). Completo y no parcial: el WHERE precio = %s
+            # parametrizado no calza con el predicado de un índice parcial.
+            models.Index(
+                fields=["precio", "-destacado", "nombre"],
+                name="producto_pendientes_idx",
+            ),
+            # Ordenamientos del OrderingFilter (id: desempate del keyset)
+            models.Index(fields=["precio", "id"], name="producto_precio_idx"),
+            models.Index(fields=["orden", "id"], name="producto_orden_idx"),
+        ]
+
+    def __str__(self):
+        return self.nombre
+
+
+class CatalogoVersion(models.Model):
+    """
+    Fila única con la versión global del catálogo.
+    Se incrementa cada vez que cambia un Producto o una Categoria
+    y forma parte de la clave del cache de respuestas públicas.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Catálogo v{self.version}"
+
+
+class FilaImportacion(models.Model):
+    """
+    Staging del importador en modo "todo o nada": las filas ya validadas
+    se vuelcan acá por bloques y después se aplican en una sola transacción.
+    """
+    lote = models.CharField(max_length=32)
+    fila = models.PositiveIntegerField()
+    datos = models.JSONField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["lote", "fila"], name="fila_importacion_lote_idx"),
+        ]
+
+
+class HuellaImagen(models.Model):
+    """
+    Huella de contenido de cada imagen ya ingresada (blake2b de los bytes,
+    y opcionalmente un dHash para casi-duplicados). La usan el generador,
+    import_master_pro y el syncer para no volver a subir lo mismo.
+    """
+    hash = models.CharField(max_length=64, unique=True)
+    phash = models.CharField(max_length=16, null=True, blank=True, db_index=True)
+    producto = models.ForeignKey(
+        Producto, on_delete=models.CASCADE, related_name="huellas",
+        null=True, blank=True,
+    )
+    origen = models.CharField(max_length=500, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.hash[:12]} → {self.producto_id}"
+
+
+class SnapshotCatalogo(models.Model):
+    """
+    Snapshot estático publicado (productos.snapshot), con sus variantes
+    precomprimidas. Lo arma el worker y lo sirve el proceso web, que no
+    comparten disco: el web lo baja a STATIC_ROOT/catalogo/ la primera vez
+    que alguien lo pide.
+    """
+    nombre = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField()
+    contenido = models.BinaryField()
+    gzip = models.BinaryField()
+    brotli = models.BinaryField(null=True)
+    manifiesto = models.JSONField()
+    creado = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return self.nombre
@@ -0,0 +1,207 @@
+import base64
+import binascii
+import hashlib
+import json
+from functools import partial
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import CACHE_ALIAS, version_catalogo
+
+
+# ============================================
+#   TOTAL CACHEADO POR VERSIÓN DEL CATÁLOGO
+# ============================================
+PARAMS_PAGINA = ("page", "cursor", "page_size", "paginacion", "total")
+
+
+def clave_total(request, version):
+    """Misma consulta sin parámetros de página → mismo total."""
+    params = sorted(
+        (k, v) for k, valores in request.query_params.lists()
+        if k not in PARAMS_PAGINA for v in valores
+    )
+    crudo = f"{request.path}?{urlencode(params)}"
+    digest = hashlib.md5(crudo.encode("utf-8")).hexdigest()
+    return f"catalogo:v{version}:total:{digest}"
+
+
+def total_cacheado(request, queryset):
+    cache = caches[CACHE_ALIAS]
+    clave = clave_total(request, version_catalogo(request))
+    total = cache.get(clave)
+    if total is None:
+        total = queryset.count()
+        cache.set(clave, total)
+    return total
+
+
+class PaginatorTotalCacheado(Paginator):
+    """Paginator de Django cuyo COUNT(*) sale del cache mientras no cambie el catálogo."""
+
+    def __init__(self, *args, request=None, **kwargs):
+        self.request = request
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        return total_cacheado(self.request, self.object_list)
+
+
+# ============================================
+#   KEYSET
+# ============================================
+# Prefijo con el que se seleccionan las anotaciones del orden que values()
+# dejó afuera (p. ej. "relevancia" de ?q=)
+PREFIJO_CLAVE = "_cursor_"
+
+
+def _valor(fila, campo):
+    if isinstance(fila, dict):
+        return fila[campo] if campo in fila else fila[PREFIJO_CLAVE + campo]
+    for parte in campo.split("__"):
+        fila = getattr(fila, parte)
+    return fila
+
+
+def orden_keyset(queryset):
+    """
+    Orden efectivo del queryset como [(campo, descendente)], siempre
+    terminando en id para que la clave sea única.
+    """
+    orden = list(queryset.query.order_by or queryset.model._meta.ordering)
+    campos = []
+    for campo in orden:
+        if not isinstance(campo, str):
+            raise ValueError("Orden no soportado por la paginación con cursor")
+        desc = campo.startswith("-")
+        nombre = campo.lstrip("-")
+        campos.append(("id" if nombre == "pk" else nombre, desc))
+    if "id" not in (c for c, _ in campos):
+        campos.append(("id", False))
+    return campos
+
+
+def filtro_keyset(campos, valores):
+    """
+    Filas estrictamente posteriores a `valores` según `campos`. Anidado como
+    a < va OR (a = va AND (b > vb OR (b = vb AND ...))) y con a <= va al
+    frente, para que el motor use el índice por la primera columna.
+    """
+    filtro = None
+    for (campo, desc), valor in reversed(list(zip(campos, valores))):
+        despues = Q(**{f"{campo}__{'lt' if desc else 'gt'}": valor})
+        filtro = despues if filtro is None else despues | (Q(**{campo: valor}) & filtro)
+
+    campo, desc = campos[0]
+    return Q(**{f"{campo}__{'lte' if desc else 'gte'}": valores[0]}) & filtro
+
+
+def codificar_cursor(campos, valores):
+    crudo = json.dumps(
+        {"o": [("-" if d else "") + c for c, d in campos], "v": valores},
+        default=str,
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor, campos):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        orden = [("-" if d else "") + c for c, d in campos]
+        if datos["o"] != orden or len(datos["v"]) != len(campos):
+            raise ValueError
+        return datos["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise NotFound("Cursor inválido.")
+
+
+class CatalogoPagination(PageNumberPagination):
+    """
+    - Por defecto: ?page=N como siempre, pero el COUNT(*) se cachea por
+      versión del catálogo.
+    - Con ?cursor=... o ?paginacion=cursor: keyset sobre el orden del
+      listado (+ id). Cada página es un WHERE sobre el índice, sin OFFSET
+      ni COUNT; el total solo se calcula con ?total=1 (y también se cachea).
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+
+    def modo_cursor(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get("paginacion") == "cursor"
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor = self.modo_cursor(request)
+
+        if not self.cursor:
+            self.django_paginator_class = partial(PaginatorTotalCacheado, request=request)
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        campos = orden_keyset(queryset)
+
+        # Filas de .values(): agregar las columnas del orden que falten.
+        # Una anotación que values() no seleccionó queda como alias y no se
+        # puede volver a pedir por nombre: va con F() bajo otro nombre
+        # (el ORDER BY y el WHERE siguen usando la anotación).
+        if getattr(queryset, "_fields", None):
+            faltan = [c for c, _ in campos if c not in queryset._fields]
+            if faltan:
+                anotaciones = queryset.query.annotations
+                queryset = queryset.values(
+                    *queryset._fields,
+                    *[c for c in faltan if c not in anotaciones],
+                    **{PREFIJO_CLAVE + c: F(c) for c in faltan if c in anotaciones},
+                )
+
+        self.total = None
+        if request.query_params.get("total") in ("1", "true"):
+            self.total = total_cacheado(request, queryset)
+
+        queryset = queryset.order_by(*[("-" if d else "") + c for c, d in campos])
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(filtro_keyset(campos, decodificar_cursor(cursor, campos)))
+
+        filas = list(queryset[:page_size + 1])
+        self.siguiente = None
+        if len(filas) > page_size:
+            filas = filas[:page_size]
+            self.siguiente = codificar_cursor(
+                campos, [_valor(filas[-1], c) for c, _ in campos]
+            )
+        return filas
+
+    def get_next_link(self):
+        if not self.cursor:
+            return super().get_next_link()
+        if self.siguiente is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, "paginacion")
+        return replace_query_param(url, self.cursor_query_param, self.siguiente)
+
+    def get_paginated_response(self, data):
+        if not self.cursor:
+            return super().get_paginated_response(data)
+
+        cuerpo = {"next": self.get_next_link(), "results": data}
+        if self.total is not None:
+            cuerpo = {"count": self.total, **cuerpo}
+        return Response(cuerpo)
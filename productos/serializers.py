@@ -1,46 +1,57 @@
+from decimal import Decimal
+from operator import itemgetter
+
 from rest_framework import serializers
-from django.conf import settings
+from .campos import CamposDinamicosMixin
 from .models import Categoria, Producto
-import re
-
-
-def clean_cloudinary_path(path: str) -> str:
-    if not path:
-        return ""
-
-    if path.startswith("http://") or path.startswith("https://"):
-        return path
-
-    path = path.strip().lstrip("/")
+from .imagenes import (  # noqa: F401 (compatibilidad)
+    build_cloudinary_final_url,
+    clean_cloudinary_path,
+    resolver_imagen,
+)
 
-    # Normalizaciones
-    path = re.sub(r"(image/upload/)+", "image/upload/", path)
-    path = path.replace("yoquet/", "")
-    path = path.replace("media/", "")
-    path = re.sub(r"^productos/", "", path)
+CENTAVOS = Decimal("0.01")
 
-    return path
 
-
-def build_cloudinary_final_url(path: str) -> str:
-    if not path:
+def formatear_precio(valor):
+    """Mismo formato que DecimalField(decimal_places=2) de DRF."""
+    if valor is None:
         return None
-
-    if "res.cloudinary.com" in path:
-        return path
-
-    cloud_name = settings.CLOUDINARY_STORAGE.get("CLOUD_NAME")
-
-    return f"https://res.cloudinary.com/{cloud_name}/image/upload/{path}"
+    return "{:f}".format(Decimal(valor).quantize(CENTAVOS))
 
 
 # =============================================
 #   SERIALIZA CATEGORÍAS
 # =============================================
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    # ?expand=productos: productos de la categoría (prefetch en la vista)
+    productos = serializers.SerializerMethodField()
+
     class Meta:
         model = Categoria
-        fields = ["id", "nombre", "descripcion"]
+        fields = ["id", "nombre", "descripcion", "productos"]
+
+    # campo de salida → columnas para .only()
+    COLUMNAS = {
+        "id": ("id",),
+        "nombre": ("nombre",),
+        "descripcion": ("descripcion",),
+        "productos": ("id",),
+    }
+    EXPANDIBLES = ("productos",)
+    SOLO_EXPANDIDO = ("productos",)
+
+    def get_productos(self, obj):
+        preset = self.context.get("imagen_preset")
+        return [
+            {
+                "id": p.id,
+                "nombre": p.nombre,
+                "precio": formatear_precio(p.precio),
+                "imagen": resolver_imagen(p.imagen, preset),
+            }
+            for p in obj.productos.all()
+        ]
 
 
 # =============================================
@@ -60,40 +71,98 @@ class ProductoListSerializer(serializers.ModelSerializer):
             "categoria_nombre",
         ]
 
+    # Columnas que usa la lectura rápida (sin instanciar modelos)
+    VALORES_RAPIDOS = ("id", "nombre", "precio", "imagen", "categoria__nombre")
+
+    # ?fields=: campo de salida → columnas de .values()
+    COLUMNAS = {
+        "id": ("id",),
+        "nombre": ("nombre",),
+        "precio": ("precio",),
+        "imagen": ("imagen",),
+        "categoria_nombre": ("categoria__nombre",),
+        "descripcion": ("descripcion",),
+        "destacado": ("destacado",),
+        "stock": ("stock",),
+        "categoria": ("categoria_id",),
+    }
+    CAMPOS_POR_DEFECTO = ("id", "nombre", "precio", "imagen", "categoria_nombre")
+
+    # ?expand=categoria: la categoría como objeto en vez del id
+    EXPANDIBLES = ("categoria",)
+    COLUMNAS_EXPANDIDAS = {
+        "categoria": ("categoria_id", "categoria__nombre", "categoria__descripcion"),
+    }
+
     def get_imagen(self, obj):
-        # Protección completa
-        try:
-            raw = getattr(obj, "imagen", None)
-        except Exception:
-            return None
-
-        if not raw:
-            return None
-
-        # Caso Cloudinary real
-        try:
-            url = raw.url
-            if url:
-                return url
-        except Exception:
-            pass
-
-        # Convertir a string
-        try:
-            raw = str(raw).strip()
-        except Exception:
-            return None
-
-        # Si ya es URL absoluta
-        if raw.startswith("http://") or raw.startswith("https://"):
-            return raw
-
-        # Limpiar y construir URL final
-        cleaned = clean_cloudinary_path(raw)
-        return build_cloudinary_final_url(cleaned)
-
-
-class ProductoDetailSerializer(serializers.ModelSerializer):
+        return resolver_imagen(
+            getattr(obj, "imagen", None),
+            self.context.get("imagen_preset"),
+        )
+
+    # ---------------------------------------------
+    #   MODO LECTURA RÁPIDA (solo listados)
+    # ---------------------------------------------
+    @classmethod
+    def campos_efectivos(cls, campos=None, expandir=()):
+        """Sin ?fields= salen los de siempre más lo pedido en ?expand=."""
+        if campos is not None:
+            return list(campos)
+        return list(cls.CAMPOS_POR_DEFECTO) + [
+            c for c in cls.EXPANDIBLES if c in expandir
+        ]
+
+    @classmethod
+    def columnas(cls, campos=None, expandir=()):
+        columnas = []
+        for campo in cls.campos_efectivos(campos, expandir):
+            if campo in expandir and campo in cls.COLUMNAS_EXPANDIDAS:
+                columnas.extend(cls.COLUMNAS_EXPANDIDAS[campo])
+            else:
+                columnas.extend(cls.COLUMNAS[campo])
+        return tuple(dict.fromkeys(columnas))
+
+    @classmethod
+    def valores(cls, queryset, campos=None, expandir=()):
+        """
+        Queryset de dicts con lo justo para la lista (JOIN a categoría en SQL
+        solo si se pide algún campo de la categoría).
+        """
+        return queryset.values(*cls.columnas(campos, expandir))
+
+    @classmethod
+    def serializar_rapido(cls, filas, context=None):
+        """
+        Devuelve el mismo JSON que el serializer pero a partir de los dicts
+        de valores(), sin campos enlazados ni SerializerMethodField por fila.
+        """
+        context = context or {}
+        preset = context.get("imagen_preset")
+        expandir = context.get("expandir") or ()
+
+        if "categoria" in expandir:
+            categoria = lambda f: {  # noqa: E731
+                "id": f["categoria_id"],
+                "nombre": f["categoria__nombre"],
+                "descripcion": f["categoria__descripcion"],
+            }
+        else:
+            categoria = itemgetter("categoria_id")
+
+        render = {
+            "precio": lambda f: formatear_precio(f["precio"]),
+            "imagen": lambda f: resolver_imagen(f["imagen"], preset),
+            "categoria_nombre": itemgetter("categoria__nombre"),
+            "categoria": categoria,
+        }
+        pares = [
+            (campo, render.get(campo) or itemgetter(campo))
+            for campo in cls.campos_efectivos(context.get("campos"), expandir)
+        ]
+        return [{campo: valor(fila) for campo, valor in pares} for fila in filas]
+
+
+class ProductoDetailSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     categoria = CategoriaSerializer(read_only=True)
 
     categoria_id = serializers.PrimaryKeyRelatedField(
@@ -124,34 +193,23 @@ class ProductoDetailSerializer(serializers.ModelSerializer):
             "categoria_nombre",
         ]
 
+    # ?fields=: campo de salida → columnas para .only()
+    COLUMNAS = {
+        "id": ("id",),
+        "nombre": ("nombre",),
+        "descripcion": ("descripcion",),
+        "precio": ("precio",),
+        "stock": ("stock",),
+        "destacado": ("destacado",),
+        "imagen": ("imagen",),
+        "categoria": ("categoria", "categoria__id", "categoria__nombre", "categoria__descripcion"),
+        "categoria_nombre": ("categoria", "categoria__nombre"),
+    }
+    # En el detalle la categoría ya viene expandida
+    EXPANDIBLES = ("categoria",)
+
     def get_imagen(self, obj):
-        # Protección completa
-        try:
-            raw = getattr(obj, "imagen", None)
-        except Exception:
-            return None
-
-        if not raw:
-            return None
-
-        # Caso Cloudinary real
-        try:
-            url = raw.url
-            if url:
-                return url
-        except Exception:
-            pass
-
-        # Convertir a string
-        try:
-            raw = str(raw).strip()
-        except Exception:
-            return None
-
-        # Si ya es URL absoluta
-        if raw.startswith("http://") or raw.startswith("https://"):
-            return raw
-
-        # Limpiar y construir URL final
-        cleaned = clean_cloudinary_path(raw)
-        return build_cloudinary_final_url(cleaned)
+        return resolver_imagen(
+            getattr(obj, "imagen", None),
+            self.context.get("imagen_preset"),
+        )
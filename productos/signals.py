@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidar_catalogo
+from .models import Categoria, Producto
+
+
+# Admin, gestion.views.UpdateLote y los importadores pasan por save()/delete(),
+# así que con estas señales alcanza para mantener la versión al día.
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def catalogo_modificado(sender, using=None, **kwargs):
+    invalidar_catalogo(using=using)
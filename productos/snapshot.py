@@ -0,0 +1,212 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import estado_catalogo, version_catalogo
+from .models import Categoria, Producto, SnapshotCatalogo
+from .serializers import ProductoListSerializer
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se publica .gz
+    brotli = None
+
+
+# ============================================
+#   SNAPSHOT ESTÁTICO DEL CATÁLOGO
+# ============================================
+# Lo arma el worker (trabajo "publicar_snapshot") y lo guarda en
+# SnapshotCatalogo. El proceso web lo baja a STATIC_ROOT/catalogo/ cuando
+# se pide y WhiteNoise (backend.middleware.CatalogoWhiteNoiseMiddleware)
+# lo sirve con cache "para siempre": el nombre lleva versión + hash del
+# contenido, así que nunca cambia.
+CARPETA = "catalogo"
+NOMBRE_SNAPSHOT = re.compile(r"catalogo-v\d+-[0-9a-f]{12}\.json")
+
+# Snapshots anteriores que se conservan (clientes con el manifiesto viejo)
+CONSERVAR = 3
+
+CAMPOS_PRODUCTO = (
+    "id", "nombre", "precio", "imagen", "categoria", "categoria_nombre",
+    "descripcion", "destacado",
+)
+
+BLOBS = ("contenido", "gzip", "brotli")
+
+def carpeta_snapshots():
+    return os.path.join(settings.STATIC_ROOT, CARPETA)
+
+
+def url_snapshot(nombre):
+    return f"{settings.STATIC_URL}{CARPETA}/{nombre}"
+
+
+def _escribir(ruta, contenido):
+    """Escritura atómica: WhiteNoise nunca ve un archivo a medias."""
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(contenido)
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def leer_manifiesto():
+    """Manifiesto del último snapshot publicado, o None."""
+    ultimo = SnapshotCatalogo.objects.defer(*BLOBS).order_by("-id").first()
+    return ultimo.manifiesto if ultimo else None
+
+
+# ============================================
+#   ARMADO
+# ============================================
+def construir_datos():
+    """Catálogo público completo: mismas URLs de imagen que los listados."""
+    estado = estado_catalogo()
+
+    categorias = list(
+        Categoria.objects.order_by("nombre").values("id", "nombre", "descripcion")
+    )
+    filas = ProductoListSerializer.valores(
+        Producto.objects.order_by("orden", "-destacado", "nombre", "id"),
+        CAMPOS_PRODUCTO,
+    )
+    productos = ProductoListSerializer.serializar_rapido(
+        filas.iterator(chunk_size=2000),
+        {"campos": CAMPOS_PRODUCTO, "imagen_preset": "card"},
+    )
+
+    return {
+        "version": estado["version"],
+        "actualizado": estado["actualizado"],
+        "generado": timezone.now(),
+        "categorias": categorias,
+        "productos": productos,
+    }
+
+
+def publicar_snapshot(forzar=False):
+    """
+    Arma catalogo-v<version>-<hash>.json (+ .gz y .br precomprimidos) y lo
+    guarda en SnapshotCatalogo junto con su manifiesto. Si el último ya
+    está en la versión actual no hace nada (salvo forzar=True).
+    """
+    manifiesto = leer_manifiesto()
+    if not forzar and manifiesto and manifiesto.get("version") == version_catalogo():
+        return {**manifiesto, "omitido": True}
+
+    datos = construir_datos()
+    cuerpo = json.dumps(
+        datos, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+    digest = hashlib.blake2b(cuerpo, digest_size=6).hexdigest()
+    nombre = f"catalogo-v{datos['version']}-{digest}.json"
+
+    variantes = {"gzip": gzip.compress(cuerpo, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variantes["brotli"] = brotli.compress(cuerpo, quality=11)
+
+    manifiesto = {
+        "version": datos["version"],
+        "archivo": nombre,
+        "url": url_snapshot(nombre),
+        "generado": datos["generado"].isoformat(),
+        "categorias": len(datos["categorias"]),
+        "productos": len(datos["productos"]),
+        "bytes": {
+            "json": len(cuerpo),
+            **{("br" if k == "brotli" else k): len(v) for k, v in variantes.items()},
+        },
+    }
+    # Mismo contenido (forzar sin cambios): se reemplaza la fila
+    SnapshotCatalogo.objects.update_or_create(
+        nombre=nombre,
+        defaults={
+            "version": datos["version"],
+            "contenido": cuerpo,
+            "manifiesto": manifiesto,
+            **variantes,
+        },
+    )
+
+    viejos = SnapshotCatalogo.objects.order_by("-id").values_list("id", flat=True)[CONSERVAR:]
+    manifiesto["borrados"] = SnapshotCatalogo.objects.filter(id__in=list(viejos)).delete()[0]
+    return manifiesto
+
+
+# ============================================
+#   PUBLICACIÓN AL CAMBIAR EL CATÁLOGO
+# ============================================
+def programar_publicacion():
+    """
+    Encola el trabajo "publicar_snapshot" si no hay uno pendiente. Lo llama
+    productos.cache al subir la versión: una importación que confirma mil
+    bloques deja un solo trabajo esperando, no mil.
+    """
+    if not getattr(settings, "CATALOGO_SNAPSHOT_AUTOMATICO", False):
+        return None
+
+    from gestion.models import Trabajo
+    from gestion.trabajos import encolar
+
+    if Trabajo.objects.filter(tipo="publicar_snapshot", estado=Trabajo.PENDIENTE).exists():
+        return None
+    return encolar("publicar_snapshot")
+
+
+# ============================================
+#   COPIA LOCAL (proceso web)
+# ============================================
+def _limpiar(actual):
+    """Borra del disco los snapshots más viejos (y sus .gz/.br) dejando CONSERVAR."""
+    carpeta = carpeta_snapshots()
+    snapshots = sorted(
+        (e for e in os.scandir(carpeta) if NOMBRE_SNAPSHOT.fullmatch(e.name)),
+        key=lambda e: e.stat().st_mtime,
+        reverse=True,
+    )
+    borrados = 0
+    for entrada in snapshots[CONSERVAR:]:
+        if entrada.name == actual:
+            continue
+        for sufijo in ("", ".gz", ".br"):
+            try:
+                os.remove(entrada.path + sufijo)
+            except FileNotFoundError:
+                pass
+        borrados += 1
+    return borrados
+
+
+def materializar(nombre):
+    """
+    Escribe en STATIC_ROOT/catalogo/ el snapshot `nombre` desde la base.
+    Devuelve la ruta del .json, o None si no existe (o ya se borró).
+    """
+    snapshot = SnapshotCatalogo.objects.filter(nombre=nombre).first()
+    if snapshot is None:
+        return None
+
+    carpeta = carpeta_snapshots()
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, nombre)
+
+    # Primero las variantes comprimidas: cuando aparece el .json ya están
+    _escribir(ruta + ".gz", bytes(snapshot.gzip))
+    if snapshot.brotli is not None:
+        _escribir(ruta + ".br", bytes(snapshot.brotli))
+    _escribir(ruta, bytes(snapshot.contenido))
+
+    _limpiar(nombre)
+    return ruta
@@ -0,0 +1,267 @@
+import os
+import tempfile
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from productos.management.commands.verificar_indices import Command as VerificarIndices
+from productos.management.commands.verificar_indices import plan_sin_indice
+from gestion.models import Trabajo
+from gestion.trabajos import ejecutar, tomar_trabajo
+from productos.cache import CACHE_ALIAS, VERSION_PK
+from productos.models import Categoria, CatalogoVersion, Producto, SnapshotCatalogo
+from productos.snapshot import CONSERVAR, carpeta_snapshots, publicar_snapshot
+from productos.utils.importer_pro import ImportadorMasterPro
+
+
+class IndicesCatalogoTests(TestCase):
+    """
+    Las consultas de verificar_indices usan índice (sin scan completo ni
+    orden en memoria), en SQLite y en Postgres.
+    """
+
+    def test_consultas_del_catalogo_usan_indices(self):
+        vendor = connection.vendor
+        if vendor not in ("sqlite", "postgresql"):
+            self.skipTest(f"Motor sin chequeo de EXPLAIN: {vendor}")
+
+        if vendor == "postgresql":
+            with connection.cursor() as cursor:
+                # Con la tabla vacía el planner preferiría Seq Scan igual;
+                # LOCAL: vuelve a la normalidad al terminar la transacción del test
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+        for nombre, qs in VerificarIndices().consultas().items():
+            with self.subTest(consulta=nombre):
+                plan = qs.explain()
+                self.assertEqual(plan_sin_indice(vendor, plan), [], plan)
+
+
+class ImportadorTests(TestCase):
+    """Logs y checkpoints del importador van a un BASE_DIR temporal."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        ajustes = override_settings(BASE_DIR=self.dir, MEDIA_ROOT=self.dir)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def csv(self, contenido, nombre="catalogo.csv"):
+        ruta = os.path.join(self.dir, nombre)
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(contenido)
+        return ruta
+
+    def destacados(self):
+        return dict(Producto.objects.values_list("codigo", "destacado"))
+
+    # Con una celda vacía pandas lee la columna como float: 1 → 1.0
+    CSV_DESTACADO = (
+        "codigo,nombre,precio,categoria,destacado\n"
+        "1001,Aro uno,100,Aros,1\n"
+        "1002,Aro dos,100,Aros,\n"
+        "1003,Aro tres,100,Aros,0\n"
+    )
+
+    def test_destacado_numerico_en_bulk(self):
+        res = ImportadorMasterPro(self.csv(self.CSV_DESTACADO)).cargar()
+
+        self.assertEqual(res["creados"], 3)
+        self.assertEqual(self.destacados(), {"1001": True, "1002": False, "1003": False})
+
+    def test_destacado_numerico_en_streaming(self):
+        ruta = self.csv(self.CSV_DESTACADO)
+        ImportadorMasterPro(ruta).cargar_streaming(filas_por_bloque=2)
+
+        self.assertEqual(self.destacados(), {"1001": True, "1002": False, "1003": False})
+
+    def test_destacado_numerico_fila_por_fila(self):
+        ImportadorMasterPro(self.csv(self.CSV_DESTACADO), bulk=False).cargar()
+
+        self.assertEqual(self.destacados(), {"1001": True, "1002": False, "1003": False})
+
+    def test_simular_reporta_diferencias_sin_escribir(self):
+        ImportadorMasterPro(self.csv(self.CSV_DESTACADO)).cargar()
+        ruta = self.csv(
+            "codigo,nombre,precio,categoria,destacado\n"
+            "1001,Aro uno,100,Aros,1\n"
+            "1002,Aro dos,150.5,Aros,1\n"
+            "1003,Aro tres,100,Aros,0\n"
+            "1004,Aro nuevo,80,Aros,0\n",
+            "cambios.csv",
+        )
+
+        reporte = ImportadorMasterPro(ruta).simular()
+
+        self.assertEqual(reporte["crear"], ["1004"])
+        self.assertEqual(reporte["actualizar"], [{
+            "codigo": "1002",
+            "cambios": {"precio": ["100.00", "150.50"], "destacado": [False, True]},
+        }])
+        self.assertEqual(reporte["sin_cambios"], 2)
+        self.assertEqual(Producto.objects.count(), 3)
+        self.assertFalse(Producto.objects.get(codigo="1002").destacado)
+
+    def test_reimportar_sin_cambios_no_escribe(self):
+        ruta = self.csv(self.CSV_DESTACADO)
+        for bulk in (True, False):
+            with self.subTest(bulk=bulk):
+                ImportadorMasterPro(ruta).cargar()
+                antes = dict(Producto.objects.values_list("codigo", "actualizado"))
+
+                res = ImportadorMasterPro(ruta, bulk=bulk).cargar()
+
+                self.assertEqual(res, {
+                    "creados": 0, "actualizados": 0, "sin_cambios": 3, "errores": 0,
+                })
+                self.assertEqual(
+                    dict(Producto.objects.values_list("codigo", "actualizado")), antes
+                )
+
+
+class PaginacionCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        aros = Categoria.objects.create(nombre="Aros")
+        collares = Categoria.objects.create(nombre="Collares")
+        productos = []
+        for i in range(30):
+            # Empates a propósito en orden, nombre y relevancia
+            nombre = ["Aro dorado", "Aro plateado", "Collar con aro", "Collar"][i % 4]
+            productos.append(Producto(
+                categoria=aros if i % 2 else collares,
+                nombre=nombre,
+                precio=Decimal(100 + i % 3),
+                orden=i % 5,
+                descripcion="con aro" if i % 3 == 0 else "",
+            ))
+        Producto.objects.bulk_create(productos)
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.client = APIClient()
+
+    def por_numero(self, params):
+        res = self.client.get("/api/productos/", {**params, "page_size": 100})
+        self.assertEqual(res.status_code, 200)
+        return [p["id"] for p in res.data["results"]]
+
+    def recorrer(self, params, page_size=4):
+        ids = []
+        res = self.client.get(
+            "/api/productos/", {**params, "paginacion": "cursor", "page_size": page_size}
+        )
+        while True:
+            self.assertEqual(res.status_code, 200, res.content)
+            ids.extend(p["id"] for p in res.data["results"])
+            if res.data["next"] is None:
+                return ids
+            res = self.client.get(res.data["next"])
+
+    def test_recorre_todas_las_paginas(self):
+        casos = [
+            {},
+            {"ordering": "-precio"},
+            {"q": "aro"},
+            {"q": "collar"},
+            {"q": "aro", "ordering": "nombre"},
+        ]
+        for params in casos:
+            with self.subTest(**params):
+                # Una sola página con cursor: mismo orden (+ id) sin cortes
+                esperado = self.recorrer(params, page_size=100)
+                self.assertTrue(esperado)
+
+                ids = self.recorrer(params)
+
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(ids, esperado)
+                if "ordering" in params or "q" not in params:
+                    self.assertEqual(set(ids), set(self.por_numero(params)))
+                else:
+                    # Relevancia y pk: el orden ya es total en los dos modos
+                    self.assertEqual(ids, self.por_numero(params))
+
+
+@override_settings(CATALOGO_SNAPSHOT_AUTOMATICO=True)
+class SnapshotCatalogoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Aros")
+        Producto.objects.create(categoria=categoria, nombre="Aro dorado", precio=Decimal("100.00"))
+        CatalogoVersion.objects.create(pk=VERSION_PK, version=1)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        ajustes = override_settings(STATIC_ROOT=tmp.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def subir_version(self):
+        CatalogoVersion.objects.filter(pk=VERSION_PK).update(version=F("version") + 1)
+
+    def test_publicar_guarda_en_la_base_y_omite_si_esta_al_dia(self):
+        manifiesto = publicar_snapshot()
+
+        self.assertEqual(manifiesto["version"], 1)
+        self.assertEqual(manifiesto["productos"], 1)
+        self.assertTrue(manifiesto["url"].endswith(manifiesto["archivo"]))
+        snapshot = SnapshotCatalogo.objects.get()
+        self.assertEqual(len(snapshot.contenido), manifiesto["bytes"]["json"])
+        self.assertTrue(publicar_snapshot()["omitido"])
+
+    def test_conserva_los_ultimos(self):
+        for _ in range(CONSERVAR + 2):
+            publicar_snapshot()
+            self.subir_version()
+
+        self.assertEqual(SnapshotCatalogo.objects.count(), CONSERVAR)
+
+    def test_cambios_del_catalogo_encolan_un_solo_trabajo(self):
+        producto = Producto.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.save()
+
+        self.assertEqual(Trabajo.objects.filter(tipo="publicar_snapshot").count(), 1)
+
+        # El worker lo publica y el manifiesto queda vigente
+        ejecutar(tomar_trabajo())
+        res = self.client.get("/api/catalogo/snapshot/")
+        self.assertTrue(res.data["vigente"])
+        self.assertEqual(res.data["url"], SnapshotCatalogo.objects.get().manifiesto["url"])
+
+    @override_settings(CATALOGO_SNAPSHOT_AUTOMATICO=False)
+    def test_sin_publicacion_automatica_no_encola(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Producto.objects.get().save()
+
+        self.assertFalse(Trabajo.objects.exists())
+
+    def test_el_proceso_web_lo_baja_de_la_base_y_lo_sirve_inmutable(self):
+        manifiesto = publicar_snapshot()
+        ruta = os.path.join(carpeta_snapshots(), manifiesto["archivo"])
+        self.assertFalse(os.path.exists(ruta))
+
+        res = self.client.get(manifiesto["url"], HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertIn("immutable", res["Cache-Control"])
+        self.assertTrue(os.path.exists(ruta))
+        self.assertTrue(os.path.exists(ruta + ".gz"))
+
+    def test_snapshot_inexistente_404(self):
+        res = self.client.get("/static/catalogo/catalogo-v9-000000000000.json")
+
+        self.assertEqual(res.status_code, 404)
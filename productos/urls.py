@@ -3,9 +3,11 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     CategoriaViewSet,
+    ExportarCatalogoView,
     ProductoViewSet,
     ProductosDestacadosView,
     ProductosPorCategoriaView,
+    SnapshotCatalogoView,
 )
 
 router = DefaultRouter()
@@ -17,6 +19,12 @@ urlpatterns = [
     path('productos/destacados/', ProductosDestacadosView.as_view(),
          name='productos_destacados'),
 
+    path('productos/exportar/', ExportarCatalogoView.as_view(),
+         name='productos_exportar'),
+
+    path('catalogo/snapshot/', SnapshotCatalogoView.as_view(),
+         name='catalogo_snapshot'),
+
     path('productos/por-categoria/<int:categoria_id>/',
          ProductosPorCategoriaView.as_view(),
          name='productos_por_categoria'),
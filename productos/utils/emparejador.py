@@ -0,0 +1,142 @@
+import bisect
+import os
+import re
+import unicodedata
+from collections import defaultdict
+
+
+# Códigos más cortos que esto no se buscan por prefijo/subcadena
+MIN_LARGO_DIFUSO = 3
+
+_RE_NO_ALFANUM = re.compile(r"[^a-z0-9]")
+
+# Orden de confianza de cada tipo de coincidencia
+EXACTA, PREFIJO, CONTIENE = "exacta", "prefijo", "contiene"
+NIVELES = (EXACTA, PREFIJO, CONTIENE)
+
+
+def normalizar_codigo(texto, archivo=False):
+    """
+    'ABC-123_Frente.JPG' → 'abc123frente'. Sin acentos, solo letras y
+    números en minúscula; con archivo=True se descarta la extensión.
+    """
+    if archivo:
+        texto = os.path.splitext(texto or "")[0]
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _RE_NO_ALFANUM.sub("", texto.lower())
+
+
+def trigramas(texto):
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class Emparejador:
+    """
+    Índice en memoria código de producto → ids, armado una sola vez.
+    No toca la base: recibe pares (id, codigo) y empareja nombres de archivo.
+
+    Niveles, del más confiable al menos:
+    - exacta:   el nombre normalizado es el código
+    - prefijo:  el nombre empieza con un código ('abc123-2.jpg') o el
+                código empieza con el nombre
+    - contiene: el nombre aparece dentro de un código (índice de trigramas)
+    """
+
+    def __init__(self, productos):
+        self.exactos = defaultdict(list)
+        for pk, codigo in productos:
+            clave = normalizar_codigo(codigo)
+            if clave:
+                self.exactos[clave].append(pk)
+
+        self.codigos = sorted(self.exactos)
+        self.por_trigrama = defaultdict(set)
+        for codigo in self.codigos:
+            for t in trigramas(codigo):
+                self.por_trigrama[t].add(codigo)
+
+    # =====================================================
+    #   BÚSQUEDAS
+    # =====================================================
+    def _ids(self, codigos):
+        ids = []
+        for codigo in codigos:
+            ids.extend(self.exactos[codigo])
+        return sorted(set(ids))
+
+    def _prefijo(self, clave):
+        # El código más largo que es prefijo del nombre
+        for largo in range(len(clave) - 1, MIN_LARGO_DIFUSO - 1, -1):
+            if clave[:largo] in self.exactos:
+                return [clave[:largo]]
+
+        # Códigos que empiezan con el nombre (rango contiguo en la lista ordenada)
+        inicio = bisect.bisect_left(self.codigos, clave)
+        fin = bisect.bisect_left(self.codigos, clave + "\uffff")
+        return self.codigos[inicio:fin]
+
+    def _contiene(self, clave):
+        grupos = [self.por_trigrama.get(t) for t in trigramas(clave)]
+        if not grupos or not all(grupos):
+            return []
+        candidatos = set.intersection(*sorted(grupos, key=len))
+        return sorted(c for c in candidatos if clave in c)
+
+    def emparejar(self, archivo):
+        """(nivel, [ids]) con el primer nivel que tenga candidatos, o (None, [])."""
+        clave = normalizar_codigo(archivo, archivo=True)
+        if not clave:
+            return None, []
+
+        if clave in self.exactos:
+            return EXACTA, self._ids([clave])
+
+        if len(clave) < MIN_LARGO_DIFUSO:
+            return None, []
+
+        for nivel, buscar in ((PREFIJO, self._prefijo), (CONTIENE, self._contiene)):
+            codigos = buscar(clave)
+            if codigos:
+                return nivel, self._ids(codigos)
+
+        return None, []
+
+    def emparejar_todos(self, archivos):
+        """
+        Empareja una lista de archivos. Un producto recibe como mucho un
+        archivo: ganan las coincidencias más confiables y, a igual nivel,
+        el primer archivo en orden alfabético.
+
+        Devuelve {"asignaciones": {id: archivo}, "ambiguas": [...],
+        "sin_producto": [...], "repetidas": [...]}.
+        """
+        encontrados = []
+        resultado = {
+            "asignaciones": {},
+            "ambiguas": [],
+            "sin_producto": [],
+            "repetidas": [],
+        }
+
+        for archivo in sorted(archivos):
+            nivel, ids = self.emparejar(archivo)
+            if not ids:
+                resultado["sin_producto"].append(archivo)
+            elif len(ids) > 1:
+                resultado["ambiguas"].append(
+                    {"archivo": archivo, "nivel": nivel, "productos": ids}
+                )
+            else:
+                encontrados.append((NIVELES.index(nivel), archivo, ids[0]))
+
+        for _, archivo, pk in sorted(encontrados):
+            if pk in resultado["asignaciones"]:
+                resultado["repetidas"].append(
+                    {"archivo": archivo, "producto": pk,
+                     "asignado": resultado["asignaciones"][pk]}
+                )
+                continue
+            resultado["asignaciones"][pk] = archivo
+
+        return resultado
@@ -1,20 +1,79 @@
+import csv
 import json
 import os
+import time
 import logging
 from logging.handlers import RotatingFileHandler
-import pandas as pd
+from productos.imagenes import resolver_imagen
 from productos.models import Producto
 from django.conf import settings
 
 
+COLUMNAS = ["codigo", "nombre", "categoria", "precio", "destacado", "imagen"]
+
+EXTENSIONES = {
+    "json": "json",
+    "jsonl": "jsonl",
+    "csv": "csv",
+    "xlsx": "xlsx",
+    "parquet": "parquet",
+}
+
+
+# =====================================================
+#   SERIALIZACIÓN INCREMENTAL (texto)
+# =====================================================
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve lo escrito en vez de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+def partes_json(filas):
+    """Array JSON, un producto por línea, sin armar la lista en memoria."""
+    yield "["
+    primero = True
+    for fila in filas:
+        yield ("\n  " if primero else ",\n  ") + json.dumps(fila, ensure_ascii=False)
+        primero = False
+    yield "\n]\n"
+
+
+def partes_jsonl(filas):
+    for fila in filas:
+        yield json.dumps(fila, ensure_ascii=False) + "\n"
+
+
+def partes_csv(filas):
+    writer = csv.writer(_Eco())
+    yield writer.writerow(COLUMNAS)
+    for fila in filas:
+        yield writer.writerow([fila[c] for c in COLUMNAS])
+
+
+PARTES_TEXTO = {
+    "json": partes_json,
+    "jsonl": partes_jsonl,
+    "csv": partes_csv,
+}
+
+
 class ExportadorMasterPro:
-    def __init__(self):
+    def __init__(self, chunk_size=2000):
+        self.chunk_size = chunk_size
         self._configurar_logs()
 
     def _configurar_logs(self):
         log_dir = os.path.join(settings.BASE_DIR, "logs")
         os.makedirs(log_dir, exist_ok=True)
 
+        self.logger = logging.getLogger("exportador_master_pro")
+        self.logger.setLevel(logging.INFO)
+
+        if self.logger.handlers:
+            return
+
         handler = RotatingFileHandler(
             os.path.join(log_dir, "exportador.log"),
             maxBytes=1024 * 512,
@@ -26,40 +85,131 @@ class ExportadorMasterPro:
         )
 
         handler.setFormatter(formatter)
-
-        self.logger = logging.getLogger("exportador_master_pro")
-        self.logger.setLevel(logging.INFO)
         self.logger.addHandler(handler)
 
-    def exportar(self, json_path="catalogo.json", excel_path="catalogo.xlsx"):
-        productos = Producto.objects.all().order_by(
-            "-destacado",
-            "categoria__nombre",
-            "nombre"
+    # =====================================================
+    #   LECTURA
+    # =====================================================
+    def filas(self):
+        """
+        Productos como dicts, leídos por bloques (cursor del lado del
+        servidor en Postgres) con el nombre de categoría resuelto en SQL.
+        """
+        qs = (
+            Producto.objects.order_by("-destacado", "categoria__nombre", "nombre")
+            .values_list(
+                "codigo",
+                "nombre",
+                "categoria__nombre",
+                "precio",
+                "destacado",
+                "imagen",
+            )
         )
 
-        data = []
+        for codigo, nombre, categoria, precio, destacado, imagen in qs.iterator(
+            chunk_size=self.chunk_size
+        ):
+            yield {
+                "codigo": codigo,
+                "nombre": nombre,
+                "categoria": categoria,
+                "precio": float(precio),
+                "destacado": destacado,
+                "imagen": resolver_imagen(imagen),
+            }
+
+    # =====================================================
+    #   ESCRITURA
+    # =====================================================
+    def _escribir_texto(self, filas, ruta, formato):
+        with open(ruta, "w", encoding="utf-8", newline="") as f:
+            for parte in PARTES_TEXTO[formato](filas):
+                f.write(parte)
+
+    def _escribir_xlsx(self, filas, ruta):
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("catalogo")
+        ws.append(COLUMNAS)
+        for fila in filas:
+            ws.append([fila[c] for c in COLUMNAS])
+        wb.save(ruta)
 
-        for p in productos:
-            data.append({
-                "codigo": p.codigo,
-                "nombre": p.nombre,
-                "categoria": p.categoria.nombre,
-                "precio": float(p.precio),
-                "destacado": p.destacado,
-                "imagen": p.imagen.url if p.imagen else None,
-            })
+    def _escribir_parquet(self, filas, ruta):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Para exportar a Parquet hace falta instalar pyarrow.")
 
-        # JSON
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        esquema = pa.schema([
+            ("codigo", pa.string()),
+            ("nombre", pa.string()),
+            ("categoria", pa.string()),
+            ("precio", pa.float64()),
+            ("destacado", pa.bool_()),
+            ("imagen", pa.string()),
+        ])
 
-        # Excel
-        df = pd.DataFrame(data)
-        df.to_excel(excel_path, index=False)
+        with pq.ParquetWriter(ruta, esquema) as writer:
+            bloque = []
+            for fila in filas:
+                bloque.append(fila)
+                if len(bloque) == self.chunk_size:
+                    writer.write_table(pa.Table.from_pylist(bloque, schema=esquema))
+                    bloque = []
+            if bloque:
+                writer.write_table(pa.Table.from_pylist(bloque, schema=esquema))
+
+    def exportar_formato(self, ruta, formato):
+        """Exporta a un formato con memoria constante. Devuelve estadísticas."""
+        if formato not in EXTENSIONES:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+        contador = {"filas": 0}
+
+        def contar(filas):
+            for fila in filas:
+                contador["filas"] += 1
+                yield fila
+
+        inicio = time.perf_counter()
+        filas = contar(self.filas())
+
+        if formato in PARTES_TEXTO:
+            self._escribir_texto(filas, ruta, formato)
+        elif formato == "xlsx":
+            self._escribir_xlsx(filas, ruta)
+        else:
+            self._escribir_parquet(filas, ruta)
+
+        segundos = time.perf_counter() - inicio
+        stats = {
+            "ruta": ruta,
+            "formato": formato,
+            "filas": contador["filas"],
+            "segundos": round(segundos, 3),
+            "filas_por_segundo": round(contador["filas"] / segundos) if segundos else None,
+        }
+        self.logger.info(f"Exportación {formato} → {ruta} — {stats}")
+        return stats
+
+    def exportar(self, json_path="catalogo.json", excel_path="catalogo.xlsx"):
+        json_stats = self.exportar_formato(json_path, "json")
+        excel_stats = self.exportar_formato(excel_path, "xlsx")
 
         self.logger.info(
             f"Exportación completa → JSON: {json_path} — XLSX: {excel_path}"
         )
 
-        return {"json": json_path, "excel": excel_path}
+        return {
+            "json": json_path,
+            "excel": excel_path,
+            "filas": json_stats["filas"],
+            "filas_por_segundo": {
+                "json": json_stats["filas_por_segundo"],
+                "excel": excel_stats["filas_por_segundo"],
+            },
+        }
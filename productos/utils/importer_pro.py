@@ -1,10 +1,52 @@
+import json
+import numbers
 import os
+import uuid
+from decimal import Decimal
+
 import pandas as pd
 import logging
 from logging.handlers import RotatingFileHandler
 from django.conf import settings
 from django.db import transaction
-from productos.models import Categoria, Producto
+from django.utils import timezone
+from productos.cache import invalidar_catalogo
+from productos.models import Categoria, FilaImportacion, Producto
+
+
+VALORES_VERDADEROS = {"1", "true", "verdadero", "si", "sí", "x", "yes", "y"}
+
+# Campos que escribe el importador (además de categoria_id)
+CAMPOS_PRODUCTO = ["nombre", "precio", "descripcion", "destacado", "imagen"]
+
+
+def codigo_texto(valor):
+    """Código leído de XLSX como texto (1001.0 → "1001")."""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def es_verdadero(valor):
+    """
+    "destacado" de una celda. Una columna con vacíos llega como float
+    (1 → 1.0, "1" → "1.0"), así que los números cuentan como verdaderos
+    si no son cero, vengan como número o como texto.
+    """
+    if valor is None:
+        return False
+    if isinstance(valor, numbers.Number):
+        return not pd.isna(valor) and valor != 0
+    texto = str(valor).strip().lower()
+    if texto in VALORES_VERDADEROS:
+        return True
+    try:
+        numero = float(texto)
+    except ValueError:
+        return False
+    return not pd.isna(numero) and numero != 0
 
 
 class ImportadorMasterPro:
@@ -16,10 +58,14 @@ class ImportadorMasterPro:
     - Soporte para Cloudinary (URL)
     - Soporte para media local
     - Control de duplicados
+    - Modo bulk (por defecto): validación vectorizada en pandas y
+      bulk_create / bulk_update en bloques de `chunk_size`
     """
 
-    def __init__(self, archivo):
+    def __init__(self, archivo, bulk=True, chunk_size=1000):
         self.archivo = archivo
+        self.bulk = bulk
+        self.chunk_size = chunk_size
         self._configurar_logs()
 
     def _configurar_logs(self):
@@ -31,6 +77,9 @@ class ImportadorMasterPro:
         self.logger = logging.getLogger("importador_master_pro")
         self.logger.setLevel(logging.INFO)
 
+        if self.logger.handlers:
+            return
+
         handler = RotatingFileHandler(
             log_path,
             maxBytes=1024 * 512,
@@ -46,9 +95,13 @@ class ImportadorMasterPro:
         df = self._leer_archivo()
         self._validar_columnas(df)
 
+        if self.bulk:
+            return self._cargar_bulk(df)
+
         resultados = {
             "creados": 0,
             "actualizados": 0,
+            "sin_cambios": 0,
             "errores": 0
         }
 
@@ -71,10 +124,11 @@ class ImportadorMasterPro:
     def _leer_archivo(self):
         ext = self.archivo.lower()
 
+        # codigo siempre como texto (evita "1001.0" en columnas con vacíos)
         if ext.endswith(".csv"):
-            df = pd.read_csv(self.archivo)
+            df = pd.read_csv(self.archivo, dtype={"codigo": str})
         elif ext.endswith(".xlsx"):
-            df = pd.read_excel(self.archivo)
+            df = pd.read_excel(self.archivo, dtype={"codigo": str})
         else:
             raise ValueError("Formato no soportado. Use CSV o XLSX.")
 
@@ -88,53 +142,501 @@ class ImportadorMasterPro:
         if faltantes:
             raise ValueError(f"Faltan columnas obligatorias: {faltantes}")
 
-    def _procesar_fila(self, row, resultados):
-        categoria, _ = Categoria.objects.get_or_create(
-            nombre=str(row["categoria"]).strip()
-        )
+    # =====================================================
+    #   MODO BULK
+    # =====================================================
+    def _texto(self, serie):
+        return serie.fillna("").astype(str).str.strip()
 
-        prod, created = Producto.objects.update_or_create(
-            codigo=str(row["codigo"]).strip(),
-            defaults={
-                "nombre": str(row["nombre"]).strip(),
-                "precio": float(row["precio"]),
-                "descripcion": row.get("descripcion", ""),
-                "categoria": categoria,
-                "destacado": bool(row.get("destacado", False)),
-            },
-        )
+    def _normalizar(self, df):
+        """Normaliza y valida todas las filas de una vez. Devuelve (df, errores)."""
+        out = pd.DataFrame({
+            "codigo": self._texto(df["codigo"]),
+            "nombre": self._texto(df["nombre"]),
+            "categoria": self._texto(df["categoria"]),
+            "precio": pd.to_numeric(df["precio"], errors="coerce").round(2),
+        })
 
-        if created:
-            resultados["creados"] += 1
-            self.logger.info(f"Producto creado: {prod.codigo}")
+        if "descripcion" in df.columns:
+            out["descripcion"] = self._texto(df["descripcion"])
         else:
-            resultados["actualizados"] += 1
-            self.logger.info(f"Producto actualizado: {prod.codigo}")
+            out["descripcion"] = ""
 
-        # imagen automática (Cloudinary + local)
-        self._asignar_imagen(prod, row)
+        if "destacado" in df.columns:
+            out["destacado"] = df["destacado"].map(es_verdadero).astype(bool)
+        else:
+            out["destacado"] = False
 
-    def _asignar_imagen(self, prod, row):
-        if "imagen" not in row or pd.isna(row["imagen"]):
-            return
+        if "imagen" in df.columns:
+            out["imagen"] = self._texto(df["imagen"])
+        else:
+            out["imagen"] = ""
+
+        invalidas = (
+            (out["codigo"] == "")
+            | (out["nombre"] == "")
+            | (out["categoria"] == "")
+            | out["precio"].isna()
+            | (out["precio"] < 0)
+        )
+        errores = out[invalidas]
+
+        # Si un código se repite en el archivo, gana la última fila
+        validas = out[~invalidas].drop_duplicates("codigo", keep="last")
+        return validas, errores
+
+    def _resolver_categorias(self, nombres, crear=True):
+        """{nombre: id} creando en un solo INSERT las que falten (si crear=True)."""
+        existentes = dict(
+            Categoria.objects.filter(nombre__in=nombres).values_list("nombre", "id")
+        )
+        nuevas = [Categoria(nombre=n) for n in nombres if n not in existentes]
+        if nuevas and crear:
+            Categoria.objects.bulk_create(nuevas, batch_size=self.chunk_size)
+            existentes.update(
+                Categoria.objects.filter(
+                    nombre__in=[c.nombre for c in nuevas]
+                ).values_list("nombre", "id")
+            )
+            self.logger.info(f"Categorías creadas: {len(nuevas)}")
+        return existentes
+
+    def _existentes(self, codigos):
+        """{codigo: dict de valores actuales}, consultando en bloques."""
+        existentes = {}
+        for i in range(0, len(codigos), self.chunk_size):
+            bloque = codigos[i:i + self.chunk_size]
+            for fila in Producto.objects.filter(codigo__in=bloque).values(
+                "id", "codigo", "categoria_id", "categoria__nombre", *CAMPOS_PRODUCTO
+            ):
+                existentes[fila["codigo"]] = fila
+        return existentes
 
-        filename = str(row["imagen"]).strip()
+    def _resolver_imagen(self, valor, actual):
+        if not valor:
+            return actual
 
         # 1) Si es URL (Cloudinary)
-        if filename.startswith("http://") or filename.startswith("https://"):
-            prod.imagen = filename
-            prod.save()
-            self.logger.info(f"URL Cloudinary asignada: {filename} → {prod.codigo}")
-            return
+        if valor.startswith("http://") or valor.startswith("https://"):
+            return valor
 
         # 2) Imagen local (desarrollo)
-        path = os.path.join(settings.MEDIA_ROOT, filename)
+        if os.path.exists(os.path.join(settings.MEDIA_ROOT, valor)):
+            return valor
 
-        if os.path.exists(path):
-            prod.imagen.name = filename
-            prod.save()
-            self.logger.info(f"Imagen local asignada: {filename} → {prod.codigo}")
-        else:
-            self.logger.warning(
-                f"Imagen no encontrada en media/ ni es URL válida: {filename}"
+        self.logger.warning(
+            f"Imagen no encontrada en media/ ni es URL válida: {valor}"
+        )
+        return actual
+
+    def _diferencias(self, actual, valores, categoria_nombre):
+        """{campo: [antes, después]} solo con los campos que cambian."""
+        cambios = {}
+        for campo in CAMPOS_PRODUCTO:
+            antes, despues = actual[campo], valores[campo]
+            if campo == "descripcion":
+                antes = antes or ""
+            if antes != despues:
+                cambios[campo] = [antes, despues]
+
+        if actual["categoria_id"] != valores["categoria_id"]:
+            cambios["categoria"] = [actual["categoria__nombre"], categoria_nombre]
+
+        if "precio" in cambios:
+            cambios["precio"] = [str(v) if v is not None else None for v in cambios["precio"]]
+        return cambios
+
+    def _planificar(self, df, categorias, existentes):
+        """
+        Compara el DataFrame normalizado con lo que hay en la base, en memoria.
+        Devuelve (nuevos, actualizados, cambios, sin_cambios).
+        """
+        ahora = timezone.now()
+
+        nuevos = []
+        actualizados = []
+        cambios = []
+        sin_cambios = 0
+
+        for fila in df.itertuples(index=False):
+            actual = existentes.get(fila.codigo)
+            valores = {
+                "nombre": fila.nombre,
+                "precio": Decimal(f"{fila.precio:.2f}"),
+                "descripcion": fila.descripcion,
+                "destacado": bool(fila.destacado),
+                "categoria_id": categorias.get(fila.categoria),
+                "imagen": self._resolver_imagen(
+                    fila.imagen, actual["imagen"] if actual else None
+                ),
+            }
+
+            if actual is None:
+                nuevos.append(Producto(codigo=fila.codigo, **valores))
+                continue
+
+            diff = self._diferencias(actual, valores, fila.categoria)
+            if not diff:
+                # Sin cambios: no se toca la fila (ni "actualizado" ni el cache)
+                sin_cambios += 1
+                continue
+
+            actualizados.append(Producto(pk=actual["id"], actualizado=ahora, **valores))
+            cambios.append({"codigo": fila.codigo, "cambios": diff})
+
+        return nuevos, actualizados, cambios, sin_cambios
+
+    def _aplicar(self, df, resultados):
+        """
+        Escribe un DataFrame ya normalizado y suma los contadores en
+        `resultados`. Debe correr dentro de una transacción.
+        """
+        df = df.drop_duplicates("codigo", keep="last")
+        categorias = self._resolver_categorias(df["categoria"].unique().tolist())
+        existentes = self._existentes(df["codigo"].tolist())
+
+        nuevos, actualizados, _, sin_cambios = self._planificar(df, categorias, existentes)
+
+        Producto.objects.bulk_create(nuevos, batch_size=self.chunk_size)
+        Producto.objects.bulk_update(
+            actualizados,
+            CAMPOS_PRODUCTO + ["categoria_id", "actualizado"],
+            batch_size=self.chunk_size,
+        )
+
+        # bulk_* no dispara señales
+        if nuevos or actualizados:
+            invalidar_catalogo()
+
+        resultados["creados"] += len(nuevos)
+        resultados["actualizados"] += len(actualizados)
+        resultados["sin_cambios"] += sin_cambios
+
+    # =====================================================
+    #   SIMULACIÓN (dry-run)
+    # =====================================================
+    def simular(self, filas_por_bloque=5000):
+        """
+        Calcula qué códigos se crearían, cuáles se actualizarían (con el
+        antes/después de cada campo) y cuántos quedan igual. No escribe nada.
+        """
+        reporte = {
+            "crear": [],
+            "actualizar": [],
+            "sin_cambios": 0,
+            "errores": 0,
+        }
+
+        for inicio, df in self._leer_por_bloques(filas_por_bloque):
+            self._validar_columnas(df)
+            df, errores = self._normalizar(df)
+            if len(errores):
+                reporte["errores"] += len(errores)
+                self._registrar_invalidas(errores, inicio)
+
+            df = df.drop_duplicates("codigo", keep="last")
+            categorias = self._resolver_categorias(
+                df["categoria"].unique().tolist(), crear=False
             )
+            existentes = self._existentes(df["codigo"].tolist())
+
+            nuevos, _, cambios, sin_cambios = self._planificar(df, categorias, existentes)
+            reporte["crear"].extend(p.codigo for p in nuevos)
+            reporte["actualizar"].extend(cambios)
+            reporte["sin_cambios"] += sin_cambios
+
+        self.logger.info(
+            f"SIMULACIÓN — crear: {len(reporte['crear'])}, "
+            f"actualizar: {len(reporte['actualizar'])}, "
+            f"sin cambios: {reporte['sin_cambios']}, errores: {reporte['errores']}"
+        )
+        return reporte
+
+    def _registrar_invalidas(self, errores, desplazamiento=0):
+        for idx, fila in errores.iterrows():
+            self.logger.error(f"Fila {idx + desplazamiento} inválida: {fila.to_dict()}")
+
+    def _cargar_bulk(self, df):
+        resultados = {
+            "creados": 0,
+            "actualizados": 0,
+            "sin_cambios": 0,
+            "errores": 0
+        }
+
+        df, errores = self._normalizar(df)
+        if len(errores):
+            resultados["errores"] = len(errores)
+            self._registrar_invalidas(errores)
+            self.logger.error("ROLLBACK GENERAL — importación abortada.")
+            return resultados
+
+        try:
+            with transaction.atomic():
+                self._aplicar(df, resultados)
+        except Exception as e:
+            resultados.update(creados=0, actualizados=0, sin_cambios=0)
+            resultados["errores"] += 1
+            self.logger.error(f"ROLLBACK GENERAL — importación abortada: {e}")
+            return resultados
+
+        self.logger.info(f"IMPORTACIÓN FINALIZADA — {resultados}")
+        return resultados
+
+    # =====================================================
+    #   MODO STREAMING (archivos grandes, memoria acotada)
+    # =====================================================
+    def _leer_por_bloques(self, filas_por_bloque, saltar=0):
+        """Genera (fila_inicial, DataFrame) sin cargar el archivo entero."""
+        ext = self.archivo.lower()
+
+        if ext.endswith(".csv"):
+            lector = pd.read_csv(
+                self.archivo,
+                dtype={"codigo": str},
+                chunksize=filas_por_bloque,
+                skiprows=range(1, saltar + 1),
+            )
+            inicio = saltar
+            for df in lector:
+                yield inicio, df.reset_index(drop=True)
+                inicio += len(df)
+        elif ext.endswith(".xlsx"):
+            yield from self._bloques_xlsx(filas_por_bloque, saltar)
+        else:
+            raise ValueError("Formato no soportado. Use CSV o XLSX.")
+
+    def _bloques_xlsx(self, filas_por_bloque, saltar):
+        from openpyxl import load_workbook
+
+        wb = load_workbook(self.archivo, read_only=True, data_only=True)
+        try:
+            filas = wb.active.iter_rows(values_only=True)
+            encabezado = [
+                str(c).strip() if c is not None else "" for c in next(filas, ())
+            ]
+
+            inicio = saltar
+            bloque = []
+            for i, valores in enumerate(filas):
+                if i < saltar:
+                    continue
+                bloque.append(valores[:len(encabezado)])
+                if len(bloque) == filas_por_bloque:
+                    yield inicio, self._df_xlsx(encabezado, bloque)
+                    inicio += len(bloque)
+                    bloque = []
+
+            if bloque:
+                yield inicio, self._df_xlsx(encabezado, bloque)
+        finally:
+            wb.close()
+
+    def _df_xlsx(self, encabezado, filas):
+        df = pd.DataFrame.from_records(filas, columns=encabezado)
+        if "codigo" in df.columns:
+            df["codigo"] = df["codigo"].map(codigo_texto)
+        return df
+
+    # ---- checkpoints (última fila confirmada por archivo) ----
+    def _ruta_checkpoints(self):
+        return os.path.join(settings.BASE_DIR, "logs", "importador_checkpoints.json")
+
+    def _clave_checkpoint(self):
+        st = os.stat(self.archivo)
+        return f"{os.path.abspath(self.archivo)}|{st.st_size}|{int(st.st_mtime)}"
+
+    def _checkpoints(self):
+        try:
+            with open(self._ruta_checkpoints(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_checkpoints(self, datos):
+        ruta = self._ruta_checkpoints()
+        tmp = f"{ruta}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, ruta)
+
+    def _leer_checkpoint(self):
+        return int(self._checkpoints().get(self._clave_checkpoint(), 0))
+
+    def _guardar_checkpoint(self, filas_confirmadas):
+        datos = self._checkpoints()
+        datos[self._clave_checkpoint()] = filas_confirmadas
+        self._guardar_checkpoints(datos)
+
+    def _borrar_checkpoint(self):
+        datos = self._checkpoints()
+        if datos.pop(self._clave_checkpoint(), None) is not None:
+            self._guardar_checkpoints(datos)
+
+    def cargar_streaming(self, filas_por_bloque=5000, reanudar=True, todo_o_nada=False):
+        """
+        Importa el archivo por bloques con memoria acotada.
+
+        - Por defecto confirma cada bloque por separado y guarda la última
+          fila confirmada: si se corta, la próxima corrida sigue desde ahí.
+        - todo_o_nada=True valida el archivo entero volcándolo a la tabla
+          de staging y lo aplica en una única transacción.
+        """
+        if todo_o_nada:
+            return self._cargar_staging(filas_por_bloque)
+
+        resultados = {
+            "creados": 0,
+            "actualizados": 0,
+            "sin_cambios": 0,
+            "errores": 0
+        }
+
+        desde = self._leer_checkpoint() if reanudar else 0
+        if desde:
+            self.logger.info(f"Reanudando {self.archivo} desde la fila {desde}")
+
+        for inicio, df in self._leer_por_bloques(filas_por_bloque, saltar=desde):
+            self._validar_columnas(df)
+            leidas = len(df)
+
+            df, errores = self._normalizar(df)
+            if len(errores):
+                resultados["errores"] += len(errores)
+                self._registrar_invalidas(errores, inicio)
+                self.logger.error(
+                    f"Importación detenida en el bloque que empieza en la fila {inicio}; "
+                    f"las filas anteriores quedaron confirmadas."
+                )
+                return resultados
+
+            parcial = dict.fromkeys(resultados, 0)
+            try:
+                with transaction.atomic():
+                    self._aplicar(df, parcial)
+            except Exception as e:
+                resultados["errores"] += 1
+                self.logger.error(f"ROLLBACK del bloque desde la fila {inicio}: {e}")
+                return resultados
+
+            for clave, valor in parcial.items():
+                resultados[clave] += valor
+            self._guardar_checkpoint(inicio + leidas)
+            self.logger.info(f"Bloque confirmado hasta la fila {inicio + leidas}")
+
+        self._borrar_checkpoint()
+        self.logger.info(f"IMPORTACIÓN FINALIZADA — {resultados}")
+        return resultados
+
+    def _cargar_staging(self, filas_por_bloque):
+        resultados = {
+            "creados": 0,
+            "actualizados": 0,
+            "sin_cambios": 0,
+            "errores": 0
+        }
+        lote = uuid.uuid4().hex
+
+        try:
+            # 1) Validar y volcar a staging, bloque por bloque
+            for inicio, df in self._leer_por_bloques(filas_por_bloque):
+                self._validar_columnas(df)
+                df, errores = self._normalizar(df)
+
+                if len(errores):
+                    resultados["errores"] += len(errores)
+                    self._registrar_invalidas(errores, inicio)
+                    continue  # se sigue validando para reportar todo
+
+                FilaImportacion.objects.bulk_create(
+                    [
+                        FilaImportacion(lote=lote, fila=inicio + idx, datos=datos)
+                        for idx, datos in zip(df.index, df.to_dict("records"))
+                    ],
+                    batch_size=self.chunk_size,
+                )
+
+            if resultados["errores"]:
+                self.logger.error("ROLLBACK GENERAL — importación abortada.")
+                return resultados
+
+            # 2) Aplicar todo en una transacción, leyendo staging por bloques
+            with transaction.atomic():
+                staging = (
+                    FilaImportacion.objects.filter(lote=lote)
+                    .order_by("fila")
+                    .values_list("datos", flat=True)
+                )
+                bloque = []
+                for datos in staging.iterator(chunk_size=filas_por_bloque):
+                    bloque.append(datos)
+                    if len(bloque) == filas_por_bloque:
+                        self._aplicar(pd.DataFrame.from_records(bloque), resultados)
+                        bloque = []
+
+                if bloque:
+                    self._aplicar(pd.DataFrame.from_records(bloque), resultados)
+        except Exception as e:
+            resultados.update(creados=0, actualizados=0, sin_cambios=0)
+            resultados["errores"] += 1
+            self.logger.error(f"ROLLBACK GENERAL — importación abortada: {e}")
+            return resultados
+        finally:
+            FilaImportacion.objects.filter(lote=lote).delete()
+
+        self.logger.info(f"IMPORTACIÓN FINALIZADA — {resultados}")
+        return resultados
+
+    # =====================================================
+    #   MODO FILA POR FILA (original)
+    # =====================================================
+    def _celda(self, row, columna):
+        valor = row.get(columna)
+        if valor is None or pd.isna(valor):
+            return ""
+        return str(valor).strip()
+
+    def _procesar_fila(self, row, resultados):
+        """
+        Mismo criterio que el modo bulk: se compara con lo que hay en la
+        base y solo se escribe si algo cambió (un save() sin cambios
+        pisaría "actualizado" e invalidaría el catálogo).
+        """
+        codigo = codigo_texto(row["codigo"]).strip()
+        categoria, _ = Categoria.objects.get_or_create(
+            nombre=str(row["categoria"]).strip()
+        )
+        actual = Producto.objects.filter(codigo=codigo).values(
+            "id", "codigo", "categoria_id", "categoria__nombre", *CAMPOS_PRODUCTO
+        ).first()
+
+        valores = {
+            "nombre": str(row["nombre"]).strip(),
+            "precio": Decimal(f"{float(row['precio']):.2f}"),
+            "descripcion": self._celda(row, "descripcion"),
+            "destacado": es_verdadero(row.get("destacado")),
+            "categoria_id": categoria.id,
+            "imagen": self._resolver_imagen(
+                self._celda(row, "imagen"), actual["imagen"] if actual else None
+            ),
+        }
+
+        if actual is None:
+            Producto.objects.create(codigo=codigo, **valores)
+            resultados["creados"] += 1
+            self.logger.info(f"Producto creado: {codigo}")
+            return
+
+        diff = self._diferencias(actual, valores, categoria.nombre)
+        if not diff:
+            resultados["sin_cambios"] += 1
+            return
+
+        prod = Producto(pk=actual["id"], codigo=codigo, **valores)
+        campos = [c for c in CAMPOS_PRODUCTO if c in diff]
+        if "categoria" in diff:
+            campos.append("categoria")
+        # save() con update_fields: dispara post_save (versión del catálogo)
+        prod.save(update_fields=campos + ["actualizado"])
+        resultados["actualizados"] += 1
+        self.logger.info(f"Producto actualizado: {codigo} — {diff}")
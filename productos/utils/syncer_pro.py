@@ -3,7 +3,11 @@ import logging
 from logging.handlers import RotatingFileHandler
 from django.conf import settings
 from django.db import transaction
-from productos.models import Producto
+from django.utils import timezone
+from productos.cache import invalidar_catalogo
+from productos.huellas import IndiceHuellas, hash_archivo
+from productos.models import HuellaImagen, Producto
+from productos.utils.emparejador import Emparejador
 
 
 class SyncerMasterPro:
@@ -12,10 +16,13 @@ class SyncerMasterPro:
     - Compatible Cloudinary (no sobrescribe URLs)
     - Logs rotativos
     - Rollback ante error
-    - Asignación por coincidencia de código
+    - Asignación por coincidencia de código (índice en memoria, un solo
+      bulk_update; las coincidencias ambiguas se informan y no se asignan)
     """
 
-    def __init__(self):
+    def __init__(self, indice=None):
+        # IndiceHuellas compartido con otras etapas de la misma corrida
+        self.indice = indice
         self._configurar_logs()
 
     def _configurar_logs(self):
@@ -27,6 +34,9 @@ class SyncerMasterPro:
         self.logger = logging.getLogger("syncer_master_pro")
         self.logger.setLevel(logging.INFO)
 
+        if self.logger.handlers:
+            return
+
         handler = RotatingFileHandler(
             log_path,
             maxBytes=1024 * 512,
@@ -38,52 +48,109 @@ class SyncerMasterPro:
         handler.setFormatter(formatter)
         self.logger.addHandler(handler)
 
+    def _archivos(self, media_path):
+        with os.scandir(media_path) as it:
+            return [e.name for e in it if e.is_file()]
+
     def sync(self):
         media_path = settings.MEDIA_ROOT
-        files = os.listdir(media_path)
-        productos = Producto.objects.all()
+        files = self._archivos(media_path)
+
+        # Una sola consulta: todo el emparejamiento se hace en memoria
+        filas = list(
+            Producto.objects.exclude(codigo__isnull=True)
+            .exclude(codigo="")
+            .values_list("id", "codigo", "imagen")
+        )
+        emparejador = Emparejador((pk, codigo) for pk, codigo, _ in filas)
+        datos = {pk: (codigo, imagen) for pk, codigo, imagen in filas}
 
         resultados = {
             "asignadas": 0,
             "omitidas": 0,
-            "errores": 0
+            "errores": 0,
+            "ambiguas": [],
         }
 
+        emparejado = emparejador.emparejar_todos(files)
+
+        for f in emparejado["sin_producto"]:
+            self.logger.warning(f"No hay producto para imagen: {f}")
+        for amb in emparejado["ambiguas"]:
+            codigos = [datos[pk][0] for pk in amb["productos"]]
+            self.logger.warning(
+                f"Imagen ambigua ({amb['nivel']}): {amb['archivo']} → {codigos}"
+            )
+            resultados["ambiguas"].append(
+                {"archivo": amb["archivo"], "codigos": codigos}
+            )
+        for rep in emparejado["repetidas"]:
+            self.logger.warning(
+                f"Omitiendo {rep['archivo']} — {datos[rep['producto']][0]} "
+                f"ya recibe {rep['asignado']}"
+            )
+
+        resultados["omitidas"] = (
+            len(emparejado["sin_producto"])
+            + len(emparejado["ambiguas"])
+            + len(emparejado["repetidas"])
+        )
+
+        if self.indice is None:
+            self.indice = IndiceHuellas.cargar()
+
+        ahora = timezone.now()
+        cambios = []
+        huellas = []
+        for pk, f in emparejado["asignaciones"].items():
+            codigo, imagen = datos[pk]
+
+            # si ya tiene URL Cloudinary, NO tocar
+            if imagen and str(imagen).startswith("http"):
+                self.logger.info(f"Omitiendo {codigo} — tiene URL Cloudinary")
+                resultados["omitidas"] += 1
+                continue
+
+            # El mismo contenido ya pertenece a otro producto
+            hash_local = hash_archivo(os.path.join(media_path, f))
+            dueno = self.indice.producto(hash_local)
+            if dueno is not None and dueno != pk:
+                self.logger.warning(
+                    f"Omitiendo {f} — la misma imagen ya es del producto {dueno}"
+                )
+                resultados["omitidas"] += 1
+                continue
+            if hash_local not in self.indice:
+                self.indice.reservar(hash_local)
+                self.indice.asignar(hash_local, pk)
+                huellas.append(HuellaImagen(hash=hash_local, producto_id=pk, origen=f[:500]))
+
+            if imagen == f:
+                continue
+
+            cambios.append(Producto(pk=pk, imagen=f, actualizado=ahora))
+            self.logger.info(f"Imagen asignada: {f} → {codigo}")
+
         try:
             with transaction.atomic():
-                for f in files:
-                    nombre = f.lower()
-
-                    # productos cuyo código coincide con el nombre de archivo
-                    candidatos = productos.filter(codigo__icontains=nombre)
-
-                    if not candidatos:
-                        resultados["omitidas"] += 1
-                        self.logger.warning(f"No hay producto para imagen: {f}")
-                        continue
-
-                    for p in candidatos:
-                        # si ya tiene URL Cloudinary, NO tocar
-                        if p.imagen and str(p.imagen).startswith("http"):
-                            self.logger.info(
-                                f"Omitiendo {p.codigo} — tiene URL Cloudinary"
-                            )
-                            continue
-
-                        try:
-                            p.imagen.name = f
-                            p.save()
-                            resultados["asignadas"] += 1
-                            self.logger.info(f"Imagen asignada: {f} → {p.codigo}")
-                        except Exception as e:
-                            resultados["errores"] += 1
-                            self.logger.error(
-                                f"ERROR asignando imagen {f} a {p.codigo} — {e}"
-                            )
-                            raise e  # rollback
-        except Exception:
-            self.logger.error("ROLLBACK GENERAL — sincronización abortada.")
+                Producto.objects.bulk_update(
+                    cambios, ["imagen", "actualizado"], batch_size=500
+                )
+                HuellaImagen.objects.bulk_create(
+                    huellas, batch_size=500, ignore_conflicts=True
+                )
+                if cambios:
+                    # bulk_update no dispara post_save
+                    invalidar_catalogo()
+        except Exception as e:
+            resultados["errores"] += len(cambios)
+            self.logger.error(f"ROLLBACK GENERAL — sincronización abortada. {e}")
             return resultados
 
-        self.logger.info(f"SINCRONIZACIÓN COMPLETA — {resultados}")
+        resultados["asignadas"] = len(cambios)
+        self.logger.info(
+            f"SINCRONIZACIÓN COMPLETA — asignadas: {resultados['asignadas']}, "
+            f"omitidas: {resultados['omitidas']}, "
+            f"ambiguas: {len(resultados['ambiguas'])}"
+        )
         return resultados
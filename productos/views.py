@@ -1,9 +1,20 @@
 # productos/views.py
 from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
+from django.db.models import Prefetch
 
+from .busqueda import BusquedaFilter
+from .cache import CatalogoCacheMixin, version_catalogo
+from .campos import CamposDinamicosViewMixin, columnas_de
+from .condicional import CatalogoCondicionalMixin
+from .descarga import FORMATOS_DESCARGA, respuesta_exportacion
 from .models import Categoria, Producto
+from .paginacion import CatalogoPagination
+from .snapshot import leer_manifiesto
 from .serializers import (
     CategoriaSerializer,
     ProductoListSerializer,
@@ -19,10 +30,35 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return bool(request.user and request.user.is_staff)
 
 
+class ListaRapidaMixin(CamposDinamicosViewMixin):
+    """
+    list() de solo lectura para productos: lee dicts con .values() y arma
+    la respuesta con ProductoListSerializer.serializar_rapido, sin
+    instanciar modelos ni campos del serializer por fila. ?fields= y
+    ?expand= deciden qué columnas se leen.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        context = self.get_serializer_context()
+        filas = ProductoListSerializer.valores(
+            queryset, context.get("campos"), context.get("expandir") or ()
+        )
+
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            data = ProductoListSerializer.serializar_rapido(page, context)
+            return self.get_paginated_response(data)
+
+        return Response(ProductoListSerializer.serializar_rapido(filas, context))
+
+
 # ============================================
 #   CATEGORÍAS
 # ============================================
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(
+    CatalogoCondicionalMixin, CamposDinamicosViewMixin, viewsets.ModelViewSet,
+):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -30,11 +66,35 @@ class CategoriaViewSet(viewsets.ModelViewSet):
     search_fields = ["nombre", "descripcion"]
     ordering_fields = ["nombre", "orden"]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.request.method not in permissions.SAFE_METHODS:
+            return qs
+
+        campos = self.campos_pedidos() or list(CategoriaSerializer.COLUMNAS)
+        qs = qs.only(*columnas_de(CategoriaSerializer.COLUMNAS, campos))
+
+        if "productos" in self.expandir_pedidos():
+            productos = (
+                Producto.objects.only("id", "nombre", "precio", "imagen", "categoria_id")
+                .order_by("orden", "-destacado", "nombre")
+            )
+            qs = qs.prefetch_related(Prefetch("productos", queryset=productos))
+        return qs
+
+    def get_serializer_context(self):
+        ctx = super().get_serializer_context()
+        ctx["imagen_preset"] = "card"
+        return ctx
+
 
 # ============================================
 #   PRODUCTOS
 # ============================================
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(
+    CatalogoCondicionalMixin, CatalogoCacheMixin, ListaRapidaMixin,
+    viewsets.ModelViewSet,
+):
     queryset = (
         Producto.objects.only(
             "id",
@@ -49,7 +109,10 @@ class ProductoViewSet(viewsets.ModelViewSet):
         .all()
     )
 
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    # ?cursor= / ?paginacion=cursor: keyset para scroll infinito
+    pagination_class = CatalogoPagination
+    # ?q= búsqueda por relevancia; ?search= queda por compatibilidad
+    filter_backends = [BusquedaFilter, filters.SearchFilter, filters.OrderingFilter]
     permission_classes = [IsAdminOrReadOnly]
     search_fields = ["nombre", "descripcion", "categoria__nombre"]
     ordering_fields = ["precio", "nombre", "creado", "actualizado", "orden"]
@@ -59,12 +122,87 @@ class ProductoViewSet(viewsets.ModelViewSet):
             return ProductoListSerializer
         return ProductoDetailSerializer
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "list" or not self.es_lectura():
+            return qs
+
+        # Detalle: solo las columnas (y el JOIN) que pide ?fields=
+        campos = self.campos_pedidos() or list(ProductoDetailSerializer.COLUMNAS)
+        columnas = columnas_de(ProductoDetailSerializer.COLUMNAS, campos)
+        qs = qs.only(*columnas)
+        if "categoria" not in columnas:
+            qs = qs.select_related(None)
+        return qs
+
+    # ---------------------------------------------
+    #   MULTI-GET: productos/batch/?ids=1,2,3  (o POST {"ids": [...]})
+    # ---------------------------------------------
+    MAX_BATCH = 100
+    acciones_lectura = ("batch",)
+
+    @action(
+        detail=False,
+        methods=["get", "post"],
+        url_path="batch",
+        permission_classes=[permissions.AllowAny],
+    )
+    def batch(self, request):
+        """
+        Varios productos en una consulta, en el orden pedido. Mismo formato
+        que el detalle (acepta ?fields=); los ids inexistentes vuelven en
+        "faltantes".
+        """
+        if request.method == "POST":
+            crudo = request.data.get("ids")
+        else:
+            crudo = request.query_params.get("ids", "")
+        if isinstance(crudo, str):
+            crudo = crudo.split(",")
+
+        try:
+            ids = [int(i) for i in crudo if str(i).strip()]
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "'ids' debe ser una lista de enteros."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return Response(
+                {"error": "Falta 'ids'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > self.MAX_BATCH:
+            return Response(
+                {"error": f"Como máximo {self.MAX_BATCH} ids por pedido."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        productos = self.get_queryset().in_bulk(ids)
+        encontrados = [productos[i] for i in ids if i in productos]
+
+        return Response({
+            "results": self.get_serializer(encontrados, many=True).data,
+            "faltantes": [i for i in ids if i not in productos],
+        })
+
+    def get_serializer_context(self):
+        ctx = super().get_serializer_context()
+        ctx["imagen_preset"] = "card" if self.action == "list" else "detail"
+        return ctx
+
 
 # ============================================
 #   PRODUCTOS DESTACADOS
 # ============================================
-class ProductosDestacadosView(ListAPIView):
+class ProductosDestacadosView(
+    CatalogoCondicionalMixin, CatalogoCacheMixin, ListaRapidaMixin,
+    ListAPIView,
+):
     serializer_class = ProductoListSerializer
+    imagen_preset = "card"
 
     def get_queryset(self):
         return (
@@ -86,14 +224,20 @@ class ProductosDestacadosView(ListAPIView):
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx["request"] = self.request
+        ctx["imagen_preset"] = self.imagen_preset
         return ctx
 
 
 # ============================================
 #   PRODUCTOS POR CATEGORÍA
 # ============================================
-class ProductosPorCategoriaView(ListAPIView):
+class ProductosPorCategoriaView(
+    CatalogoCondicionalMixin, CatalogoCacheMixin, ListaRapidaMixin,
+    ListAPIView,
+):
     serializer_class = ProductoListSerializer
+    pagination_class = CatalogoPagination
+    imagen_preset = "card"
 
     def get_queryset(self):
         categoria_id = self.kwargs["categoria_id"]
@@ -116,4 +260,54 @@ class ProductosPorCategoriaView(ListAPIView):
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
         ctx["request"] = self.request
+        ctx["imagen_preset"] = self.imagen_preset
         return ctx
+
+
+# ============================================
+#   EXPORTACIÓN DEL CATÁLOGO (solo staff)
+# ============================================
+class ExportarCatalogoView(APIView):
+    """
+    GET ?formato=csv|jsonl|xlsx — descarga del catálogo completo en
+    streaming, con gzip al vuelo si el cliente lo acepta.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        formato = request.query_params.get("formato", "csv")
+        if formato not in FORMATOS_DESCARGA:
+            return Response(
+                {"error": f"Formato no soportado. Opciones: {', '.join(FORMATOS_DESCARGA)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return respuesta_exportacion(request, formato)
+
+
+# ============================================
+#   SNAPSHOT ESTÁTICO DEL CATÁLOGO
+# ============================================
+class SnapshotCatalogoView(APIView):
+    """
+    Manifiesto del último snapshot publicado: el cliente baja "url" una
+    vez (inmutable, cacheable para siempre) y vuelve a consultar acá.
+    "vigente" es False si el catálogo cambió y el worker todavía no
+    republicó; ahí conviene usar la API normal.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        manifiesto = leer_manifiesto() or {}
+        version = version_catalogo(request)
+        vigente = manifiesto.get("version") == version
+
+        response = Response({
+            "version": version,
+            "url": manifiesto.get("url"),
+            "snapshot_version": manifiesto.get("version"),
+            "vigente": vigente,
+            "generado": manifiesto.get("generado"),
+            "bytes": manifiesto.get("bytes"),
+        })
+        response["Cache-Control"] = "no-cache"
+        return response
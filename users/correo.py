@@ -0,0 +1,191 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CorreoPendiente
+
+logger = logging.getLogger("correo")
+
+
+def encolar_correo(asunto, cuerpo, destinatarios, html="", remitente=None):
+    """
+    Guarda el email en el outbox. No abre ninguna conexión SMTP: lo manda
+    `manage.py enviar_correos --loop` o, con CORREO_ENVIO_EN_PROCESO, un
+    hilo del propio proceso web cuando confirma la transacción.
+    """
+    correo = CorreoPendiente.objects.create(
+        asunto=asunto,
+        cuerpo=cuerpo,
+        html=html or "",
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+    if getattr(settings, "CORREO_ENVIO_EN_PROCESO", False):
+        transaction.on_commit(disparar_envio)
+    return correo
+
+
+def _mensaje(correo, conexion):
+    msg = EmailMultiAlternatives(
+        subject=correo.asunto,
+        body=correo.cuerpo,
+        from_email=correo.remitente,
+        to=correo.destinatarios,
+        connection=conexion,
+    )
+    if correo.html:
+        msg.attach_alternative(correo.html, "text/html")
+    return msg
+
+
+def espera_reintento(intentos, base_segundos=30):
+    """Backoff exponencial: 30s, 1m, 2m, 4m... con tope de 1 hora."""
+    return timedelta(seconds=min(base_segundos * 2 ** (intentos - 1), 3600))
+
+
+# Tiempo que un worker "alquila" los correos que tomó. Si muere a mitad
+# del lote, vuelven a estar disponibles cuando vence.
+ALQUILER = timedelta(minutes=10)
+
+
+def _tomar_lote(lote):
+    """
+    Transacción corta: elige los correos vencidos y les corre
+    proximo_intento al fin del alquiler para que ningún otro worker los
+    tome. El envío (I/O de red) pasa después, ya sin locks.
+    """
+    with transaction.atomic():
+        ahora = timezone.now()
+        qs = CorreoPendiente.objects.filter(
+            estado=CorreoPendiente.PENDIENTE,
+            proximo_intento__lte=ahora,
+        ).order_by("proximo_intento")
+
+        # Varios workers en paralelo no se pisan (Postgres)
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+
+        correos = list(qs[:lote])
+        if correos:
+            CorreoPendiente.objects.filter(pk__in=[c.pk for c in correos]).update(
+                proximo_intento=ahora + ALQUILER,
+                intentos=F("intentos") + 1,
+            )
+            for correo in correos:
+                correo.intentos += 1
+    return correos
+
+
+def _guardar(correo, **campos):
+    CorreoPendiente.objects.filter(pk=correo.pk).update(**campos)
+
+
+def enviar_lote(lote=50, max_intentos=5):
+    """
+    Manda hasta `lote` correos vencidos por una única conexión SMTP.
+    Los toma en una transacción corta y guarda el resultado de cada uno
+    apenas se envía. Devuelve {"enviados", "reintentos", "fallidos"}.
+    """
+    resultados = {"enviados": 0, "reintentos": 0, "fallidos": 0}
+
+    correos = _tomar_lote(lote)
+    if not correos:
+        return resultados
+
+    conexion = get_connection()
+    try:
+        conexion.open()
+        error_conexion = None
+    except Exception as e:
+        error_conexion = e
+
+    for correo in correos:
+        try:
+            if error_conexion:
+                raise error_conexion
+            _mensaje(correo, conexion).send()
+        except Exception as e:
+            error = str(e)[:2000]
+            if correo.intentos >= max_intentos:
+                _guardar(correo, estado=CorreoPendiente.FALLIDO, ultimo_error=error)
+                resultados["fallidos"] += 1
+            else:
+                _guardar(
+                    correo,
+                    proximo_intento=timezone.now() + espera_reintento(correo.intentos),
+                    ultimo_error=error,
+                )
+                resultados["reintentos"] += 1
+        else:
+            _guardar(correo, estado=CorreoPendiente.ENVIADO, enviado=timezone.now())
+            resultados["enviados"] += 1
+
+    try:
+        conexion.close()
+    except Exception:
+        pass
+
+    return resultados
+
+
+# =====================================================
+#   ENVÍO EN SEGUNDO PLANO (dentro del proceso web)
+# =====================================================
+# Un solo hilo de envío por proceso; los pedidos que llegan mientras
+# corre se acumulan en _hay_pendientes y los toma la siguiente vuelta.
+_envio_lock = threading.Lock()
+_hay_pendientes = threading.Event()
+_reintento = None
+
+
+def disparar_envio():
+    _hay_pendientes.set()
+    if _envio_lock.acquire(blocking=False):
+        threading.Thread(target=_vaciar_outbox, daemon=True).start()
+
+
+def _programar_reintento():
+    """Timer hasta el próximo correo en espera (reintentos con backoff)."""
+    global _reintento
+    if _reintento is not None:
+        _reintento.cancel()
+        _reintento = None
+
+    proximo = (
+        CorreoPendiente.objects.filter(estado=CorreoPendiente.PENDIENTE)
+        .order_by("proximo_intento")
+        .values_list("proximo_intento", flat=True)
+        .first()
+    )
+    if proximo is None:
+        return
+    espera = max((proximo - timezone.now()).total_seconds(), 1)
+    _reintento = threading.Timer(espera, disparar_envio)
+    _reintento.daemon = True
+    _reintento.start()
+
+
+def _vaciar_outbox(lote=50):
+    try:
+        while _hay_pendientes.is_set():
+            _hay_pendientes.clear()
+            while True:
+                res = enviar_lote(lote=lote)
+                if sum(res.values()) < lote:
+                    break
+        _programar_reintento()
+    except Exception:
+        logger.exception("Falló el envío en segundo plano del outbox")
+    finally:
+        connection.close()
+        _envio_lock.release()
+
+    # Llegó un pedido entre la última vuelta y el release
+    if _hay_pendientes.is_set():
+        disparar_envio()
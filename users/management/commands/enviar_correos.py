@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.correo import enviar_lote
+
+
+class Command(BaseCommand):
+    help = "Envía los correos pendientes del outbox (una conexión SMTP por lote)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=50)
+        parser.add_argument("--max-intentos", type=int, default=5)
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Queda corriendo y revisa el outbox cada --intervalo segundos",
+        )
+        parser.add_argument("--intervalo", type=float, default=10)
+
+    def handle(self, *args, **opts):
+        while True:
+            # Vaciar todo lo vencido antes de dormir
+            while True:
+                res = enviar_lote(lote=opts["lote"], max_intentos=opts["max_intentos"])
+                if any(res.values()):
+                    self.stdout.write(str(res))
+                if sum(res.values()) < opts["lote"]:
+                    break
+
+            if not opts["loop"]:
+                break
+            time.sleep(opts["intervalo"])
+
+        self.stdout.write(self.style.SUCCESS("Outbox procesado"))
@@ -0,0 +1,43 @@
+from django.db import models
+from django.utils import timezone
+
+
+class CorreoPendiente(models.Model):
+    """
+    Outbox de emails salientes. Las vistas solo encolan;
+    el comando enviar_correos los manda en lotes.
+    """
+    PENDIENTE = "pendiente"
+    ENVIADO = "enviado"
+    FALLIDO = "fallido"
+
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (ENVIADO, "Enviado"),
+        (FALLIDO, "Fallido"),
+    ]
+
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    html = models.TextField(blank=True)
+    remitente = models.CharField(max_length=255)
+    destinatarios = models.JSONField(default=list)
+
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["estado", "proximo_intento"],
+                name="correo_pendiente_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} → {', '.join(self.destinatarios)} ({self.estado})"
@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .correo import enviar_lote
+from .models import CorreoPendiente
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    CORREO_ENVIO_EN_PROCESO=False,
+    FRONTEND_URL="https://frontend.example.com",
+)
+class OutboxCorreosTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_registro_encola_sin_enviar(self):
+        res = self.client.post(
+            reverse("register"),
+            {"username": "nuevo", "email": "nuevo@example.com", "password": "clave-segura-123"},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, 201)
+        correo = CorreoPendiente.objects.get()
+        self.assertEqual(correo.destinatarios, ["nuevo@example.com"])
+        self.assertEqual(correo.estado, CorreoPendiente.PENDIENTE)
+        self.assertEqual(mail.outbox, [])
+
+    def test_reset_password_encola_sin_enviar(self):
+        User.objects.create_user("cliente", "cliente@example.com", "clave-segura-123")
+
+        res = self.client.post(
+            reverse("password_reset"), {"email": "cliente@example.com"}, format="json"
+        )
+
+        self.assertEqual(res.status_code, 200)
+        correo = CorreoPendiente.objects.get()
+        self.assertIn("https://frontend.example.com/reset-password/", correo.cuerpo)
+        self.assertEqual(mail.outbox, [])
+
+    def test_enviar_lote_manda_y_marca_enviados(self):
+        User.objects.create_user("cliente", "cliente@example.com", "clave-segura-123")
+        self.client.post(
+            reverse("register"),
+            {"username": "nuevo", "email": "nuevo@example.com", "password": "clave-segura-123"},
+            format="json",
+        )
+        self.client.post(
+            reverse("password_reset"), {"email": "cliente@example.com"}, format="json"
+        )
+        self.assertEqual(CorreoPendiente.objects.count(), 2)
+
+        res = enviar_lote()
+
+        self.assertEqual(res, {"enviados": 2, "reintentos": 0, "fallidos": 0})
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            ["cliente@example.com", "nuevo@example.com"],
+        )
+        self.assertFalse(
+            CorreoPendiente.objects.exclude(estado=CorreoPendiente.ENVIADO).exists()
+        )
+        self.assertFalse(CorreoPendiente.objects.filter(enviado__isnull=True).exists())
+        # Ya enviados: una segunda pasada no hace nada
+        self.assertEqual(enviar_lote()["enviados"], 0)
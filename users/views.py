@@ -3,7 +3,6 @@ from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_str, force_bytes
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 
-from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 
@@ -12,6 +11,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
+from .correo import encolar_correo
 from .serializers import RegisterSerializer
 
 # =====================================================
@@ -30,14 +30,13 @@ class RegisterView(generics.CreateAPIView):
 
         html = render_to_string("emails/welcome.html", {"username": user.username})
 
-        msg = EmailMultiAlternatives(
-            subject="¡Bienvenido a Yoquet Diseños! ✨",
-            body="Gracias por registrarte.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email],
+        # Lo envía el comando enviar_correos, fuera del request
+        encolar_correo(
+            asunto="¡Bienvenido a Yoquet Diseños! ✨",
+            cuerpo="Gracias por registrarte.",
+            destinatarios=[user.email],
+            html=html,
         )
-        msg.attach_alternative(html, "text/html")
-        msg.send()
 
 
 # =====================================================
@@ -65,14 +64,12 @@ class RequestPasswordResetView(generics.GenericAPIView):
 
         html = render_to_string("emails/reset_password.html", {"reset_url": reset_url})
 
-        msg = EmailMultiAlternatives(
-            subject="Restablecé tu contraseña - Yoquet Diseños",
-            body=f"Restablecé tu contraseña aquí: {reset_url}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[email],
+        encolar_correo(
+            asunto="Restablecé tu contraseña - Yoquet Diseños",
+            cuerpo=f"Restablecé tu contraseña aquí: {reset_url}",
+            destinatarios=[email],
+            html=html,
         )
-        msg.attach_alternative(html, "text/html")
-        msg.send()
 
         return Response({"message": "Si el correo existe, enviamos instrucciones."}, status=200)
 